@@ -0,0 +1,91 @@
+"""
+consult_documentation: line-by-line scan of the docs folder versus the BM25 index.
+
+    python -m benchmarks.bench_docs_search --repeat 20
+"""
+import argparse
+import os
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import config
+from core.docs_index import DocsIndex
+from core.text_analysis import ITALIAN_STOPWORDS
+
+QUERIES = [
+    "come si usa una list comprehension",
+    "decoratori",
+    "dizionario chiavi valori",
+    "gestire le eccezioni try except",
+    "leggere e scrivere file",
+    "classi ed ereditarietà",
+    "moduli e package import",
+    "python",
+]
+
+
+def _legacy_search(query, docs_dir):
+    # Ricerca precedente: rilegge ogni riga e fa un test di sottostringa per parola chiave
+    translator = str.maketrans('', '', string.punctuation)
+    keywords = {t.translate(translator) for t in query.lower().split()}
+    keywords = {k for k in keywords if k and k not in ITALIAN_STOPWORDS}
+    scored = []
+    for root, _, files in os.walk(docs_dir):
+        for name in files:
+            if name.startswith("."):
+                continue
+            with open(os.path.join(root, name), encoding="utf-8", errors="ignore") as f:
+                for i, line in enumerate(f):
+                    score = sum(1 for k in keywords if k in line.lower())
+                    if score:
+                        scored.append((score, i, line.strip()[:150]))
+    scored.sort(key=lambda x: (-x[0], x[1]))
+    return scored[:15]
+
+
+def _median_ms(call, repeat):
+    timings = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            call(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", default=config.DOCS_DIR)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_file = os.path.join(tmp, "index.json")
+        start = time.perf_counter()
+        index = DocsIndex(args.docs, index_file)
+        index.refresh()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        reloaded = DocsIndex(args.docs, index_file)
+        reloaded.load()
+        reloaded.refresh()
+        load_ms = (time.perf_counter() - start) * 1000
+
+        legacy = _median_ms(lambda q: _legacy_search(q, args.docs), max(1, args.repeat // 10))
+        indexed = _median_ms(reloaded.search, args.repeat)
+
+    print(f"documenti: {len(index.docs)} passaggi, {len(index.postings)} termini")
+    print(f"costruzione indice  : {build_ms:9.1f} ms (una volta)")
+    print(f"caricamento + check : {load_ms:9.1f} ms (ad ogni avvio)")
+    print(f"scansione riga/riga : {legacy:9.3f} ms per query (p50)")
+    print(f"indice BM25         : {indexed:9.3f} ms per query (p50)")
+
+
+if __name__ == "__main__":
+    main()
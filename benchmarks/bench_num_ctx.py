@@ -0,0 +1,92 @@
+"""
+Fixed versus adaptive num_ctx: latency and resident model memory per scenario.
+
+Runs against the Ollama server in OLLAMA_URL (memory is read from /api/ps);
+with --stub it runs against the local stub server instead, which only
+exercises the code path (no memory figures).
+
+    python -m benchmarks.bench_num_ctx --repeat 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_ollama import StubOllamaServer
+from core import config
+from core.llm import _build_chat_payload
+from core.ollama_client import OllamaClient
+from core.prompts import tool_list_for, tool_names_for_category
+
+DOCS_SAMPLE_FILE = os.path.join("language_docs", "python_tutorial_it.txt")
+
+
+def _scenarios():
+    docs = ""
+    try:
+        with open(DOCS_SAMPLE_FILE, encoding="utf-8", errors="ignore") as f:
+            docs = f.read(6000)
+    except OSError:
+        pass
+    return [
+        ("general_chat", [{"role": "user", "content": "ciao, come stai?"}]),
+        ("system_command", [{"role": "user", "content": "apri il blocco note"}]),
+        (
+            "programming_question",
+            [{"role": "user", "content": f"Come si usa una list comprehension?\n{docs}"}],
+        ),
+    ]
+
+
+def _resident_memory(client):
+    try:
+        models = client.get("ps").get("models", [])
+    except Exception:
+        return None
+    for model in models:
+        if model.get("name") == config.MODEL_NAME or model.get("model") == config.MODEL_NAME:
+            return model.get("size_vram") or model.get("size")
+    return None
+
+
+def _run_mode(client, mode, repeat):
+    rows = []
+    with patch.object(config, "NUM_CTX_MODE", mode):
+        for category, messages in _scenarios():
+            tool_list = tool_list_for(tool_names_for_category(category))
+            payload = _build_chat_payload(messages, config.BASE_SPECIALIST_PROMPT, tool_list)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                client.chat(payload)
+                timings.append((time.perf_counter() - start) * 1000)
+            rows.append((category, payload["options"]["num_ctx"], statistics.median(timings), _resident_memory(client)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stub", action="store_true", help="usa il server stub locale")
+    args = parser.parse_args(argv)
+
+    server = StubOllamaServer().start() if args.stub else None
+    client = OllamaClient(base_url=server.url if server else None)
+    try:
+        for mode in ("fixed", "adaptive"):
+            print(f"=== {mode} ===")
+            for category, num_ctx, latency, memory in _run_mode(client, mode, args.repeat):
+                memory_text = f"{memory / 2**20:8.0f} MiB" if memory else "     n/d"
+                print(f"{category:<22} num_ctx {num_ctx:>6}   p50 {latency:9.1f} ms   memoria {memory_text}")
+    finally:
+        client.close()
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Per-call overhead of bare requests.post versus the pooled OllamaClient.
+
+Runs against a local stub server, so the numbers isolate connection setup
+and HTTP handling from model time.
+
+    python -m benchmarks.bench_ollama_client --calls 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from benchmarks.stub_ollama import StubOllamaServer
+from core.ollama_client import OllamaClient
+
+PAYLOAD = {
+    "model": "stub",
+    "messages": [{"role": "user", "content": "ciao"}],
+    "stream": False,
+}
+
+
+def _measure(call, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label, timings, connections):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{label:<16} mean {statistics.mean(timings):7.3f} ms   "
+        f"p50 {statistics.median(timings):7.3f} ms   p95 {p95:7.3f} ms   "
+        f"connessioni {connections}"
+    )
+    return statistics.mean(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    with StubOllamaServer() as server:
+        url = server.url
+
+        def bare_call():
+            resp = requests.post(url, json=PAYLOAD)
+            resp.raise_for_status()
+            resp.json()
+
+        bare_call()  # warm-up
+        start_conns = server.connections
+        bare = _report("requests.post", _measure(bare_call, args.calls), server.connections - start_conns)
+
+        client = OllamaClient(base_url=url)
+        client.chat(PAYLOAD)  # warm-up, apre la connessione del pool
+        start_conns = server.connections
+        pooled = _report("OllamaClient", _measure(lambda: client.chat(PAYLOAD), args.calls), server.connections - start_conns)
+        client.close()
+
+    print(f"Overhead risparmiato per chiamata: {bare - pooled:.3f} ms ({(1 - pooled / bare) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
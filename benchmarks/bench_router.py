@@ -0,0 +1,171 @@
+"""
+Router accuracy and latency: heuristic only, heuristic + local classifier, full LLM path.
+
+Runs a labeled corpus of Italian and English requests through each routing
+path and reports accuracy, confusion matrix, the share of inputs resolved
+without the LLM and p50/p95 latency. The LLM path talks to a local stub
+server that answers with the labeled category (so it measures plumbing, not
+model quality); with --live it uses the Ollama server in OLLAMA_URL.
+
+The classifier is evaluated out-of-fold: each input is classified by a model
+trained on the other folds, unless --model points to a trained model.
+
+    python -m benchmarks.bench_router --json router_bench.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_ollama import StubOllamaServer
+from core import config, router
+from core.classifier import NaiveBayesClassifier, load_samples
+from core.ollama_client import OllamaClient
+from core.telemetry import percentile
+
+CORPUS_FILE = os.path.join("benchmarks", "data", "router_corpus.jsonl")
+LABELS = ["programming_question", "system_command", "general_chat"]
+UNRESOLVED = "-"
+
+_USER_REQUEST = re.compile(r'User Request: "(.*)"', re.DOTALL)
+
+
+def _oracle(labels, confidence):
+    """Stub /api/generate handler that answers with the labeled category."""
+    def handler(payload):
+        match = _USER_REQUEST.search(payload.get("prompt", ""))
+        category = labels.get(match.group(1) if match else "", "general_chat")
+        return {
+            "model": payload.get("model", ""),
+            "response": json.dumps({"category": category, "confidence": confidence, "reason": "stub"}),
+            "done": True,
+        }
+    return handler
+
+
+def _folds(samples, folds, seed=0):
+    indexed = list(range(len(samples)))
+    random.Random(seed).shuffle(indexed)
+    return [indexed[fold::folds] for fold in range(folds)]
+
+
+def _classifiers(samples, model_path, folds):
+    """Maps each sample index to the classifier that must judge it."""
+    if model_path:
+        model = NaiveBayesClassifier.load(model_path)
+        return {index: model for index in range(len(samples))}
+    assigned = {}
+    for held_out in _folds(samples, folds):
+        held = set(held_out)
+        model = NaiveBayesClassifier().fit(s for i, s in enumerate(samples) if i not in held)
+        assigned.update({index: model for index in held_out})
+    return assigned
+
+
+def _summarize(results):
+    total = len(results)
+    confusion = {label: {predicted: 0 for predicted in LABELS + [UNRESOLVED]} for label in LABELS}
+    for expected, predicted, _, _ in results:
+        confusion.setdefault(expected, {p: 0 for p in LABELS + [UNRESOLVED]})
+        confusion[expected][predicted or UNRESOLVED] += 1
+    latencies = [latency for _, _, latency, _ in results]
+    return {
+        "samples": total,
+        "accuracy": sum(1 for e, p, _, _ in results if e == p) / total if total else 0.0,
+        "resolved_without_llm": sum(1 for *_, local in results if local) / total if total else 0.0,
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+        "confusion": confusion,
+    }
+
+
+def _timed(route, text):
+    start = time.perf_counter()
+    category = route(text)
+    return category, (time.perf_counter() - start) * 1000
+
+
+def run(samples, client, model_path=None, folds=5):
+    classifiers = _classifiers(samples, model_path, folds)
+    paths = {"heuristic": [], "classifier": [], "llm": []}
+
+    # Nessuna cache decisioni e nessun log: ogni input deve percorrere davvero il suo ramo
+    with patch.object(config, "ROUTER_CACHE_ENABLED", False), patch.object(config, "ROUTER_LOG_FILE", ""):
+        for index, (text, expected) in enumerate(samples):
+            with patch.object(router, "get_classifier", lambda: classifiers[index]):
+                category, latency = _timed(router._heuristic_route, text)
+                paths["heuristic"].append((expected, category, latency, category is not None))
+
+                category, latency = _timed(router.route_locally, text)
+                paths["classifier"].append((expected, category, latency, category is not None))
+                local = category is not None
+
+                category, latency = _timed(lambda t: router.classify_request(t, client=client), text)
+                paths["llm"].append((expected, category, latency, local))
+
+    return {name: _summarize(results) for name, results in paths.items()}
+
+
+def _print_report(report, threshold):
+    print(f"soglia classificatore {threshold:.2f}")
+    for name, stats in report.items():
+        print(
+            f"\n=== {name} ===\n"
+            f"accuracy {stats['accuracy']:.1%}   senza LLM {stats['resolved_without_llm']:.1%}   "
+            f"p50 {stats['p50_ms']:.2f} ms   p95 {stats['p95_ms']:.2f} ms"
+        )
+        columns = LABELS + [UNRESOLVED]
+        print(f"{'atteso / previsto':<22}" + "".join(f"{c[:12]:>14}" for c in columns))
+        for expected, row in stats["confusion"].items():
+            print(f"{expected:<22}" + "".join(f"{row[c]:>14}" for c in columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", nargs="+", default=[CORPUS_FILE, config.CLASSIFIER_SAMPLES_FILE])
+    parser.add_argument("--model", help="modello del classificatore; senza, valutazione out-of-fold")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=config.CLASSIFIER_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--live", action="store_true", help="usa il server Ollama in OLLAMA_URL")
+    parser.add_argument("--stub-delay", type=float, default=0.0, help="latenza simulata del router (s)")
+    parser.add_argument("--stub-confidence", type=float, default=0.9)
+    parser.add_argument("--json", help="scrive il report JSON in questo file ('-' = stdout)")
+    args = parser.parse_args(argv)
+
+    samples = load_samples(args.data)
+    if not samples:
+        print(f"Nessun esempio etichettato trovato in: {', '.join(args.data)}")
+        return 1
+
+    server = None
+    if not args.live:
+        handlers = {"generate": _oracle(dict(samples), args.stub_confidence)}
+        server = StubOllamaServer(delay=args.stub_delay, handlers=handlers).start()
+    client = OllamaClient(base_url=server.url if server else None)
+    try:
+        with patch.object(config, "CLASSIFIER_CONFIDENCE_THRESHOLD", args.threshold):
+            report = run(samples, client, args.model, args.folds)
+    finally:
+        client.close()
+        if server:
+            server.stop()
+
+    output = {"threshold": args.threshold, "samples": len(samples), "live": args.live, "paths": report}
+    if args.json == "-":
+        print(json.dumps(output, indent=2))
+        return 0
+    _print_report(report, args.threshold)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
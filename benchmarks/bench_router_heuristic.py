@@ -0,0 +1,111 @@
+"""
+Heuristic router: one re.search per pattern versus the precompiled alternations.
+
+Both implementations read the same rules from config, so the benchmark also
+checks that they agree on every input of the corpus.
+
+    python -m benchmarks.bench_router_heuristic --repeat 2000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import config
+from core.router import _compiled_rules, _heuristic_route
+
+# Richieste tipiche digitate nella CLI (italiano e inglese, con e senza match)
+CORPUS = [
+    "apri notepad",
+    "lancia VS Code per favore",
+    "mi potresti cercare il file report.pdf nei documenti?",
+    "trova le foto delle vacanze sul desktop",
+    "installa 7zip",
+    "open the calculator",
+    "find my tax documents",
+    "where is the manual of the printer",
+    "mostrami i file nella cartella download",
+    "list all files in this directory",
+    "imposta il tema scuro",
+    "change windows theme to light",
+    "apri powershell come amministratore",
+    "copia config.json in backup",
+    "rinomina la cartella vecchia",
+    "come si fa una lista in python",
+    "spiegami le list comprehension in Python",
+    "how do I parse json in javascript",
+    "ho un traceback con KeyError, cosa significa?",
+    "differenza tra classe e modulo",
+    "come funziona una funzione ricorsiva",
+    "what is a REST api",
+    "scrivi una query sql con join",
+    "pip non trova il package requests",
+    "npm install fallisce con error EACCES",
+    "ciao, come stai?",
+    "raccontami una barzelletta",
+    "chi sei?",
+    "che tempo fa domani?",
+    "grazie mille!",
+    "spiegami i decoratori",
+    "qual è la capitale della Francia",
+    "mi consigli un film per stasera",
+    "buongiorno",
+    "sai parlare inglese?",
+    "dimmi qualcosa di interessante sullo spazio",
+]
+
+
+def _legacy_rules():
+    return {
+        category: [entry if isinstance(entry, str) else entry[0] for entry in entries]
+        for category, entries in config.ROUTER_HEURISTIC_RULES.items()
+    }
+
+
+def _legacy_route(user_input, rules):
+    text = user_input.strip().lower()
+    if not text:
+        return "general_chat"
+    if text.startswith("/"):
+        return "system_command"
+    for category, patterns in rules.items():
+        if any(re.search(pattern, text) for pattern in patterns):
+            return category
+    return None
+
+
+def _measure(route, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in CORPUS:
+            route(text)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(CORPUS)) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    rules = _legacy_rules()
+    _compiled_rules()
+
+    mismatches = [text for text in CORPUS if _legacy_route(text, rules) != _heuristic_route(text)]
+    legacy_us = _measure(lambda text: _legacy_route(text, rules), args.repeat)
+    compiled_us = _measure(_heuristic_route, args.repeat)
+    routed = sum(1 for text in CORPUS if _heuristic_route(text))
+
+    print(f"input: {len(CORPUS)} ({routed} decisi dall'euristica), ripetizioni: {args.repeat}")
+    print(f"re.search per pattern : {legacy_us:8.2f} us/input")
+    print(f"alternanze compilate  : {compiled_us:8.2f} us/input ({legacy_us / compiled_us:.1f}x)")
+    print(f"decisioni diverse     : {len(mismatches)}")
+    for text in mismatches:
+        print(f"  - {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Minimal local stand-in for the Ollama HTTP API, used by benchmarks and tests.
+
+It speaks HTTP/1.1 with keep-alive, answers /api/chat, /api/generate and
+/api/embed with canned JSON and counts how many TCP connections were opened.
+A handler returning a list of dicts is sent as a chunked NDJSON stream, like
+Ollama does with "stream": true.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _default_chat(payload):
+    return {
+        "model": payload.get("model", ""),
+        "message": {
+            "role": "assistant",
+            "content": '{"thought": "stub", "action": "chat", "args": {"message": "ok"}}',
+        },
+        "done": True,
+    }
+
+
+def _default_generate(payload):
+    return {
+        "model": payload.get("model", ""),
+        "response": '{"category": "general_chat", "confidence": 0.9, "reason": "stub"}',
+        "done": True,
+    }
+
+
+def _default_embed(payload):
+    inputs = payload.get("input", [])
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    return {"model": payload.get("model", ""), "embeddings": [[0.0] * 8 for _ in inputs]}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        payload = json.loads(body or b"{}")
+        name = self.path.rstrip("/").rsplit("/", 1)[-1]
+
+        with self.server.lock:
+            self.server.requests.append((name, payload))
+
+        handler = self.server.handlers.get(name)
+        if handler is None:
+            self.send_error(404)
+            return
+
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        result = handler(payload)
+        if isinstance(result, list):
+            self._send_stream(result)
+            return
+
+        data = json.dumps(result).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+    def _send_stream(self, chunks):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                line = (json.dumps(chunk) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+                self.wfile.flush()
+                with self.server.lock:
+                    self.server.chunks_sent += 1
+                if self.server.stream_delay:
+                    time.sleep(self.server.stream_delay)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Il client ha chiuso lo stream in anticipo
+            self.close_connection = True
+
+
+class StubOllamaServer:
+    """Runs the stub on a background thread; usable as a context manager."""
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, handlers=None, stream_delay=0.0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.connections = 0
+        self.httpd.requests = []
+        self.httpd.delay = delay
+        self.httpd.stream_delay = stream_delay
+        self.httpd.chunks_sent = 0
+        self.httpd.handlers = {
+            "chat": _default_chat,
+            "generate": _default_generate,
+            "embed": _default_embed,
+        }
+        self.httpd.handlers.update(handlers or {})
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api/chat"
+
+    @property
+    def connections(self):
+        return self.httpd.connections
+
+    @property
+    def chunks_sent(self):
+        return self.httpd.chunks_sent
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,228 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from . import config
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+
+def make_cache_key(*parts):
+    """Content-addressed key: SHA-256 of the canonical JSON of the request parts."""
+    canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for deterministic model responses.
+
+    The memory tier is an LRU bounded by entry count; the optional disk tier
+    stores one JSON file per key and evicts the least recently used files
+    once ``max_disk_bytes`` is exceeded. The folder size is kept as a running
+    total, so the folder is only scanned when eviction is due. Entries expire
+    after ``ttl`` seconds, or after the TTL given to ``put`` for that entry.
+    """
+
+    def __init__(self, max_entries=256, disk_dir=None, max_disk_bytes=50 * 1024 * 1024, ttl=86400):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir or None
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # Byte occupati dai file su disco; None finche la cartella non e stata letta
+        self._disk_bytes = None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, entry):
+        ttl = entry.get("ttl", self.ttl)
+        return ttl is not None and ttl > 0 and time.time() - entry.get("created", 0) > ttl
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key):
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(entry):
+            self._remove_file(path)
+            return None
+        # Aggiorna l'mtime: l'eviction su disco rimuove i file usati meno di recente
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def _file_size(self, path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _remove_file(self, path):
+        size = self._file_size(path)
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        if self._disk_bytes is not None:
+            self._disk_bytes = max(0, self._disk_bytes - size)
+
+    def _write_disk(self, key, entry):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            # La cartella viene creata alla prima scrittura, non alla costruzione
+            os.makedirs(self.disk_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            replaced = self._file_size(path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Impossibile scrivere la cache su disco: {e}")
+            return
+        if self._disk_bytes is None:
+            self._evict_disk()
+            return
+        self._disk_bytes += self._file_size(path) - replaced
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Rescans the folder, resyncs the running total and removes the oldest files over the limit."""
+        try:
+            files = [e for e in os.scandir(self.disk_dir) if e.is_file() and e.name.endswith(".json")]
+        except OSError:
+            return
+        stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in files]
+        total = sum(size for _, size, _ in stats)
+        if total > self.max_disk_bytes:
+            for _, size, path in sorted(stats):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_disk_bytes:
+                    break
+        self._disk_bytes = total
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._expired(entry):
+                del self._memory[key]
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry["value"]
+
+            if self.disk_dir:
+                entry = self._read_disk(key)
+                if entry is not None:
+                    self._remember(key, entry)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return entry["value"]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value, ttl=None):
+        """Stores value; ttl overrides the cache-wide TTL for this entry only."""
+        entry = {"created": time.time(), "value": value}
+        if ttl is not None:
+            entry["ttl"] = ttl
+        with self._lock:
+            self._remember(key, entry)
+            if self.disk_dir:
+                self._write_disk(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.disk_hits = self.misses = 0
+            if self.disk_dir and os.path.isdir(self.disk_dir):
+                for entry in os.scandir(self.disk_dir):
+                    if entry.name.endswith(".json"):
+                        self._remove_file(entry.path)
+                self._disk_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+        }
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    """Process-wide cache in front of call_ollama; None if disabled."""
+    global _response_cache
+    if not config.RESPONSE_CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            max_entries=config.RESPONSE_CACHE_SIZE,
+            disk_dir=config.RESPONSE_CACHE_DIR,
+            max_disk_bytes=config.RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+            ttl=config.RESPONSE_CACHE_TTL,
+        )
+    return _response_cache
+
+
+_router_cache = None
+
+
+def get_router_cache():
+    """Process-wide, disk-backed cache of router LLM decisions; None if disabled."""
+    global _router_cache
+    if not config.ROUTER_CACHE_ENABLED:
+        return None
+    if _router_cache is None:
+        _router_cache = ResponseCache(
+            max_entries=config.ROUTER_CACHE_SIZE,
+            disk_dir=config.ROUTER_CACHE_DIR,
+            ttl=config.ROUTER_CACHE_TTL,
+        )
+    return _router_cache
+
+
+_docs_cache = None
+
+
+def get_docs_cache():
+    """Process-wide in-memory cache of documentation search results; None if disabled."""
+    global _docs_cache
+    if not config.DOCS_QUERY_CACHE_ENABLED:
+        return None
+    if _docs_cache is None:
+        # Nessuna scadenza: le chiavi includono la versione del corpus
+        _docs_cache = ResponseCache(max_entries=config.DOCS_QUERY_CACHE_SIZE, ttl=0)
+    return _docs_cache
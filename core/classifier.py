@@ -0,0 +1,270 @@
+"""
+Local request classifier that sits between the heuristic and the LLM router.
+
+A multinomial naive Bayes over words and character 4-grams, in pure Python,
+trained from the router decisions logged in ROUTER_LOG_FILE and the labeled
+samples in CLASSIFIER_SAMPLES_FILE. Train and evaluate from the command line:
+
+    python -m core.classifier train
+    python -m core.classifier evaluate --folds 5
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+from collections import Counter, defaultdict
+
+from . import config
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    """
+    Lowercased words plus the character 4-grams of each word.
+
+    The n-grams let inflected forms share evidence ("cartella"/"cartelle",
+    "ordino"/"ordinare"), which matters with a few hundred training samples.
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    features = list(words)
+    for word in words:
+        marked = f"<{word}>"
+        features.extend(marked[i:i + 4] for i in range(len(marked) - 3))
+    return features
+
+
+class NaiveBayesClassifier:
+    """Multinomial naive Bayes with Laplace smoothing."""
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+        self.class_counts = Counter()
+        self.token_counts = defaultdict(Counter)
+        self.token_totals = Counter()
+        self.vocabulary = set()
+
+    @property
+    def labels(self):
+        return sorted(self.class_counts)
+
+    def fit(self, samples):
+        """samples: iterable of (text, label)."""
+        for text, label in samples:
+            tokens = tokenize(text)
+            self.class_counts[label] += 1
+            self.token_counts[label].update(tokens)
+            self.token_totals[label] += len(tokens)
+            self.vocabulary.update(tokens)
+        return self
+
+    def predict_proba(self, text):
+        total_docs = sum(self.class_counts.values())
+        if not total_docs:
+            return {}
+        tokens = [t for t in tokenize(text) if t in self.vocabulary]
+        vocabulary_size = len(self.vocabulary)
+
+        scores = {}
+        for label, docs in self.class_counts.items():
+            denominator = self.token_totals[label] + self.alpha * vocabulary_size
+            counts = self.token_counts[label]
+            score = math.log(docs / total_docs)
+            for token in tokens:
+                score += math.log((counts[token] + self.alpha) / denominator)
+            scores[label] = score
+
+        # Softmax sui log-score
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        norm = sum(exps.values())
+        return {label: value / norm for label, value in exps.items()}
+
+    def predict(self, text):
+        """Returns (label, confidence); (None, 0.0) for an untrained model."""
+        probabilities = self.predict_proba(text)
+        if not probabilities:
+            return None, 0.0
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    def to_dict(self):
+        return {
+            "alpha": self.alpha,
+            "class_counts": dict(self.class_counts),
+            "token_counts": {label: dict(counts) for label, counts in self.token_counts.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        model = cls(alpha=data.get("alpha", 1.0))
+        model.class_counts = Counter(data["class_counts"])
+        for label, counts in data["token_counts"].items():
+            model.token_counts[label] = Counter(counts)
+            model.token_totals[label] = sum(counts.values())
+            model.vocabulary.update(counts)
+        return model
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def load_samples(paths):
+    """Reads (text, category) pairs from JSONL files, skipping missing files and bad lines."""
+    samples = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                text, category = record.get("text"), record.get("category")
+                if text and category:
+                    samples.append((text, category))
+    return samples
+
+
+def log_router_decision(user_input, category, confidence=None, source="llm"):
+    """Appends a router decision to ROUTER_LOG_FILE, the classifier's training data."""
+    if not config.ROUTER_LOG_FILE:
+        return
+    record = {"text": user_input, "category": category, "confidence": confidence, "source": source}
+    try:
+        with open(config.ROUTER_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.debug(f"Impossibile registrare la decisione del router: {e}")
+
+
+_classifier = None
+_classifier_mtime = None
+
+
+def get_classifier():
+    """Trained classifier from CLASSIFIER_MODEL_FILE, reloaded when the file changes; None if unavailable."""
+    global _classifier, _classifier_mtime
+    if not config.CLASSIFIER_ENABLED:
+        return None
+    try:
+        mtime = os.path.getmtime(config.CLASSIFIER_MODEL_FILE)
+    except OSError:
+        return None
+    if _classifier is None or mtime != _classifier_mtime:
+        try:
+            _classifier = NaiveBayesClassifier.load(config.CLASSIFIER_MODEL_FILE)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Classificatore locale non caricabile da '{config.CLASSIFIER_MODEL_FILE}': {e}")
+            return None
+        _classifier_mtime = mtime
+    return _classifier
+
+
+def _score(outcomes, threshold):
+    # outcomes: (corretto, confidenza) per esempio
+    total = len(outcomes)
+    correct = sum(1 for hit, _ in outcomes if hit)
+    covered = [hit for hit, confidence in outcomes if confidence >= threshold]
+    return {
+        "samples": total,
+        "accuracy": correct / total if total else 0.0,
+        "coverage": len(covered) / total if total else 0.0,
+        "covered_accuracy": sum(covered) / len(covered) if covered else 0.0,
+    }
+
+
+def _outcomes(model, samples):
+    outcomes = []
+    for text, label in samples:
+        predicted, confidence = model.predict(text)
+        outcomes.append((predicted == label, confidence))
+    return outcomes
+
+
+def evaluate(model, samples, threshold=None):
+    """
+    Scores a trained model on labeled samples.
+
+    Returns accuracy on all samples plus coverage (share above the confidence
+    threshold, i.e. resolved without the LLM) and the accuracy on that share.
+    """
+    threshold = config.CLASSIFIER_CONFIDENCE_THRESHOLD if threshold is None else threshold
+    return _score(_outcomes(model, samples), threshold)
+
+
+def cross_validate(samples, folds=5, threshold=None, seed=0):
+    """k-fold cross-validation; returns the evaluate() figures over all held-out predictions."""
+    threshold = config.CLASSIFIER_CONFIDENCE_THRESHOLD if threshold is None else threshold
+    shuffled = list(samples)
+    random.Random(seed).shuffle(shuffled)
+    folds = max(2, min(folds, len(shuffled)))
+    outcomes = []
+    for fold in range(folds):
+        held_out = shuffled[fold::folds]
+        training = [s for i, s in enumerate(shuffled) if i % folds != fold]
+        outcomes.extend(_outcomes(NaiveBayesClassifier().fit(training), held_out))
+    return _score(outcomes, threshold)
+
+
+def _default_data():
+    return [path for path in (config.ROUTER_LOG_FILE, config.CLASSIFIER_SAMPLES_FILE) if path]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classificatore locale del router")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = subparsers.add_parser("train", help="addestra e salva il modello")
+    train_parser.add_argument("--data", nargs="+", default=_default_data())
+    train_parser.add_argument("--output", default=config.CLASSIFIER_MODEL_FILE)
+
+    eval_parser = subparsers.add_parser("evaluate", help="valuta il modello (o cross-validation)")
+    eval_parser.add_argument("--data", nargs="+", default=[config.CLASSIFIER_SAMPLES_FILE])
+    eval_parser.add_argument("--model", help="modello salvato; senza, cross-validation sui dati")
+    eval_parser.add_argument("--folds", type=int, default=5)
+    eval_parser.add_argument("--threshold", type=float, default=config.CLASSIFIER_CONFIDENCE_THRESHOLD)
+
+    args = parser.parse_args(argv)
+    samples = load_samples(args.data)
+    if not samples:
+        print(f"Nessun esempio etichettato trovato in: {', '.join(args.data)}")
+        return 1
+
+    if args.command == "train":
+        model = NaiveBayesClassifier().fit(samples)
+        model.save(args.output)
+        counts = ", ".join(f"{label}={count}" for label, count in sorted(model.class_counts.items()))
+        print(f"Modello salvato in {args.output} ({len(samples)} esempi: {counts})")
+        return 0
+
+    if args.model:
+        result = evaluate(NaiveBayesClassifier.load(args.model), samples, args.threshold)
+    else:
+        result = cross_validate(samples, args.folds, args.threshold)
+    print(
+        f"esempi {result['samples']}, accuracy {result['accuracy']:.1%}, "
+        f"copertura a soglia {args.threshold:.2f}: {result['coverage']:.1%} "
+        f"(accuracy {result['covered_accuracy']:.1%})"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
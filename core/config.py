@@ -14,8 +14,123 @@ ROUTER_MODEL_NAME = os.getenv("ROUTER_MODEL_NAME", "llama3.2:1b")
 ROUTER_TIMEOUT = int(os.getenv("ROUTER_TIMEOUT", "45"))
 ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.45"))
 MAX_OUTPUT_TOKENS = int(os.getenv("MAX_OUTPUT_TOKENS", "500"))
+
+# Client HTTP condiviso verso Ollama (connessioni keep-alive riutilizzate)
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "4"))
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "600"))
+
+# Layout del contesto: "legacy" (cwd nel system prompt) o "stable" (prefisso statico
+# regole/tool/cookbook, contesto volatile dopo, history mantenuta tra i turni) per riusare la KV-cache
+PROMPT_LAYOUT = os.getenv("PROMPT_LAYOUT", "legacy").strip().lower()
+# Quanto a lungo Ollama tiene in memoria modello e KV-cache dopo l'ultima chiamata
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Cache delle risposte deterministiche dello specialista, chiave = hash di modello+opzioni+messaggi
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", "")  # vuoto = solo memoria
+RESPONSE_CACHE_MAX_MB = float(os.getenv("RESPONSE_CACHE_MAX_MB", "50"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+
+# Cache delle decisioni del router LLM, chiave = input normalizzato (minuscolo, senza riempitivi)
+ROUTER_CACHE_ENABLED = os.getenv("ROUTER_CACHE_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+ROUTER_CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", "512"))
+ROUTER_CACHE_DIR = os.getenv("ROUTER_CACHE_DIR", ".seeker_cache/router")  # vuoto = solo memoria
+ROUTER_CACHE_TTL = int(os.getenv("ROUTER_CACHE_TTL", "604800"))
+# TTL piu breve per i ripieghi su general_chat (confidenza bassa o categoria non valida)
+ROUTER_CACHE_FALLBACK_TTL = int(os.getenv("ROUTER_CACHE_FALLBACK_TTL", "3600"))
+
+# Precarica in background i modelli router e specialista all'avvio
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "true").strip().lower() in {"1", "true", "yes", "on"}
+
+# Dimensione del contesto (num_ctx): "adaptive" sceglie per ogni chiamata il bucket piu piccolo
+# che contiene prompt stimato + MAX_OUTPUT_TOKENS; "fixed" usa sempre NUM_CTX
+NUM_CTX_MODE = os.getenv("NUM_CTX_MODE", "adaptive").strip().lower()
+NUM_CTX = int(os.getenv("NUM_CTX", "8192"))
+NUM_CTX_BUCKETS = [int(b) for b in os.getenv("NUM_CTX_BUCKETS", "2048,4096,8192").split(",") if b.strip()]
+# Margine sulla stima dei token del prompt (la stima a caratteri e approssimata)
+NUM_CTX_MARGIN = float(os.getenv("NUM_CTX_MARGIN", "1.25"))
+
+# Output vincolato da JSON schema (generato da TOOL_DEFINITIONS) invece del generico format "json"
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "true").strip().lower() in {"1", "true", "yes", "on"}
+# Richieste di correzione al modello (JSON o azione non validi) prima di arrendersi
+MAX_FORMAT_RETRIES = int(os.getenv("MAX_FORMAT_RETRIES", "2"))
+
+# Budget (token stimati) della history dello specialista: oltre, i turni vecchi vengono compattati
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "4000"))
+HISTORY_KEEP_RECENT = int(os.getenv("HISTORY_KEEP_RECENT", "4"))
+
+# Metriche per chiamata LLM (timing Ollama) in formato JSONL; vuoto = disattivato
+METRICS_FILE = os.getenv("METRICS_FILE", "llm_metrics.jsonl")
+
+# Documentazione locale per consult_documentation: indice invertito BM25 salvato accanto ai documenti
+DOCS_DIR = os.getenv("DOCS_DIR", "language_docs")
+DOCS_INDEX_FILE = os.getenv("DOCS_INDEX_FILE", "")  # vuoto = <DOCS_DIR>/.docs_index.json (uno per shard: .docs_index.<shard>.json)
+# Ogni quanti secondi, al massimo, si controllano mtime/hash dei documenti
+DOCS_INDEX_REFRESH_SECONDS = float(os.getenv("DOCS_INDEX_REFRESH_SECONDS", "5"))
+# Dimensione massima (token stimati) di un passaggio indicizzato, delimitato da titoli/paragrafi
+DOCS_PASSAGE_TOKENS = int(os.getenv("DOCS_PASSAGE_TOKENS", "200"))
+# Budget (token stimati) dei passaggi restituiti da consult_documentation
+DOCS_CONTEXT_TOKENS = int(os.getenv("DOCS_CONTEXT_TOKENS", "1200"))
+# Ricerca ibrida: similarita degli embedding (Ollama /api/embed) fusa con il punteggio BM25
+DOCS_EMBEDDINGS_ENABLED = os.getenv("DOCS_EMBEDDINGS_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# Dopo un errore di Ollama la parte semantica resta spenta per questi secondi, poi si riprova
+EMBEDDING_RETRY_SECONDS = float(os.getenv("EMBEDDING_RETRY_SECONDS", "60"))
+# Peso della similarita semantica nella fusione (0 = solo BM25, 1 = solo embedding)
+DOCS_SEMANTIC_WEIGHT = float(os.getenv("DOCS_SEMANTIC_WEIGHT", "0.5"))
+# Termini della domanda assenti dall'indice (errori di battitura): sostituiti dai termini
+# con trigrammi simili (coefficiente di Dice) fino a DOCS_FUZZY_MAX_EXPANSIONS
+DOCS_FUZZY_MIN_SIMILARITY = float(os.getenv("DOCS_FUZZY_MIN_SIMILARITY", "0.6"))
+DOCS_FUZZY_MAX_EXPANSIONS = int(os.getenv("DOCS_FUZZY_MAX_EXPANSIONS", "3"))
+# Cache LRU dei risultati di consult_documentation (chiave: parole chiave + versione del corpus)
+DOCS_QUERY_CACHE_ENABLED = os.getenv("DOCS_QUERY_CACHE_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+DOCS_QUERY_CACHE_SIZE = int(os.getenv("DOCS_QUERY_CACHE_SIZE", "128"))
+# Shard per linguaggio (sottocartella o prima parola del nome file) cercati in parallelo
+DOCS_SEARCH_WORKERS = int(os.getenv("DOCS_SEARCH_WORKERS", "4"))
+# Parole che nella domanda indicano il linguaggio, oltre al nome dello shard stesso
+DOCS_LANGUAGE_KEYWORDS = {
+    "python": ["py", "pip", "django", "flask", "pandas", "numpy", "pytest"],
+    "javascript": ["js", "node", "nodejs", "npm", "typescript", "ts", "react", "vue"],
+    "sql": ["sqlite", "mysql", "postgres", "postgresql", "select", "join"],
+    "rust": ["cargo", "crate", "rustc"],
+    "java": ["jvm", "maven", "gradle"],
+    "c": ["gcc", "clang"],
+    "cpp": ["c++", "g++", "stl"],
+    "csharp": ["c#", "dotnet", ".net"],
+    "go": ["golang"],
+    "bash": ["shell", "sh"],
+    "powershell": ["ps1", "cmdlet"],
+}
+
+# Streaming: mostra pensiero/messaggi man mano e avvia il tool appena action+args sono completi
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "false").strip().lower() in {"1", "true", "yes", "on"}
+# Router LLM e ricerca nella documentazione in parallelo
+SPECULATIVE_ROUTING = os.getenv("SPECULATIVE_ROUTING", "true").strip().lower() in {"1", "true", "yes", "on"}
 EVERYTHING_ES_PATH = os.getenv("EVERYTHING_ES_PATH", r"C:\Program Files\Everything\es.exe")
 EVERYTHING_GUI_PATH = os.getenv("EVERYTHING_GUI_PATH", r"C:\Program Files\Everything\Everything.exe")
+# search_files: "everything" (es.exe), "builtin" (indice interno dei nomi file) o "auto" (Everything se installato)
+FILE_SEARCH_BACKEND = os.getenv("FILE_SEARCH_BACKEND", "auto").strip().lower()
+# Cartelle indicizzate dal backend interno, separate da os.pathsep; vuoto = cartella home
+FILE_INDEX_ROOTS = [p for p in os.getenv("FILE_INDEX_ROOTS", "").split(os.pathsep) if p.strip()]
+# Tabella delle cartelle compressa (.gz): poche decine di MB anche con milioni di file
+FILE_INDEX_FILE = os.getenv("FILE_INDEX_FILE", ".seeker_cache/file_index.json.gz")
+FILE_INDEX_REFRESH_SECONDS = float(os.getenv("FILE_INDEX_REFRESH_SECONDS", "3600"))
+FILE_INDEX_WAIT_SECONDS = float(os.getenv("FILE_INDEX_WAIT_SECONDS", "30"))
+FILE_INDEX_WORKERS = int(os.getenv("FILE_INDEX_WORKERS", "8"))
+FILE_INDEX_PREBUILD = os.getenv("FILE_INDEX_PREBUILD", "true").strip().lower() in {"1", "true", "yes", "on"}
+FILE_INDEX_PRUNE_DIRS = [
+    "node_modules", "__pycache__", ".git", ".cache", ".venv", "venv", "$recycle.bin", "system volume information",
+]
+
+# run_shell_command: timeout per comando (0 = nessuno) e output conservato per il modello (inizio + fine)
+COMMAND_TIMEOUT = float(os.getenv("COMMAND_TIMEOUT", "60"))
+COMMAND_OUTPUT_HEAD_BYTES = int(os.getenv("COMMAND_OUTPUT_HEAD_BYTES", "4000"))
+COMMAND_OUTPUT_TAIL_BYTES = int(os.getenv("COMMAND_OUTPUT_TAIL_BYTES", "4000"))
+# Mostra l'output del comando in console mentre viene prodotto
+COMMAND_STREAM_OUTPUT = os.getenv("COMMAND_STREAM_OUTPUT", "true").strip().lower() in {"1", "true", "yes", "on"}
 
 LIGHT_THEME_COMMAND = (
     "Set-ItemProperty -Path HKCU:\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Themes\\Personalize "
@@ -56,10 +171,96 @@ CUSTOM_PROGRAM_PATHS = [
     r"D:\\Programmi",
 ]
 
+# Indice persistente degli eseguibili per launch_program (Program Files, AppData, Desktop, CUSTOM_PROGRAM_PATHS)
+EXE_INDEX_FILE = os.getenv("EXE_INDEX_FILE", ".seeker_cache/exe_index.json")
+# Eta massima dell'indice prima di una nuova scansione in background (solo cartelle con mtime cambiato)
+EXE_INDEX_REFRESH_SECONDS = float(os.getenv("EXE_INDEX_REFRESH_SECONDS", "86400"))
+# Attesa massima della scansione in corso quando un programma non e nell'indice
+EXE_INDEX_WAIT_SECONDS = float(os.getenv("EXE_INDEX_WAIT_SECONDS", "60"))
+EXE_INDEX_WORKERS = int(os.getenv("EXE_INDEX_WORKERS", "8"))
+# Avvia la scansione all'apertura della CLI invece che al primo launch_program
+EXE_INDEX_PREBUILD = os.getenv("EXE_INDEX_PREBUILD", "true").strip().lower() in {"1", "true", "yes", "on"}
+EXE_INDEX_EXTENSIONS = [".exe", ".bat", ".cmd"]
+# Cartelle mai visitate dalla scansione (confronto senza maiuscole)
+EXE_INDEX_PRUNE_DIRS = [
+    "node_modules", "temp", "cache", "windowsapps", "$recycle.bin", "system volume information",
+    ".git", "__pycache__",
+]
+
+
+# --- Router Heuristic Rules ---
+# Regole del router euristico per categoria: pattern regex (testo in minuscolo) o [pattern, peso].
+# Vince la regola con il peso piu alto; a parita di peso conta l'ordine delle categorie.
+ROUTER_HEURISTIC_RULES = {
+    "system_command": [
+        r"\b(apri|lancia|avvia|installa|disinstalla|esegui)\b",
+        r"\b(open|launch|lounch|start|run|execute|install|uninstall)\b",
+        r"\b(cerca|trova|ricerca|dove)\b",
+        r"\b(search|find|locate|where)\b",
+        r"\b(manual|manuals|handbook)\b",
+        r"\b(copia|sposta|rinomina|elimina|cancella)\b",
+        r"\b(copy|move|rename|delete|remove)\b",
+        r"\b(file|cartell|directory|percorso|path)\b",
+        r"\b(documents|documenti|desktop)\b",
+        r"\b(mostr(a|ami)|lista|elenca)\b.*\b(file|cartell|directory)\b",
+        r"\b(list|show)\b.*\b(files|folders|directories)\b",
+        r"\b(theme|dark|light)\b",
+        r"\b(tema|scuro|chiaro)\b",
+        r"\bwindows\b.*\b(theme|tema|dark|light|scuro|chiaro)\b",
+        r"\bchange\b.*\b(theme|dark|light)\b",
+        r"\b(cambia|imposta)\b.*\b(tema|scuro|chiaro)\b",
+        r"\b(cmd|powershell|terminal|shell)\b",
+    ],
+    "programming_question": [
+        r"\bpython\b",
+        r"\bjavascript\b",
+        r"\btypescript\b",
+        r"\bjava\b",
+        r"\bc\+\+\b",
+        r"\bc#\b",
+        r"\brust\b",
+        r"\bgolang\b",
+        r"\bsql\b",
+        r"\bregex\b",
+        r"\bapi\b",
+        r"\bhttp\b",
+        r"\btraceback\b",
+        r"\bstack\s*trace\b",
+        r"\bexception\b",
+        r"\berror\b",
+        r"\bbug\b",
+        r"\bfunzione\b",
+        r"\bclasse\b",
+        r"\bmodulo\b",
+        r"\bimport\b",
+        r"\bdef\b",
+        r"\bpackage\b",
+        r"\bpip\b",
+        r"\bnpm\b",
+        r"\bcome\s+si\s+fa\b",
+        r"\bin\s+(python|javascript|js|java)\b",
+    ],
+}
+# File JSON opzionale con regole aggiuntive, stesso formato di ROUTER_HEURISTIC_RULES
+ROUTER_RULES_FILE = os.getenv("ROUTER_RULES_FILE", "router_rules.json")
+
+# Classificatore locale (naive Bayes) tra euristica e router LLM, addestrato con
+# `python -m core.classifier train` dalle decisioni registrate in ROUTER_LOG_FILE
+CLASSIFIER_ENABLED = os.getenv("CLASSIFIER_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+CLASSIFIER_MODEL_FILE = os.getenv("CLASSIFIER_MODEL_FILE", "router_classifier.json")
+# Esempi etichettati di partenza, usati da train/evaluate insieme a ROUTER_LOG_FILE
+CLASSIFIER_SAMPLES_FILE = os.getenv("CLASSIFIER_SAMPLES_FILE", os.path.join("tests", "data", "router_samples.jsonl"))
+# Sotto questa confidenza la richiesta passa al router LLM (naive Bayes e ottimista: soglia alta)
+CLASSIFIER_CONFIDENCE_THRESHOLD = float(os.getenv("CLASSIFIER_CONFIDENCE_THRESHOLD", "0.99"))
+# Decisioni del router LLM in JSONL (dati di addestramento); vuoto = disattivato
+ROUTER_LOG_FILE = os.getenv("ROUTER_LOG_FILE", "router_decisions.jsonl")
 
 # --- Router Prompt ---
+# Riempitivi conversazionali: citati nel prompt del router e rimossi dalla chiave della cache decisioni
+ROUTER_FILLER_WORDS = ["ciao", "per favore", "mi potresti", "vorrei", "mi scrivi"]
+
 ROUTER_PROMPT_TEMPLATE = """
-You are a request routing assistant. Your only job is to classify the user's request into one of the following categories. Ignore conversational filler like 'ciao', 'per favore', 'mi potresti', 'vorrei', 'mi scrivi', 'per favore' and focus solely on the core task.
+You are a request routing assistant. Your only job is to classify the user's request into one of the following categories. Ignore conversational filler like """ + ", ".join(f"'{word}'" for word in ROUTER_FILLER_WORDS) + """ and focus solely on the core task.
 
 The available categories are:
 - "programming_question": For questions about how to code, programming concepts, "how do I...", code examples, debugging, algorithms, syntax, "in Python", "in JavaScript", etc.
@@ -111,7 +312,7 @@ TOOL_DEFINITIONS = {
   - \"file_name\" (string, required): The file name to open (e.g., \"Persone.txt\").
   - \"location\" (string, optional): A hint like "desktop".
   - \"program_name\" (string, optional): App to open with (e.g., \"notepad.exe\").""",
-    "search_files": """- \"search_files\": Searches for files by name using Everything CLI.
+    "search_files": """- \"search_files\": Searches for files by name using Everything CLI (or the built-in file index when Everything is not installed).
   - \"query\" (string, required): The filename or keywords to search for.
   - \"location\" (string, optional): A hint like "documents" or "desktop".
   - \"extensions\" (array|string, optional): File extensions like ["pdf", "epub"].
@@ -127,15 +328,20 @@ TOOL_DEFINITIONS = {
 
 # --- Specialist Prompts ---
 
-BASE_SPECIALIST_PROMPT = """
+SPECIALIST_PROMPT_INTRO = """
 You are Seeker-CLI, an advanced AI assistant. Your goal is to help users by using the available tools.
 
-=== CURRENT CONTEXT ===
+"""
+
+# Contesto volatile: con PROMPT_LAYOUT=stable viene spostato dopo il prefisso statico
+SPECIALIST_CONTEXT_BLOCK = """=== CURRENT CONTEXT ===
 Operating System: {os_name}
 User: {username}
 Working Directory: {cwd}
 
-=== CAPABILITIES COOKBOOK ===
+"""
+
+SPECIALIST_PROMPT_BODY = """=== CAPABILITIES COOKBOOK ===
 This is a list of pre-approved, safe commands for specific system actions. Use these exact commands when a user's request matches one of the descriptions.
 
 {cookbook}
@@ -167,6 +373,8 @@ JSON MODEL:
 }}}}
 """
 
+BASE_SPECIALIST_PROMPT = SPECIALIST_PROMPT_INTRO + SPECIALIST_CONTEXT_BLOCK + SPECIALIST_PROMPT_BODY
+
 # Toolsets for each specialist
 PROGRAMMING_TOOLS = [
     TOOL_DEFINITIONS["consult_documentation"],
@@ -0,0 +1,654 @@
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+import textwrap
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+from .cache import get_docs_cache, make_cache_key
+from .embeddings import OllamaEmbedder, SemanticIndex, fuse_scores
+from .text_analysis import analyze, trigram_similarity, trigrams
+from .utils import estimate_tokens
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+# Cambia quando cambia il formato dell'indice o la tokenizzazione: forza una ricostruzione completa
+INDEX_VERSION = 3
+
+# Parametri BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Titoli di sezione: markdown ("## Liste") o numerati ("4.1 L'Istruzione if")
+_HEADING_PATTERN = re.compile(r"^(?:#{1,6}\s+\S.*|\d+(?:\.\d+)*\.?\s+[A-ZÀ-Ý].*)$")
+_MARKDOWN_HEADING_PATTERN = re.compile(r"^#{1,6}\s+\S")
+MARKDOWN_EXTENSIONS = (".md", ".markdown")
+_HEADING_MAX_CHARS = 90
+
+# Passaggio restituito dalla ricerca; id stabile finche il testo non cambia
+Passage = namedtuple("Passage", ["id", "path", "start_line", "end_line", "heading", "text"])
+
+
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_docs(docs_dir, index_file):
+    """{path: stat} of the documents under docs_dir, skipping hidden files and the index files."""
+    found = {}
+    # Indice, shard ed embedding condividono il prefisso del file indice
+    index_prefix = os.path.splitext(os.path.basename(index_file))[0]
+    for root, dirs, files in os.walk(docs_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if name.startswith((".", index_prefix)) or name.endswith(".tmp"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            found[path] = stat
+    return found
+
+
+def _paragraphs(lines, markdown=False):
+    # Nei file markdown un titolo "#" apre sempre un paragrafo, anche senza riga vuota
+    # prima/dopo; le righe dentro i blocchi ``` non sono mai titoli
+    start = None
+    in_fence = False
+    for line_no, line in enumerate(lines, start=1):
+        stripped = line.strip()
+        if markdown and stripped.startswith("```"):
+            in_fence = not in_fence
+        markdown_heading = markdown and not in_fence and _MARKDOWN_HEADING_PATTERN.match(stripped)
+        if stripped and not markdown_heading:
+            if start is None:
+                start, block = line_no, []
+            block.append(line.rstrip())
+            continue
+        if start is not None:
+            yield start, block
+            start = None
+        if markdown_heading:
+            yield line_no, [line.rstrip()]
+    if start is not None:
+        yield start, block
+
+
+def _is_heading(block):
+    return len(block) == 1 and len(block[0].strip()) <= _HEADING_MAX_CHARS and bool(
+        _HEADING_PATTERN.match(block[0].strip())
+    )
+
+
+def split_passages(lines, max_tokens=200, markdown=False):
+    """
+    Groups the lines of a document into passages: [(start_line, end_line, heading, text)].
+
+    Paragraphs (blank-line separated) are merged until max_tokens (estimated)
+    would be exceeded; a section heading always opens a new passage and is
+    carried as the heading of the passages that follow it. A paragraph longer
+    than max_tokens is cut at line boundaries. With markdown=True, "#" titles
+    outside code fences are recognized even without surrounding blank lines.
+    """
+    passages = []
+    heading = ""
+    current = []  # paragrafi del passaggio corrente: [(first_line, last_line, [righe])]
+    size = 0
+
+    def flush():
+        nonlocal size
+        if current:
+            text = "\n\n".join(textwrap.dedent("\n".join(block)).strip() for _, _, block in current)
+            passages.append((current[0][0], current[-1][1], heading, text))
+            current.clear()
+            size = 0
+
+    def add(first, block):
+        nonlocal size
+        current.append((first, first + len(block) - 1, block))
+        size += estimate_tokens("\n".join(block))
+
+    for start, block in _paragraphs(lines, markdown):
+        if _is_heading(block):
+            flush()
+            heading = block[0].strip().lstrip("#").strip()
+            add(start, block)
+            continue
+
+        cost = estimate_tokens("\n".join(block))
+        only_heading = len(current) == 1 and _is_heading(current[0][2])
+        if current and size + cost > max_tokens and not only_heading:
+            flush()
+        if size + cost <= max_tokens:
+            add(start, block)
+            continue
+
+        # Paragrafo troppo lungo: tagliato a fine riga
+        chunk_start, chunk = start, []
+        for offset, line in enumerate(block):
+            if chunk and size + estimate_tokens("\n".join(chunk + [line])) > max_tokens:
+                add(chunk_start, chunk)
+                flush()
+                chunk_start, chunk = start + offset, []
+            chunk.append(line)
+        add(chunk_start, chunk)
+    flush()
+    return passages
+
+
+class DocsIndex:
+    """
+    Inverted index over the passages of the documentation folder, ranked with BM25.
+
+    The index is persisted as JSON next to the docs and kept up to date
+    incrementally: refresh() re-indexes only files whose mtime/size changed
+    and whose content hash differs, and drops files that disappeared.
+    """
+
+    def __init__(self, docs_dir, index_file=None, passage_tokens=200):
+        self.docs_dir = docs_dir
+        self.index_file = index_file or os.path.join(docs_dir, ".docs_index.json")
+        self.passage_tokens = passage_tokens
+        # path -> {"mtime", "size", "sha1", "docs": [doc_id], "terms": [term]}
+        self.files = {}
+        # doc_id -> [path, start_line, length, end_line, passage_id, heading, text]
+        self.docs = {}
+        # term -> {doc_id: tf}
+        self.postings = {}
+        # trigramma -> {term}: ricerca approssimata dei termini con errori di battitura
+        self.trigrams = {}
+        self.total_length = 0
+        self.next_id = 0
+        self.last_refresh = 0.0
+        # Aumenta a ogni modifica dei passaggi: l'indice semantico si riallinea quando cambia
+        self.generation = 0
+        # SemanticIndex opzionale: con None la ricerca e solo per parole chiave
+        self.semantic = None
+        # Metadati cambiati senza reindicizzare (solo mtime): l'indice va comunque salvato
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    # --- persistenza ---
+
+    def load(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Indice documentazione illeggibile, verra ricostruito: {e}")
+            return False
+        if data.get("version") != INDEX_VERSION or data.get("passage_tokens") != self.passage_tokens:
+            logger.info("Indice documentazione di una versione precedente: verra ricostruito.")
+            return False
+
+        with self._lock:
+            self.files = data["files"]
+            self.docs = {int(doc_id): doc for doc_id, doc in data["docs"].items()}
+            self.postings = {
+                term: {doc_id: tf for doc_id, tf in entries}
+                for term, entries in data["postings"].items()
+            }
+            self.trigrams = {trigram: set(terms) for trigram, terms in data["trigrams"].items()}
+            self.total_length = sum(doc[2] for doc in self.docs.values())
+            self.next_id = data["next_id"]
+        return True
+
+    def save(self):
+        with self._lock:
+            data = {
+                "version": INDEX_VERSION,
+                "passage_tokens": self.passage_tokens,
+                "next_id": self.next_id,
+                "files": self.files,
+                "docs": self.docs,
+                "postings": {
+                    term: [[doc_id, tf] for doc_id, tf in entries.items()]
+                    for term, entries in self.postings.items()
+                },
+                "trigrams": {trigram: sorted(terms) for trigram, terms in self.trigrams.items()},
+            }
+        tmp_path = f"{self.index_file}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.index_file)
+        except OSError as e:
+            logger.warning(f"Impossibile salvare l'indice della documentazione: {e}")
+
+    # --- aggiornamento incrementale ---
+
+    def _scan(self):
+        return scan_docs(self.docs_dir, self.index_file)
+
+    def _add_term(self, term):
+        for trigram in trigrams(term):
+            self.trigrams.setdefault(trigram, set()).add(term)
+
+    def _drop_term(self, term):
+        for trigram in trigrams(term):
+            terms = self.trigrams.get(trigram)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self.trigrams[trigram]
+
+    def _remove_file(self, path):
+        entry = self.files.pop(path, None)
+        if not entry:
+            return
+        doc_ids = set(entry["docs"])
+        for term in entry["terms"]:
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            for doc_id in doc_ids.intersection(postings):
+                del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+                self._drop_term(term)
+        for doc_id in doc_ids:
+            doc = self.docs.pop(doc_id, None)
+            if doc:
+                self.total_length -= doc[2]
+
+    def _index_file(self, path, stat, sha1):
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                lines = f.readlines()
+        except OSError as e:
+            logger.debug(f"Could not read or process file {path}: {e}")
+            return
+
+        doc_ids = []
+        terms = set()
+        used_ids = set()
+        relative = os.path.relpath(path, self.docs_dir).replace(os.sep, "/")
+        markdown = path.lower().endswith(MARKDOWN_EXTENSIONS)
+        for start, end, heading, text in split_passages(lines, self.passage_tokens, markdown):
+            tokens = analyze(f"{heading}\n{text}")
+            if not tokens:
+                continue
+            # Id stabile: file + hash del contenuto (non cambia se il passaggio si sposta nel file)
+            passage_id = f"{relative}#{hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]}"
+            suffix = 2
+            while passage_id in used_ids:
+                passage_id = f"{passage_id.split('~')[0]}~{suffix}"
+                suffix += 1
+            used_ids.add(passage_id)
+
+            doc_id = self.next_id
+            self.next_id += 1
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                if token not in self.postings:
+                    self._add_term(token)
+                self.postings.setdefault(token, {})[doc_id] = tf
+            terms.update(counts)
+            self.docs[doc_id] = [path, start, len(tokens), end, passage_id, heading, text]
+            self.total_length += len(tokens)
+            doc_ids.append(doc_id)
+        self.files[path] = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "sha1": sha1,
+            "docs": doc_ids,
+            "terms": sorted(terms),
+        }
+
+    def refresh(self, found=None):
+        """
+        Brings the index in line with the docs folder; returns the number of
+        re-indexed files. found ({path: stat}) replaces the folder scan.
+        """
+        with self._lock:
+            found = self._scan() if found is None else found
+            changed = 0
+            removed = [path for path in self.files if path not in found]
+            for path in removed:
+                self._remove_file(path)
+
+            for path, stat in found.items():
+                entry = self.files.get(path)
+                if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                    continue
+                try:
+                    sha1 = _file_hash(path)
+                except OSError as e:
+                    logger.debug(f"Could not read or process file {path}: {e}")
+                    continue
+                if entry and entry["sha1"] == sha1:
+                    # Solo l'mtime e cambiato (copia, touch): il contenuto indicizzato e valido
+                    entry["mtime"], entry["size"] = stat.st_mtime, stat.st_size
+                    self._dirty = True
+                    continue
+                self._remove_file(path)
+                self._index_file(path, stat, sha1)
+                changed += 1
+
+            self.last_refresh = time.monotonic()
+            if changed or removed:
+                self.generation += 1
+            if changed or removed or self._dirty:
+                self._dirty = False
+                logger.info(
+                    f"Indice documentazione aggiornato: {changed} file reindicizzati, {len(removed)} rimossi."
+                )
+                self.save()
+            if self.semantic is not None:
+                # Embedding dei passaggi nuovi subito, in background: le ricerche non li attendono
+                self.semantic.sync_in_background()
+            return changed
+
+    # --- ricerca ---
+
+    def expand_term(self, term):
+        """
+        [(index_term, weight)] for a query term: the term itself when indexed,
+        otherwise up to DOCS_FUZZY_MAX_EXPANSIONS indexed terms whose trigram
+        similarity reaches DOCS_FUZZY_MIN_SIMILARITY (typos).
+        """
+        if term in self.postings:
+            return [(term, 1.0)]
+        if len(term) < 4:
+            return []
+        query_trigrams = trigrams(term)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self.trigrams.get(trigram, ()))
+        # Limite superiore del coefficiente di Dice: scarta i candidati senza calcolarlo
+        lower = config.DOCS_FUZZY_MIN_SIMILARITY * len(query_trigrams) / 2
+        candidates = []
+        for candidate, count in shared.items():
+            if count < lower:
+                continue
+            similarity = trigram_similarity(query_trigrams, trigrams(candidate))
+            if similarity >= config.DOCS_FUZZY_MIN_SIMILARITY:
+                candidates.append((similarity, candidate))
+        best = heapq.nlargest(config.DOCS_FUZZY_MAX_EXPANSIONS, candidates)
+        return [(candidate, similarity) for similarity, candidate in best]
+
+    def _rank(self, query, limit):
+        terms = set(analyze(query))
+        with self._lock:
+            total_docs = len(self.docs)
+            if not terms or not total_docs:
+                return []
+            avg_length = self.total_length / total_docs
+            weights = {}
+            for term in terms:
+                for index_term, weight in self.expand_term(term):
+                    weights[index_term] = max(weight, weights.get(index_term, 0.0))
+            scores = {}
+            for term, weight in weights.items():
+                postings = self.postings[term]
+                df = len(postings)
+                idf = weight * math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    length = self.docs[doc_id][2]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+            return [(score, doc_id) for doc_id, score in ranked]
+
+    def candidates(self, query, limit=15, query_vector=None):
+        """
+        Returns (keyword, semantic): the raw BM25 and cosine [(score, doc_id)]
+        lists, semantic being None when no semantic index is attached or its
+        vectors are not ready yet.
+        """
+        keyword = self._rank(query, limit)
+        if self.semantic is None or not self.docs:
+            return keyword, None
+        return keyword, self.semantic.search(query, limit, query_vector)
+
+    def passages(self, ranked):
+        """Turns [(score, doc_id)] into [(score, Passage)], skipping passages gone meanwhile."""
+        with self._lock:
+            return [(score, self._passage(doc_id)) for score, doc_id in ranked if doc_id in self.docs]
+
+    def search(self, query, limit=15, query_vector=None):
+        """
+        Returns [(score, Passage)] best first: BM25, fused with the embedding
+        similarity when a semantic index is attached.
+        """
+        ranked, semantic = self.candidates(query, limit, query_vector)
+        if semantic is not None:
+            ranked = fuse_scores(ranked, semantic, config.DOCS_SEMANTIC_WEIGHT)[:limit]
+        return self.passages(ranked)
+
+    def passage_texts(self):
+        """{doc_id: heading + text}, the text that is embedded for each passage."""
+        with self._lock:
+            return {doc_id: f"{doc[5]}\n{doc[6]}" for doc_id, doc in self.docs.items()}
+
+    def _passage(self, doc_id):
+        path, start, _, end, passage_id, heading, text = self.docs[doc_id]
+        return Passage(passage_id, path, start, end, heading, text)
+
+
+def pack_passages(passages, budget_tokens):
+    """
+    Picks passages in rank order while they fit in budget_tokens (estimated).
+
+    Passages that do not fit are skipped in favour of smaller lower-ranked
+    ones; the best passage is always kept, cut to the budget if needed.
+    """
+    packed = []
+    remaining = budget_tokens
+    for passage in passages:
+        cost = estimate_tokens(format_passages([passage]))
+        if cost <= remaining:
+            packed.append(passage)
+            remaining -= cost
+        elif not packed:
+            overflow_chars = (cost - budget_tokens) * 4
+            packed.append(passage._replace(text=passage.text[: max(0, len(passage.text) - overflow_chars)]))
+            remaining = 0
+        if remaining <= 0:
+            break
+    return packed
+
+
+def format_passages(passages):
+    blocks = []
+    for passage in passages:
+        header = f"[{passage.id}] {passage.path}:{passage.start_line}-{passage.end_line}"
+        if passage.heading:
+            header += f" ({passage.heading})"
+        blocks.append(f"{header}\n{passage.text}")
+    return "\n\n".join(blocks)
+
+
+_SHARD_NAME_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+
+def shard_name(relative_path):
+    """
+    Language shard of a docs file: its top-level folder, or for files at
+    the root the first word of the name ("python_tutorial_it.txt" -> "python").
+    """
+    parts = relative_path.replace(os.sep, "/").split("/")
+    name = parts[0] if len(parts) > 1 else os.path.splitext(parts[0])[0]
+    match = _SHARD_NAME_PATTERN.match(name.lower())
+    return match.group(0) if match else "docs"
+
+
+def detect_languages(query, shards):
+    """Shards named (or aliased in DOCS_LANGUAGE_KEYWORDS) in the query; empty if none."""
+    # Split sugli spazi, non \w+: restano interi "c++", "c#", ".net" e "c'è" non diventa "c"
+    words = {word.strip(",;:!?()[]\"'").rstrip(".") for word in query.lower().split()}
+    found = set()
+    for shard in shards:
+        aliases = set(config.DOCS_LANGUAGE_KEYWORDS.get(shard, ())) | {shard}
+        if words & aliases:
+            found.add(shard)
+    return found
+
+
+class DocsCorpus:
+    """
+    The documentation folder split into per-language shards, one DocsIndex each.
+
+    A query is sent only to the shards of the languages it mentions (all of
+    them when it names none), in parallel, and the merged results are cached
+    by keyword set until a shard changes.
+    """
+
+    def __init__(self, docs_dir, index_file=None, passage_tokens=200, embedder=None):
+        self.docs_dir = docs_dir
+        self.index_file = index_file or os.path.join(docs_dir, ".docs_index.json")
+        self.passage_tokens = passage_tokens
+        self.embedder = embedder
+        self.shards = {}
+        self.last_refresh = 0.0
+        self._lock = threading.RLock()
+        self._executor = None
+
+    def _shard_index_file(self, shard):
+        root, ext = os.path.splitext(self.index_file)
+        return f"{root}.{shard}{ext or '.json'}"
+
+    def _shard(self, name):
+        index = self.shards.get(name)
+        if index is None:
+            index = DocsIndex(self.docs_dir, self._shard_index_file(name), self.passage_tokens)
+            index.load()
+            if self.embedder is not None:
+                index.semantic = SemanticIndex(index, self.embedder)
+            self.shards[name] = index
+        return index
+
+    @property
+    def version(self):
+        """Changes whenever the passages of any shard change."""
+        return sorted((name, index.generation) for name, index in self.shards.items())
+
+    def refresh(self):
+        """Scans the folder once and refreshes every shard; returns the number of re-indexed files."""
+        with self._lock:
+            grouped = {}
+            for path, stat in scan_docs(self.docs_dir, self.index_file).items():
+                relative = os.path.relpath(path, self.docs_dir)
+                grouped.setdefault(shard_name(relative), {})[path] = stat
+            for name in list(self.shards):
+                grouped.setdefault(name, {})
+
+            changed = sum(self._shard(name).refresh(found) for name, found in grouped.items())
+            for name in [name for name, index in self.shards.items() if not index.files]:
+                del self.shards[name]
+            self.last_refresh = time.monotonic()
+            return changed
+
+    def _select(self, query):
+        languages = detect_languages(query, self.shards)
+        return sorted(languages or self.shards)
+
+    def search(self, query, limit=15):
+        """Returns [(score, Passage)] best first from the shards relevant to the query."""
+        with self._lock:
+            names = self._select(query)
+            shards = [self.shards[name] for name in names]
+            version = self.version
+        if not shards:
+            return []
+
+        # Finche i vettori non sono pronti (o Ollama e in errore) si usa solo BM25
+        semantic_shards = [
+            index.semantic for index in shards
+            if index.semantic is not None and index.semantic.ready and index.semantic.available
+        ]
+        for index in shards:
+            if index.semantic is not None and not index.semantic.ready:
+                index.semantic.sync_in_background()
+
+        cache = get_docs_cache()
+        # L'embedding dipende dal testo intero, non solo dalle parole chiave: con la fusione
+        # attiva la chiave include la domanda normalizzata
+        raw_query = " ".join(query.lower().split()) if semantic_shards else None
+        key = make_cache_key("docs", self.docs_dir, version, names, sorted(set(analyze(query))), limit, raw_query)
+        if cache:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        query_vector = None
+        if self.embedder is not None and semantic_shards:
+            try:
+                query_vector = self.embedder.embed([query])[0]
+            except Exception as e:
+                for semantic in semantic_shards:
+                    semantic.back_off(e)
+                # Risultati solo BM25 sotto una chiave "semantica": non vanno in cache
+                cache = None
+
+        if len(shards) == 1:
+            partials = [shards[0].candidates(query, limit, query_vector)]
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=min(config.DOCS_SEARCH_WORKERS, os.cpu_count() or 1),
+                    thread_name_prefix="docs-search",
+                )
+            partials = list(self._executor.map(lambda index: index.candidates(query, limit, query_vector), shards))
+
+        # Punteggi grezzi di tutti gli shard, normalizzati e fusi una volta sola:
+        # normalizzando per shard il migliore di ognuno varrebbe 1.0 anche se pertinente appena
+        keyword, semantic = [], None
+        for position, (shard_keyword, shard_semantic) in enumerate(partials):
+            keyword.extend((score, (position, doc_id)) for score, doc_id in shard_keyword)
+            if shard_semantic is not None:
+                semantic = (semantic or []) + [(score, (position, doc_id)) for score, doc_id in shard_semantic]
+        ranked = fuse_scores(keyword, semantic, config.DOCS_SEMANTIC_WEIGHT) if semantic is not None else keyword
+
+        by_shard = {}
+        for score, (position, doc_id) in ranked:
+            by_shard.setdefault(position, []).append((score, doc_id))
+        results = heapq.nsmallest(
+            limit,
+            (result for position, group in by_shard.items() for result in shards[position].passages(group)),
+            key=lambda result: (-result[0], result[1].id),
+        )
+        if cache:
+            cache.put(key, results)
+        return results
+
+
+_docs_index = None
+_docs_index_lock = threading.Lock()
+
+
+def get_docs_index():
+    """
+    Process-wide sharded index of DOCS_DIR, loaded from disk on first use and
+    refreshed at most every DOCS_INDEX_REFRESH_SECONDS.
+    """
+    global _docs_index
+    with _docs_index_lock:
+        corpus = _docs_index
+        if corpus is None or corpus.docs_dir != config.DOCS_DIR:
+            embedder = OllamaEmbedder() if config.DOCS_EMBEDDINGS_ENABLED else None
+            corpus = DocsCorpus(config.DOCS_DIR, config.DOCS_INDEX_FILE or None, config.DOCS_PASSAGE_TOKENS, embedder)
+            corpus.refresh()
+            _docs_index = corpus
+        elif time.monotonic() - corpus.last_refresh >= config.DOCS_INDEX_REFRESH_SECONDS:
+            corpus.refresh()
+    return corpus
@@ -0,0 +1,300 @@
+"""
+Semantic search over the documentation passages with Ollama embeddings.
+
+Passage vectors are computed in batches through the /api/embed endpoint,
+cached on disk by content hash (unchanged passages are never re-embedded)
+and kept L2-normalized, so cosine similarity is a plain dot product. With
+NumPy the vectors live in a memory-mapped .npy matrix and top-k is a single
+matrix-vector product; without it a pure-Python fallback is used.
+"""
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from . import config
+from .ollama_client import get_default_client
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+# Cambia quando cambia il formato del file dei vettori
+STORE_VERSION = 1
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else list(vector)
+
+
+class OllamaEmbedder:
+    """Embeds texts with an Ollama embedding model, batch_size texts per request."""
+
+    def __init__(self, model=None, client=None, batch_size=None):
+        self.model = model or config.EMBEDDING_MODEL
+        self.client = client
+        self.batch_size = batch_size or config.EMBEDDING_BATCH_SIZE
+
+    def embed(self, texts):
+        client = self.client or get_default_client()
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            data = client.embed({"model": self.model, "input": batch, "keep_alive": config.OLLAMA_KEEP_ALIVE})
+            embeddings = data.get("embeddings") or []
+            if len(embeddings) != len(batch):
+                raise ValueError(f"{len(embeddings)} embedding ricevuti per {len(batch)} testi")
+            vectors.extend(embeddings)
+        return vectors
+
+
+class EmbeddingStore:
+    """
+    Normalized vectors keyed by content hash, persisted next to the docs index.
+
+    The keys and metadata go to <path>.json; the vectors to <path>.npy
+    (memory-mapped on load) when NumPy is available, otherwise inline in the
+    JSON file. A store written for another embedding model is discarded.
+    """
+
+    def __init__(self, path, model):
+        self.path = path
+        self.model = model
+        self.keys = []
+        self.rows = {}  # content hash -> riga della matrice
+        self.matrix = []  # numpy.ndarray (anche memmap) o lista di liste
+
+    @property
+    def dim(self):
+        return len(self.matrix[0]) if len(self.matrix) else 0
+
+    def load(self):
+        try:
+            with open(f"{self.path}.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache degli embedding illeggibile, verra ricalcolata: {e}")
+            return False
+        if meta.get("version") != STORE_VERSION or meta.get("model") != self.model:
+            return False
+
+        if "vectors" in meta:
+            matrix = meta["vectors"]
+            if np is not None:
+                matrix = np.asarray(matrix, dtype=np.float32).reshape(len(meta["keys"]), -1)
+        elif np is not None:
+            try:
+                matrix = np.load(f"{self.path}.npy", mmap_mode="r")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Matrice degli embedding illeggibile, verra ricalcolata: {e}")
+                return False
+        else:
+            # Matrice .npy scritta con NumPy, che ora manca: si ricalcola
+            return False
+        if len(matrix) != len(meta["keys"]):
+            return False
+        self.keys = list(meta["keys"])
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.matrix = matrix
+        return True
+
+    def save(self):
+        meta = {"version": STORE_VERSION, "model": self.model, "keys": self.keys}
+        try:
+            if np is not None:
+                # np.save aggiunge .npy se manca: il file temporaneo deve gia terminare cosi
+                tmp_matrix = f"{self.path}.tmp.npy"
+                np.save(tmp_matrix, np.asarray(self.matrix, dtype=np.float32).reshape(len(self.keys), -1))
+                os.replace(tmp_matrix, f"{self.path}.npy")
+            else:
+                meta["vectors"] = [list(vector) for vector in self.matrix]
+            tmp_meta = f"{self.path}.json.tmp"
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump(meta, f, separators=(",", ":"))
+            os.replace(tmp_meta, f"{self.path}.json")
+        except OSError as e:
+            logger.warning(f"Impossibile salvare la cache degli embedding: {e}")
+
+    def update(self, keep, new_vectors):
+        """
+        Keeps only the hashes in keep (existing rows) plus new_vectors
+        ({hash: vector}), which are normalized on the way in.
+        """
+        keys = [key for key in self.keys if key in keep] + list(new_vectors)
+        fresh = [_normalize(vector) for vector in new_vectors.values()]
+        if np is not None:
+            old = [self.rows[key] for key in self.keys if key in keep]
+            parts = [np.asarray(self.matrix[old], dtype=np.float32)] if old else []
+            if fresh:
+                parts.append(np.asarray(fresh, dtype=np.float32))
+            matrix = np.vstack(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+        else:
+            matrix = [list(self.matrix[self.rows[key]]) for key in self.keys if key in keep] + fresh
+        self.keys = keys
+        self.rows = {key: row for row, key in enumerate(keys)}
+        self.matrix = matrix
+
+    def top_k(self, query_vector, limit):
+        """Returns [(cosine, hash)] for the limit vectors closest to query_vector."""
+        if not self.keys or limit <= 0:
+            return []
+        query = _normalize(query_vector)
+        if len(query) != self.dim:
+            return []
+        if np is not None:
+            scores = self.matrix @ np.asarray(query, dtype=np.float32)
+            limit = min(limit, len(scores))
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            best = best[np.argsort(-scores[best], kind="stable")]
+            return [(float(scores[row]), self.keys[row]) for row in best]
+        scored = (
+            (sum(a * b for a, b in zip(vector, query)), row)
+            for row, vector in enumerate(self.matrix)
+        )
+        return [(score, self.keys[row]) for score, row in heapq.nlargest(limit, scored)]
+
+
+class SemanticIndex:
+    """
+    Embeddings of the passages of a DocsIndex, kept in sync with it.
+
+    sync() embeds only passages whose content hash is not cached yet and
+    drops the vectors of passages that no longer exist. Queries never wait
+    for it: until the vectors match the passages, search() starts the sync
+    in a background thread and returns None (keywords only). After an Ollama
+    error the semantic part is skipped for EMBEDDING_RETRY_SECONDS.
+    """
+
+    def __init__(self, docs_index, embedder, store_path=None):
+        self.docs_index = docs_index
+        self.embedder = embedder
+        self.store = EmbeddingStore(store_path or f"{docs_index.index_file}.emb", embedder.model)
+        self.store.load()
+        self.by_hash = {}  # content hash -> [doc_id]
+        self.generation = None
+        self.retry_at = 0.0
+        self._lock = threading.Lock()
+        self._sync_thread = None
+
+    def sync(self):
+        """Returns the number of newly embedded passages."""
+        with self._lock:
+            if self.generation == self.docs_index.generation:
+                return 0
+            generation = self.docs_index.generation
+            texts = self.docs_index.passage_texts()
+            by_hash = {}
+            for doc_id, text in texts.items():
+                by_hash.setdefault(content_hash(text), []).append(doc_id)
+
+            missing = [key for key in by_hash if key not in self.store.rows]
+            sample_text = {key: texts[doc_ids[0]] for key, doc_ids in by_hash.items()}
+            vectors = self.embedder.embed([sample_text[key] for key in missing]) if missing else []
+            stale = len(self.store.keys) - len(set(self.store.keys) & by_hash.keys())
+            if missing or stale:
+                self.store.update(by_hash.keys(), dict(zip(missing, vectors)))
+                self.store.save()
+                logger.info(f"Embedding documentazione: {len(missing)} passaggi calcolati, {stale} rimossi.")
+            self.by_hash = by_hash
+            self.generation = generation
+            return len(missing)
+
+    @property
+    def ready(self):
+        """True when the vectors match the current passages."""
+        return self.generation == self.docs_index.generation
+
+    @property
+    def available(self):
+        """False while backing off after an Ollama error."""
+        return time.monotonic() >= self.retry_at
+
+    def back_off(self, error):
+        logger.warning(f"Ricerca semantica non disponibile, uso solo le parole chiave: {error}")
+        self.retry_at = time.monotonic() + config.EMBEDDING_RETRY_SECONDS
+
+    def sync_in_background(self):
+        """Starts sync() in a daemon thread unless one is running or the embedder is backing off."""
+        with self._lock:
+            if self._sync_thread is not None and self._sync_thread.is_alive():
+                return self._sync_thread
+            if self.ready or not self.available:
+                return None
+            thread = threading.Thread(target=self._safe_sync, name="docs-embedding-sync", daemon=True)
+            self._sync_thread = thread
+        thread.start()
+        return thread
+
+    def _safe_sync(self):
+        try:
+            self.sync()
+        except Exception as e:
+            # Modello di embedding assente o Ollama non raggiungibile: si riprova piu tardi
+            self.back_off(e)
+
+    def wait(self, timeout=None):
+        thread = self._sync_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def search(self, query, limit=15, query_vector=None):
+        """
+        Returns [(cosine, doc_id)] best first, or None while the vectors are
+        not ready; query_vector skips embedding the query again.
+        """
+        if not self.ready:
+            self.sync_in_background()
+            return None
+        if query_vector is not None:
+            vector = query_vector
+        elif not self.available:
+            return None
+        else:
+            try:
+                vector = self.embedder.embed([query])[0]
+            except Exception as e:
+                self.back_off(e)
+                return None
+        with self._lock:
+            results = []
+            for score, key in self.store.top_k(vector, limit):
+                results.extend((score, doc_id) for doc_id in self.by_hash.get(key, []))
+            return results[:limit]
+
+
+def fuse_scores(keyword_results, semantic_results, semantic_weight):
+    """
+    Combines [(score, doc_id)] lists into one ranking, best first.
+
+    Each list is scaled to [0, 1] by its best score (cosines are first
+    shifted by the worst candidate), then mixed as
+    (1 - semantic_weight) * keyword + semantic_weight * semantic; a passage
+    missing from one list gets 0 for it.
+    """
+    fused = {}
+    if keyword_results:
+        top = max(score for score, _ in keyword_results) or 1.0
+        for score, doc_id in keyword_results:
+            fused[doc_id] = (1 - semantic_weight) * score / top
+    if semantic_results:
+        low = min(score for score, _ in semantic_results)
+        span = max(score for score, _ in semantic_results) - low
+        for score, doc_id in semantic_results:
+            scaled = (score - low) / span if span > 0 else 1.0
+            fused[doc_id] = fused.get(doc_id, 0.0) + semantic_weight * scaled
+    return sorted(((score, doc_id) for doc_id, score in fused.items()), key=lambda item: (-item[0], item[1]))
@@ -0,0 +1,125 @@
+"""
+Persistent index of the executables installed in the usual program folders.
+
+launch_program used to walk Program Files, AppData, the Desktop and
+CUSTOM_PROGRAM_PATHS on every miss. The index maps lowercased file names to
+paths, is saved to EXE_INDEX_FILE and refreshed in a background thread:
+subtrees are scanned in parallel, pruned folders are skipped and a folder
+is listed again only when its mtime changed. Hits are validated lazily with
+a single os.path.exists.
+"""
+import difflib
+import logging
+import os
+import string
+import threading
+import time
+
+from . import config
+from .file_index import DirectoryIndex
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+def default_roots():
+    """Program Files of every drive, the user's AppData and Desktop, CUSTOM_PROGRAM_PATHS."""
+    roots = []
+    for drive in (f"{letter}:\\" for letter in string.ascii_uppercase):
+        if os.path.exists(drive):
+            roots.append(os.path.join(drive, "Program Files"))
+            roots.append(os.path.join(drive, "Program Files (x86)"))
+    home = os.path.expanduser("~")
+    roots.append(os.path.join(home, "AppData", "Local"))
+    roots.append(os.path.join(home, "AppData", "Roaming"))
+    roots.append(os.path.join(home, "Desktop"))
+    roots.extend(config.CUSTOM_PROGRAM_PATHS)
+    # Ordine stabile, senza duplicati
+    return list(dict.fromkeys(roots))
+
+
+class ExecutableIndex(DirectoryIndex):
+    """
+    Lowercased executable name -> paths, built from a folder scan.
+
+    For each scanned folder the index keeps [mtime, executables, subfolders];
+    refresh() lists again only the folders whose mtime changed and reuses
+    the stored entry for the others.
+    """
+
+    label = "eseguibili"
+
+    def __init__(self, roots, index_file=None, extensions=None, prune=None, workers=None):
+        super().__init__(
+            roots,
+            index_file,
+            prune=prune or config.EXE_INDEX_PRUNE_DIRS,
+            workers=workers or config.EXE_INDEX_WORKERS,
+        )
+        self.extensions = tuple(ext.lower() for ext in (extensions or config.EXE_INDEX_EXTENSIONS))
+        # nome in minuscolo -> [percorsi]
+        self.names = {}
+
+    def _accept(self, name):
+        return name.lower().endswith(self.extensions)
+
+    def _rebuild(self, dirs):
+        names = {}
+        for path in sorted(dirs):
+            for name in dirs[path][1]:
+                names.setdefault(name.lower(), []).append(os.path.join(path, name))
+        return names
+
+    def _install(self, names):
+        self.names = names
+
+    # --- ricerca ---
+
+    def _candidates(self, name):
+        key = name.strip().lower()
+        keys = [key]
+        if not key.endswith(self.extensions):
+            keys.extend(key + ext for ext in self.extensions)
+        return keys
+
+    def lookup(self, name):
+        """First existing path indexed under name (with or without extension); None if absent."""
+        for key in self._candidates(name):
+            with self._lock:
+                paths = list(self.names.get(key, ()))
+            for path in paths:
+                if os.path.exists(path):
+                    return path
+                # Voce obsoleta (programma disinstallato): la prossima refresh la elimina
+                logger.debug(f"Eseguibile indicizzato non piu presente: {path}")
+        return None
+
+    def suggest(self, name, limit=3):
+        """Indexed names close to name, for 'did you mean' messages."""
+        key = name.strip().lower()
+        with self._lock:
+            choices = list(self.names)
+        stems = {}
+        for choice in choices:
+            stems.setdefault(os.path.splitext(choice)[0], choice)
+        matches = difflib.get_close_matches(os.path.splitext(key)[0], list(stems), n=limit, cutoff=0.6)
+        return [stems[match] for match in matches]
+
+
+_exe_index = None
+_exe_index_lock = threading.Lock()
+
+
+def get_exe_index():
+    """
+    Process-wide executable index, loaded from EXE_INDEX_FILE; a background
+    refresh starts when it is missing or older than EXE_INDEX_REFRESH_SECONDS.
+    """
+    global _exe_index
+    with _exe_index_lock:
+        if _exe_index is None:
+            _exe_index = ExecutableIndex(default_roots(), config.EXE_INDEX_FILE)
+            _exe_index.load()
+        index = _exe_index
+    if time.time() - index.built_at >= config.EXE_INDEX_REFRESH_SECONDS:
+        index.refresh_in_background()
+    return index
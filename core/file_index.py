@@ -0,0 +1,388 @@
+"""
+Built-in filename search, used by search_files when Everything is not available.
+
+DirectoryIndex is the shared folder scanner: for each folder it stores
+[mtime, files, subfolders], lists again only the folders whose mtime
+changed, scans subtrees on a thread pool and persists the table as JSON
+(gzip-compressed when the file name ends in .gz). FileIndex keeps every
+indexed name in one lowercased, newline-joined string, so a substring or
+regex query runs in C over the whole index and only the hits are turned
+back into paths.
+"""
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+# Cambia quando cambia il formato del file indice
+INDEX_VERSION = 1
+
+
+def _open_index(path, mode, compressed):
+    if compressed:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class DirectoryIndex:
+    """
+    Incremental, persistent scan of a set of root folders.
+
+    Subclasses choose which files to keep (_accept) and rebuild their lookup
+    structures from the folder table (_rebuild) after load() and refresh().
+    """
+
+    # Nome usato nei messaggi di log
+    label = "file"
+
+    def __init__(self, roots, index_file=None, prune=None, workers=None):
+        self.roots = list(roots)
+        self.index_file = index_file or None
+        self.prune = {name.lower() for name in (prune or ())}
+        self.workers = workers or 4
+        # cartella -> [mtime, [file], [sottocartelle]]
+        self.dirs = {}
+        self.built_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+
+    @property
+    def compressed(self):
+        return bool(self.index_file) and self.index_file.endswith(".gz")
+
+    def _accept(self, name):
+        return True
+
+    def _rebuild(self, dirs):
+        """Returns the lookup structures for dirs; stored by _install under the lock."""
+        return None
+
+    def _install(self, derived):
+        pass
+
+    # --- persistenza ---
+
+    def load(self):
+        if not self.index_file:
+            return False
+        try:
+            with _open_index(self.index_file, "r", self.compressed) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, EOFError) as e:
+            logger.warning(f"Indice {self.label} illeggibile, verra ricostruito: {e}")
+            return False
+        if data.get("version") != INDEX_VERSION or data.get("roots") != self.roots:
+            return False
+        derived = self._rebuild(data["dirs"])
+        with self._lock:
+            self.dirs = data["dirs"]
+            self.built_at = data["built_at"]
+            self._install(derived)
+        return True
+
+    def save(self):
+        if not self.index_file:
+            return
+        with self._lock:
+            data = {"version": INDEX_VERSION, "roots": self.roots, "built_at": self.built_at, "dirs": self.dirs}
+        tmp_path = f"{self.index_file}.tmp"
+        try:
+            directory = os.path.dirname(self.index_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with _open_index(tmp_path, "w", self.compressed) as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.index_file)
+        except OSError as e:
+            logger.warning(f"Impossibile salvare l'indice {self.label}: {e}")
+
+    # --- scansione ---
+
+    def _list_dir(self, path):
+        files, subdirs = [], []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name.lower() not in self.prune:
+                                subdirs.append(entry.name)
+                        elif self._accept(entry.name):
+                            files.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            # Permesso negato o cartella sparita durante la scansione
+            pass
+        return sorted(files), sorted(subdirs)
+
+    def _walk_level(self, path, previous):
+        mtime = os.stat(path).st_mtime
+        entry = previous.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry, 0
+        return [mtime, *self._list_dir(path)], 1
+
+    def _walk(self, start, previous):
+        """Scans the subtree under start; returns ({folder: entry}, folders listed again)."""
+        found = {}
+        listed = 0
+        stack = [start]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            entry = previous.get(path)
+            if entry is None or entry[0] != mtime:
+                entry = [mtime, *self._list_dir(path)]
+                listed += 1
+            found[path] = entry
+            stack.extend(os.path.join(path, name) for name in entry[2])
+        return found, listed
+
+    def refresh(self):
+        """Brings the index in line with the disk; returns the number of folders listed again."""
+        with self._lock:
+            previous = dict(self.dirs)
+
+        # Radici e primo livello in serie, i sottoalberi in parallelo
+        found = {}
+        listed = 0
+        subtrees = []
+        for root in self.roots:
+            if not os.path.isdir(root) or root in found:
+                continue
+            top, count = self._walk_level(root, previous)
+            found[root] = top
+            listed += count
+            subtrees.extend(os.path.join(root, name) for name in top[2])
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="dir-index") as executor:
+            for subtree, count in executor.map(lambda path: self._walk(path, previous), subtrees):
+                found.update(subtree)
+                listed += count
+
+        derived = self._rebuild(found)
+        with self._lock:
+            self.dirs = found
+            self.built_at = time.time()
+            self._install(derived)
+        removed = len(previous.keys() - found.keys())
+        if listed or removed:
+            logger.info(f"Indice {self.label} aggiornato: {listed} cartelle rilette, {removed} rimosse.")
+        self.save()
+        return listed
+
+    # --- aggiornamento in background ---
+
+    def refresh_in_background(self):
+        """Starts refresh() in a daemon thread unless one is already running."""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return self._refresh_thread
+            thread = threading.Thread(target=self._safe_refresh, name=f"{self.label}-index-refresh", daemon=True)
+            self._refresh_thread = thread
+        thread.start()
+        return thread
+
+    def _safe_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Aggiornamento dell'indice {self.label} fallito: {e}")
+
+    @property
+    def refreshing(self):
+        thread = self._refresh_thread
+        return thread is not None and thread.is_alive()
+
+    def wait(self, timeout=None):
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+# Ordinamenti nello stile di Everything: "<campo>[-ascending|-descending]"
+_SORT_KEYS = {
+    "name": lambda path: os.path.basename(path).lower(),
+    "path": lambda path: path.lower(),
+    "size": lambda path: _stat_field(path, "st_size"),
+    "date-modified": lambda path: _stat_field(path, "st_mtime"),
+}
+
+
+def _stat_field(path, field):
+    try:
+        return getattr(os.stat(path), field)
+    except OSError:
+        return 0
+
+
+def _sort_paths(paths, sort):
+    key = sort.strip().lower()
+    descending = key.endswith("-descending")
+    for suffix in ("-descending", "-ascending"):
+        if key.endswith(suffix):
+            key = key[: -len(suffix)]
+    if key not in _SORT_KEYS:
+        logger.debug(f"Ordinamento non supportato dall'indice file: {sort}")
+        return paths
+    return sorted(paths, key=_SORT_KEYS[key], reverse=descending)
+
+
+class FileIndex(DirectoryIndex):
+    """
+    Every file and folder name under the roots, searchable by substring or regex.
+
+    Names are stored once, lowercased, in a newline-joined string; entry i
+    starts at offsets[i]. Folders are entries too, so kind="folders" works.
+    """
+
+    label = "file"
+
+    def __init__(self, roots, index_file=None, prune=None, workers=None):
+        super().__init__(roots, index_file, prune, workers)
+        self._folders = []  # percorsi delle cartelle, indicizzati da parent[i]
+        self._names = []  # nome originale della voce i
+        self._parent = array("I")
+        self._is_dir = bytearray()
+        self._offsets = array("I")
+        self._blob = ""
+
+    def _rebuild(self, dirs):
+        folders = sorted(dirs)
+        names, parent, is_dir = [], array("I"), bytearray()
+        for folder_id, folder in enumerate(folders):
+            _, files, subdirs = dirs[folder]
+            for name in subdirs:
+                names.append(name)
+                parent.append(folder_id)
+                is_dir.append(1)
+            for name in files:
+                names.append(name)
+                parent.append(folder_id)
+                is_dir.append(0)
+        # lower() puo allungare un nome (es. "İ" -> "i̇"): gli offset vanno presi sul nome in minuscolo
+        lowered = [name.lower() for name in names]
+        offsets = array("I")
+        position = 0
+        for name in lowered:
+            offsets.append(position)
+            position += len(name) + 1
+        # Una voce per riga: nessun nome di file puo contenere "\n" su Windows
+        blob = "\n".join(lowered)
+        return folders, names, parent, is_dir, offsets, blob
+
+    def _install(self, derived):
+        self._folders, self._names, self._parent, self._is_dir, self._offsets, self._blob = derived
+
+    def __len__(self):
+        return len(self._names)
+
+    def _find(self, term, blob, offsets):
+        """Entries whose lowercased name contains term."""
+        entries = []
+        start = blob.find(term)
+        while start != -1:
+            entry = bisect_right(offsets, start) - 1
+            entries.append(entry)
+            # Salta al nome successivo: una voce conta una volta sola
+            next_start = offsets[entry + 1] if entry + 1 < len(offsets) else len(blob)
+            start = blob.find(term, next_start)
+        return entries
+
+    def _match(self, variants, regex, blob, offsets, names):
+        if regex:
+            # Sul blob ^ e $ valgono per riga; la verifica sul singolo nome scarta i match a cavallo di due voci
+            pattern = re.compile(regex, re.IGNORECASE)
+            blob_pattern = re.compile(regex, re.IGNORECASE | re.MULTILINE)
+            entries = {bisect_right(offsets, match.start()) - 1 for match in blob_pattern.finditer(blob)}
+            return sorted(entry for entry in entries if pattern.search(names[entry]))
+
+        # Varianti in OR; nelle varianti le parole in AND (nome che le contiene tutte)
+        found = set()
+        for variant in variants:
+            words = sorted(variant.lower().split(), key=len, reverse=True)
+            if not words:
+                continue
+            for entry in self._find(words[0], blob, offsets):
+                name = names[entry].lower()
+                if all(word in name for word in words[1:]):
+                    found.add(entry)
+        return sorted(found)
+
+    def search(self, variants, regex=None, extensions=None, kind=None, locations=None, sort=None, max_results=25):
+        """
+        Paths whose name matches any of the variants (all the words of one
+        variant, in any order) or the regex, filtered like Everything's
+        ext:, /a-d, /ad and -path options.
+        """
+        with self._lock:
+            folders, names, parent, is_dir = self._folders, self._names, self._parent, self._is_dir
+            offsets, blob = self._offsets, self._blob
+
+        suffixes = tuple(f".{ext.lower().lstrip('.')}" for ext in (extensions or ()))
+        kind = (kind or "both").lower()
+        roots = [os.path.normcase(os.path.join(location, "")) for location in (locations or ())]
+
+        results = []
+        for entry in self._match(variants, regex, blob, offsets, names):
+            if (kind == "files" and is_dir[entry]) or (kind == "folders" and not is_dir[entry]):
+                continue
+            if suffixes and not names[entry].lower().endswith(suffixes):
+                continue
+            path = os.path.join(folders[parent[entry]], names[entry])
+            if roots and not os.path.normcase(path).startswith(tuple(roots)):
+                continue
+            results.append(path)
+            # Senza ordinamento basta fermarsi al limite
+            if not sort and len(results) >= max_results:
+                break
+        if sort:
+            results = _sort_paths(results, sort)
+        return results[:max_results]
+
+
+def default_roots():
+    """FILE_INDEX_ROOTS, or the user's home folder."""
+    roots = config.FILE_INDEX_ROOTS or [os.path.expanduser("~")]
+    return list(dict.fromkeys(os.path.abspath(os.path.expanduser(root)) for root in roots))
+
+
+_file_index = None
+_file_index_lock = threading.Lock()
+
+
+def get_file_index():
+    """
+    Process-wide filename index, loaded from FILE_INDEX_FILE; a background
+    refresh starts when it is missing or older than FILE_INDEX_REFRESH_SECONDS.
+    """
+    global _file_index
+    with _file_index_lock:
+        if _file_index is None:
+            _file_index = FileIndex(
+                default_roots(),
+                config.FILE_INDEX_FILE,
+                prune=config.FILE_INDEX_PRUNE_DIRS,
+                workers=config.FILE_INDEX_WORKERS,
+            )
+            _file_index.load()
+        index = _file_index
+    if time.time() - index.built_at >= config.FILE_INDEX_REFRESH_SECONDS:
+        index.refresh_in_background()
+    return index
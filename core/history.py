@@ -0,0 +1,110 @@
+import logging
+
+from .utils import estimate_tokens
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+TOOL_RESULT_PREFIX = "Risultato azione '"
+RETRY_PREFIX = "Errore:"
+COMPACTED_MARKER = "[compattato]"
+
+# Dopo una compattazione si scende sotto il budget con margine, per non ricompattare ad ogni turno
+COMPACTION_TARGET = 0.75
+
+
+def message_tokens(message):
+    # ~4 token di overhead per messaggio (ruolo e separatori del template chat)
+    return estimate_tokens(message.get("content", "")) + 4
+
+
+def history_tokens(history):
+    return sum(message_tokens(m) for m in history)
+
+
+def _is_tool_result(message):
+    content = message.get("content", "")
+    return (
+        message.get("role") == "user"
+        and content.startswith(TOOL_RESULT_PREFIX)
+        and COMPACTED_MARKER not in content.split(":", 1)[0]
+    )
+
+
+def _is_retry(message):
+    return message.get("role") == "user" and message.get("content", "").startswith(RETRY_PREFIX)
+
+
+def summarize_tool_result(content, stub_chars=200):
+    """Replaces a tool result with its header, line count and the first stub_chars characters."""
+    header, _, body = content.partition(": ")
+    if len(body) <= stub_chars:
+        return content
+    lines = body.count("\n") + 1
+    omitted = len(body) - stub_chars
+    return (
+        f"{header} {COMPACTED_MARKER} ({lines} righe): {body[:stub_chars]}"
+        f"... [{omitted} caratteri omessi]"
+    )
+
+
+def compact_history(history, budget_tokens, keep_recent=4, pinned=None, stub_chars=200):
+    """
+    Keeps the history under budget_tokens, returning (new_history, saved_tokens).
+
+    The newest keep_recent messages and the pinned message (the current task)
+    are never touched. Older messages are reduced in three passes until the
+    history fits: tool results become short stubs, failed-format retries are
+    dropped, then the oldest messages are dropped.
+    """
+    total = history_tokens(history)
+    if total <= budget_tokens:
+        return history, 0
+
+    target = int(budget_tokens * COMPACTION_TARGET)
+    recent_start = max(0, len(history) - keep_recent)
+    compacted = list(history)
+
+    def protected(index, message):
+        return index >= recent_start or message is pinned
+
+    # 1. Risultati dei tool vecchi -> stub
+    for index, message in enumerate(compacted):
+        if total <= target:
+            break
+        if protected(index, message) or not _is_tool_result(message):
+            continue
+        stub = {"role": message["role"], "content": summarize_tool_result(message["content"], stub_chars)}
+        total -= message_tokens(message) - message_tokens(stub)
+        compacted[index] = stub
+
+    # 2. Coppie risposta non valida + richiesta di correzione
+    if total > target:
+        drop = set()
+        for index, message in enumerate(compacted):
+            if protected(index, message) or not _is_retry(message):
+                continue
+            drop.add(index)
+            if index > 0 and compacted[index - 1].get("role") == "assistant" and not protected(index - 1, compacted[index - 1]):
+                drop.add(index - 1)
+        for index in sorted(drop):
+            total -= message_tokens(compacted[index])
+        compacted = [m for i, m in enumerate(compacted) if i not in drop]
+        recent_start -= len([i for i in drop if i < recent_start])
+
+    # 3. Messaggi piu vecchi
+    if total > target:
+        kept = []
+        for index, message in enumerate(compacted):
+            if total > target and not protected(index, message):
+                total -= message_tokens(message)
+                continue
+            kept.append(message)
+        compacted = kept
+
+    saved = history_tokens(history) - history_tokens(compacted)
+    logger.info(
+        f"History compattata: {saved} token risparmiati "
+        f"({history_tokens(history)} -> {history_tokens(compacted)}, budget {budget_tokens})."
+    )
+    return compacted, saved
@@ -0,0 +1,118 @@
+import json
+import logging
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _next_significant(text, index):
+    while index < len(text) and text[index].isspace():
+        index += 1
+    return text[index] if index < len(text) else ""
+
+
+def _normalize(text):
+    """
+    Single pass over a broken JSON object that rewrites it into valid JSON.
+
+    - single-quoted strings become double-quoted;
+    - a double quote inside a string that is not followed by , : } ] is escaped;
+    - text after the top-level object is dropped;
+    - trailing commas are removed;
+    - a truncated string/object/array is closed.
+    """
+    out = []
+    stack = []
+    quote = None  # delimitatore della stringa aperta: '"' o "'"
+    escape = False
+    index = 0
+
+    while index < len(text):
+        char = text[index]
+
+        if quote:
+            if escape:
+                escape = False
+                out.append(char)
+            elif char == "\\":
+                escape = True
+                out.append(char)
+            elif char == quote:
+                follower = _next_significant(text, index + 1)
+                if follower in {",", ":", "}", "]", ""}:
+                    quote = None
+                    out.append('"')
+                else:
+                    # Virgolette interne non escapate
+                    out.append('\\"' if quote == '"' else "'")
+            elif char == '"':
+                # Doppi apici dentro una stringa delimitata da apici singoli
+                out.append('\\"')
+            else:
+                out.append(char)
+            index += 1
+            continue
+
+        if char in "\"'":
+            quote = char
+            out.append('"')
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+            out.append(char)
+        elif char in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack and stack[-1] == char:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                break
+        else:
+            out.append(char)
+        index += 1
+
+    if quote:
+        if escape:
+            out.pop()
+        out.append('"')
+    while out and (out[-1].isspace() or out[-1] in ",:"):
+        out.pop()
+    while stack:
+        out.append(stack.pop())
+    return "".join(out)
+
+
+def repair_json(raw):
+    """
+    Fixes the common ways a small model breaks its JSON reply.
+
+    Handles markdown fences and chatter around the object, trailing text,
+    unescaped inner quotes, single quotes, trailing commas and truncated
+    output. Returns the parsed dict, or None if the reply cannot be salvaged.
+    """
+    if not raw:
+        return None
+    start = raw.find("{")
+    if start == -1:
+        return None
+    text = raw[start:]
+
+    # Oggetto valido seguito da testo extra
+    try:
+        data, _ = json.JSONDecoder(strict=False).raw_decode(text)
+        if isinstance(data, dict):
+            return data
+    except json.JSONDecodeError:
+        pass
+
+    candidate = _normalize(text)
+    try:
+        data = json.loads(candidate, strict=False)
+    except json.JSONDecodeError as e:
+        logger.debug(f"Riparazione JSON fallita: {e}")
+        return None
+    return data if isinstance(data, dict) else None
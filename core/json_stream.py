@@ -0,0 +1,166 @@
+import json
+import re
+
+# Escape incompleto in coda (es. "\" oppure "\u00"): va trattenuto fino al prossimo chunk
+_PARTIAL_ESCAPE = re.compile(r"\\(u[0-9a-fA-F]{0,3})?$")
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "expect")
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.key = None
+        self.expect = "key" if kind == "object" else "value"
+
+
+class IncrementalJSONParser:
+    """
+    Parses a single JSON object as it arrives in chunks.
+
+    ``feed`` returns a list of events:
+      - ("delta", path, text): new decoded text of a string value, where path is
+        the tuple of object keys leading to it (e.g. ("thought",), ("args", "message")).
+      - ("value", key, value): a top-level field has been fully received.
+      - ("end", obj): the top-level object has been closed.
+
+    Text before the opening brace (markdown fences, chatter) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self.done = False
+        self._pos = 0
+        self._stack = []
+        self._started = False
+        self._object_start = None
+        self._value_start = None
+        self._in_string = False
+        self._string_is_key = False
+        self._string_start = None
+        self._escape = False
+        self._delta_from = None
+
+    def _path(self):
+        return tuple(frame.key for frame in self._stack if frame.kind == "object")
+
+    def _emit_delta(self, events, end, final=False):
+        raw = self.buffer[self._delta_from:end]
+        if not final:
+            partial = _PARTIAL_ESCAPE.search(raw)
+            if partial:
+                raw = raw[: partial.start()]
+        if not raw:
+            return
+        try:
+            text = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            return
+        self._delta_from += len(raw)
+        events.append(("delta", self._path(), text))
+
+    def _value_done(self, end, events):
+        frame = self._stack[-1]
+        if len(self._stack) == 1:
+            value = json.loads(self.buffer[self._value_start:end])
+            self.fields[frame.key] = value
+            events.append(("value", frame.key, value))
+        frame.expect = "comma"
+
+    def _close(self, index, events):
+        self._stack.pop()
+        if not self._stack:
+            self.done = True
+            obj = json.loads(self.buffer[self._object_start:index + 1])
+            events.append(("end", obj))
+        else:
+            self._value_done(index + 1, events)
+
+    def feed(self, chunk):
+        events = []
+        if self.done:
+            return events
+        self.buffer += chunk
+        buffer = self.buffer
+        index = self._pos
+
+        while index < len(buffer) and not self.done:
+            char = buffer[index]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1].key = json.loads(buffer[self._string_start:index + 1])
+                        self._stack[-1].expect = "colon"
+                    else:
+                        self._emit_delta(events, index, final=True)
+                        self._value_done(index + 1, events)
+                index += 1
+                continue
+
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._object_start = index
+                    self._stack.append(_Frame("object"))
+                index += 1
+                continue
+
+            frame = self._stack[-1]
+
+            if frame.expect == "scalar":
+                if char in ",}]" or char.isspace():
+                    self._value_done(index, events)
+                    continue  # rielabora il delimitatore nello stato "comma"
+                index += 1
+                continue
+
+            if char.isspace():
+                index += 1
+                continue
+
+            if frame.expect == "key":
+                if char == '"':
+                    self._in_string = True
+                    self._string_is_key = True
+                    self._string_start = index
+                elif char == "}":
+                    self._close(index, events)
+            elif frame.expect == "colon":
+                if char == ":":
+                    frame.expect = "value"
+            elif frame.expect == "value":
+                if len(self._stack) == 1:
+                    self._value_start = index
+                if char == '"':
+                    self._in_string = True
+                    self._string_is_key = False
+                    self._string_start = index
+                    self._delta_from = index + 1
+                elif char == "{":
+                    frame.expect = "comma"
+                    self._stack.append(_Frame("object"))
+                elif char == "[":
+                    frame.expect = "comma"
+                    self._stack.append(_Frame("array"))
+                elif char == "]" and frame.kind == "array":
+                    self._close(index, events)
+                else:
+                    frame.expect = "scalar"
+            elif frame.expect == "comma":
+                if char == ",":
+                    frame.expect = "key" if frame.kind == "object" else "value"
+                elif char in "}]":
+                    self._close(index, events)
+            index += 1
+
+        self._pos = index
+        if self._in_string and not self._string_is_key:
+            self._emit_delta(events, index)
+        return events
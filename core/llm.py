@@ -1,11 +1,8 @@
-import os
-import platform
-import requests
+import asyncio
 import json
 import re
-import asyncio
-import functools
 import logging
+import time
 
 # Get the logger instance
 logger = logging.getLogger('seeker_cli')
@@ -19,70 +16,254 @@ def clean_json_string(s):
     return s.strip()
 
 from . import config
+from .cache import get_response_cache, make_cache_key
+from .json_stream import IncrementalJSONParser
+from .ollama_client import get_default_client
+from .prompts import build_system_messages, load_cookbook, tool_list_for, tool_names_for_category
+from .telemetry import get_telemetry
+from .utils import estimate_tokens
+
+# Carica subito il cookbook per segnalare all'avvio un file mancante
+load_cookbook()
+
+def choose_num_ctx(prompt_tokens, mode=None, buckets=None):
+    """
+    Context size for one call.
+
+    Adaptive mode picks the smallest bucket that fits the estimated prompt plus
+    MAX_OUTPUT_TOKENS; the fixed buckets keep Ollama from reallocating (or
+    reloading) the KV cache on every small change in prompt length.
+    """
+    mode = mode or config.NUM_CTX_MODE
+    if mode != "adaptive":
+        return config.NUM_CTX
+    buckets = sorted(buckets or config.NUM_CTX_BUCKETS)
+    needed = int(prompt_tokens * config.NUM_CTX_MARGIN) + config.MAX_OUTPUT_TOKENS
+    for bucket in buckets:
+        if needed <= bucket:
+            return bucket
+    return buckets[-1]
 
-# --- Caricamento del Cookbook di Funzionalità ---
-# Questo blocco è stato spostato qui da config.py per permettere il logging.
-# In un'architettura più grande, andrebbe gestito con un sistema di configurazione robusto.
-config.WINDOWS_HACKS_COOKBOOK = ""
-try:
-    with open(config.COOKBOOK_FILE, "r", encoding="utf-8") as f:
-        config.WINDOWS_HACKS_COOKBOOK = f.read()
-except FileNotFoundError:
-    logger.warning(f"Attenzione: File '{config.COOKBOOK_FILE}' non trovato. Le funzionalità avanzate potrebbero essere limitate.")
-except Exception as e:
-    logger.error(f"Errore nel caricamento di '{config.COOKBOOK_FILE}': {e}")
-
-
-async def call_ollama(messages, system_prompt_template, tool_list_string):
-    # Recupera info sistema
-    cwd = os.getcwd()
-    username = os.getlogin()
-    os_name = platform.system()
-
-    # Formatta il prompt con il template dello specialista
-    formatted_system_prompt = system_prompt_template.format(
-        cwd=cwd,
-        username=username,
-        os_name=os_name,
-        cookbook=config.WINDOWS_HACKS_COOKBOOK,
-        tool_list=tool_list_string
-    )
 
-    # Assicuriamo che il primo messaggio sia sempre il System Prompt aggiornato
-    system_msg = {"role": "system", "content": formatted_system_prompt}
+def _build_chat_payload(messages, system_prompt_template, tool_list_string, stream=False, response_format=None):
+    # Prompt memoizzato per (toolset, cwd, mtime cookbook): prefisso identico tra i turni
+    system_msgs = build_system_messages(system_prompt_template, tool_list_string)
     
     # Filtra eventuali system prompt vecchi dalla history per non confondere il modello
     user_history = [m for m in messages if m['role'] != 'system']
-    final_messages = [system_msg] + user_history
+    final_messages = system_msgs + user_history
 
-    payload = {
+    return {
         "model": config.MODEL_NAME,
         "messages": final_messages,
-        "stream": False,
-        "format": "json",
+        "stream": stream,
+        "format": response_format or "json",
+        "keep_alive": config.OLLAMA_KEEP_ALIVE,
         "options": {
             "temperature": 0.1, # Bassa temperatura per precisione tecnica
-            "num_ctx": 8192,
+            "num_ctx": choose_num_ctx(_estimate_prompt_tokens(final_messages)),
             "num_predict": config.MAX_OUTPUT_TOKENS
         }
     }
-    
+
+
+def report_call_metrics(role, data, prompt_tokens=None, category=None, iteration=None, num_ctx=None):
+    """
+    Records Ollama's timing fields for one call in the telemetry and logs the prompt evaluation.
+
+    prompt_eval_count only covers the tokens Ollama had to evaluate, so when it
+    is well below the estimated prompt size the prefix came from the KV cache.
+    """
+    if data.get("total_duration") is None and data.get("prompt_eval_count") is None:
+        return None
+    reuse = None
+    count = data.get("prompt_eval_count")
+    if prompt_tokens and count is not None:
+        reuse = max(0.0, 1 - count / prompt_tokens)
+    record = get_telemetry().record(
+        role, data, category=category, iteration=iteration, cache_reuse=reuse, num_ctx=num_ctx
+    )
+    logger.debug(
+        "[%s] num_ctx=%s prompt_eval_count=%s prompt_eval_duration=%.1f ms%s",
+        role,
+        num_ctx,
+        count,
+        (data.get("prompt_eval_duration") or 0) / 1e6,
+        f" (prefisso riusato stimato: {reuse:.0%})" if reuse is not None else "",
+    )
+    return record
+
+
+def _estimate_prompt_tokens(messages):
+    return sum(estimate_tokens(m.get("content", "")) for m in messages)
+
+
+def _chat_cache_key(payload):
+    return make_cache_key(
+        "chat", payload["model"], payload["options"], payload.get("format"), payload["messages"]
+    )
+
+
+def reply_from_fields(fields):
+    """
+    The specialist reply rebuilt from the top-level fields of a streamed
+    object, or None until both action and args are complete.
+    """
+    if "action" not in fields or "args" not in fields:
+        return None
+    data = {key: fields[key] for key in ("thought", "action", "args") if key in fields}
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _reply_from_prefix(text):
+    parser = IncrementalJSONParser()
     try:
-        # Usa run_in_executor per non bloccare l'event loop di asyncio
-        loop = asyncio.get_running_loop()
-        
-        # functools.partial per passare argomenti a requests.post nel thread executor
-        blocking_call = functools.partial(requests.post, config.OLLAMA_URL, json=payload)
-        
-        resp = await loop.run_in_executor(None, blocking_call) # None usa l'executor di default (ThreadPoolExecutor)
+        parser.feed(text)
+    except ValueError:
+        return None
+    return reply_from_fields(parser.fields)
+
+
+def _connection_error_response(e):
+    logger.error(f"Errore critico connessione Ollama: {e}")
+    return json.dumps({
+        "thought": "Errore di connessione",
+        "action": "chat", 
+        "args": {"message": f"Errore critico connessione Ollama: {e}"}
+    })
+
+
+async def call_ollama(messages, system_prompt_template, tool_list_string, client=None, category=None, iteration=None, response_format=None):
+    payload = _build_chat_payload(
+        messages, system_prompt_template, tool_list_string, response_format=response_format
+    )
+    client = client or get_default_client()
+
+    cache = get_response_cache()
+    cache_key = _chat_cache_key(payload) if cache else None
+    if cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Risposta specialista servita dalla cache.")
+            return cached
+
+    try:
+        # Trasporto asyncio nativo: la cancellazione del task chiude la connessione
+        data = await client.achat(payload)
+        report_call_metrics(
+            "specialist",
+            data,
+            _estimate_prompt_tokens(payload["messages"]),
+            category,
+            iteration,
+            num_ctx=payload["options"]["num_ctx"],
+        )
         
-        resp.raise_for_status()
-        cleaned_content = clean_json_string(resp.json()['message']['content'])
+        cleaned_content = clean_json_string(data['message']['content'])
+        if cache:
+            cache.put(cache_key, cleaned_content)
         return cleaned_content
     except Exception as e:
-        logger.error(f"Errore critico connessione Ollama: {e}")
-        return json.dumps({
-            "thought": "Errore di connessione",
-            "action": "chat", 
-            "args": {"message": f"Errore critico connessione Ollama: {e}"}
-        })
\ No newline at end of file
+        return _connection_error_response(e)
+
+
+async def stream_ollama(messages, system_prompt_template, tool_list_string, client=None, category=None, iteration=None, response_format=None):
+    """
+    Streaming variant of call_ollama: yields the response text piece by piece.
+
+    Closing the generator early aborts the generation on the Ollama side; if
+    action and args were already received, the reply rebuilt from them is
+    cached like a complete one.
+    """
+    payload = _build_chat_payload(
+        messages, system_prompt_template, tool_list_string, stream=True, response_format=response_format
+    )
+    client = client or get_default_client()
+
+    cache = get_response_cache()
+    cache_key = _chat_cache_key(payload) if cache else None
+    if cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Risposta specialista servita dalla cache.")
+            yield cached
+            return
+
+    received = []
+    closed_early = False
+    stream = client.astream("chat", payload)
+    try:
+        async for chunk in stream:
+            if chunk.get("done"):
+                report_call_metrics(
+                    "specialist",
+                    chunk,
+                    _estimate_prompt_tokens(payload["messages"]),
+                    category,
+                    iteration,
+                    num_ctx=payload["options"]["num_ctx"],
+                )
+                # Solo le risposte ricevute per intero finiscono in cache
+                if cache and received:
+                    cache.put(cache_key, clean_json_string("".join(received)))
+            content = chunk.get("message", {}).get("content", "")
+            if content:
+                received.append(content)
+                yield content
+    except GeneratorExit:
+        # Dispatch anticipato della sessione: il "done" non arrivera mai
+        closed_early = True
+        raise
+    except Exception as e:
+        if received:
+            logger.error(f"Stream Ollama interrotto: {e}")
+        else:
+            yield _connection_error_response(e)
+    finally:
+        await stream.aclose()
+        if closed_early and cache and received:
+            reply = _reply_from_prefix("".join(received))
+            if reply is not None:
+                cache.put(cache_key, reply)
+
+
+def _warmup_num_ctx():
+    system_msgs = build_system_messages(
+        config.BASE_SPECIALIST_PROMPT,
+        tool_list_for(tool_names_for_category("general_chat")),
+    )
+    return choose_num_ctx(_estimate_prompt_tokens(system_msgs))
+
+
+async def warmup_models(client=None, models=None):
+    """
+    Loads the router and specialist models concurrently so the first prompt hits warm models.
+
+    A generate request without a prompt only loads the model (and keeps it
+    resident for OLLAMA_KEEP_ALIVE). Returns {model: ready}.
+    """
+    client = client or get_default_client()
+    if models is None:
+        models = [config.ROUTER_MODEL_NAME, config.MODEL_NAME]
+    models = list(dict.fromkeys(models))
+
+    async def _load(model):
+        start = time.perf_counter()
+        payload = {"model": model, "keep_alive": config.OLLAMA_KEEP_ALIVE}
+        if model == config.MODEL_NAME:
+            # Carica lo specialista gia con il num_ctx del primo turno, evitando un reload
+            payload["options"] = {"num_ctx": _warmup_num_ctx()}
+        try:
+            data = await client.agenerate(payload)
+            report_call_metrics("warmup", data)
+        except Exception as e:
+            logger.warning(f"Warm-up del modello {model} fallito: {e}")
+            return False
+        logger.debug(f"Modello {model} caricato in {time.perf_counter() - start:.1f}s.")
+        return True
+
+    results = await asyncio.gather(*(_load(model) for model in models))
+    status = dict(zip(models, results))
+    if all(results):
+        logger.info(f"Modelli pronti: {', '.join(models)}")
+    return status
@@ -0,0 +1,187 @@
+import asyncio
+import functools
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import config
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+
+def _api_base(url):
+    # OLLAMA_URL punta a /api/chat: ricaviamo la base comune a tutti gli endpoint
+    base = url.rstrip("/")
+    if base.rsplit("/", 1)[-1] in {"chat", "generate", "embed", "embeddings"}:
+        base = base.rsplit("/", 1)[0]
+    return base
+
+
+class OllamaClient:
+    """
+    Shared HTTP client for the Ollama API.
+
+    Keeps a pool of keep-alive connections so router, specialist and
+    embedding calls reuse the same sockets instead of opening a new TCP
+    connection for every request.
+
+    The coroutine variants (``achat``, ``agenerate``, ``aembed``) use a native
+    asyncio transport (httpx) when available: cancelling the awaiting task
+    closes the connection, which makes Ollama abort the generation.
+    """
+
+    def __init__(self, base_url=None, pool_size=None, connect_timeout=None, read_timeout=None):
+        self.api_base = _api_base(base_url or config.OLLAMA_URL)
+        self.pool_size = pool_size or config.OLLAMA_POOL_SIZE
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else config.OLLAMA_CONNECT_TIMEOUT,
+            read_timeout if read_timeout is not None else config.OLLAMA_READ_TIMEOUT,
+        )
+        self._session = None
+        self._async_client = None
+        self._async_loop = None
+        self._executor = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    def endpoint(self, name):
+        return f"{self.api_base}/{name}"
+
+    def _timeout(self, timeout):
+        if timeout is None:
+            return self.timeout
+        # Un timeout per-call sostituisce solo quello di lettura
+        return (self.timeout[0], timeout)
+
+    def post(self, name, payload, timeout=None):
+        response = self.session.post(
+            self.endpoint(name), json=payload, timeout=self._timeout(timeout)
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def get(self, name, timeout=None):
+        response = self.session.get(self.endpoint(name), timeout=self._timeout(timeout))
+        response.raise_for_status()
+        return response.json()
+
+    def chat(self, payload, timeout=None):
+        return self.post("chat", payload, timeout=timeout)
+
+    def generate(self, payload, timeout=None):
+        return self.post("generate", payload, timeout=timeout)
+
+    def embed(self, payload, timeout=None):
+        return self.post("embed", payload, timeout=timeout)
+
+    def _get_async_client(self):
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            # Un AsyncClient e legato all'event loop in cui apre le connessioni
+            self._async_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    async def apost(self, name, payload, timeout=None):
+        if not HAS_HTTPX:
+            # Fallback senza httpx: pool di thread dedicato e limitato
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.pool_size, thread_name_prefix="ollama"
+                )
+            loop = asyncio.get_running_loop()
+            blocking_call = functools.partial(self.post, name, payload, timeout=timeout)
+            return await loop.run_in_executor(self._executor, blocking_call)
+
+        connect_timeout, read_timeout = self._timeout(timeout)
+        response = await self._get_async_client().post(
+            self.endpoint(name),
+            json=payload,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def astream(self, name, payload, timeout=None):
+        """
+        Yields the NDJSON chunks of a streaming request as they arrive.
+
+        Closing the generator early (e.g. once the needed fields are parsed)
+        closes the connection and stops the generation on the Ollama side.
+        """
+        if not HAS_HTTPX:
+            # Senza trasporto async nativo: una sola risposta completa
+            yield await self.apost(name, dict(payload, stream=False), timeout=timeout)
+            return
+
+        connect_timeout, read_timeout = self._timeout(timeout)
+        async with self._get_async_client().stream(
+            "POST",
+            self.endpoint(name),
+            json=dict(payload, stream=True),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+    async def achat(self, payload, timeout=None):
+        return await self.apost("chat", payload, timeout=timeout)
+
+    async def agenerate(self, payload, timeout=None):
+        return await self.apost("generate", payload, timeout=timeout)
+
+    async def aembed(self, payload, timeout=None):
+        return await self.apost("embed", payload, timeout=timeout)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            if self._async_loop is asyncio.get_running_loop():
+                await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+        self.close()
+
+
+_default_client = None
+
+
+def get_default_client():
+    """Returns the process-wide client used when no session client is passed."""
+    global _default_client
+    if _default_client is None:
+        _default_client = OllamaClient()
+    return _default_client
@@ -0,0 +1,182 @@
+"""
+Asynchronous shell command runner for run_shell_command.
+
+The command runs as an asyncio subprocess, so the event loop stays free
+while it works: its output (stdout and stderr merged, in arrival order) is
+streamed to the console chunk by chunk, while only the first and last
+bytes are kept for the model in a BoundedOutput. A timeout or a cancelled
+task kills the whole process tree.
+"""
+import asyncio
+import codecs
+import locale
+import logging
+import os
+import signal
+import subprocess
+import time
+from collections import namedtuple
+
+from . import config
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+# Dimensione delle letture dalla pipe
+READ_CHUNK_BYTES = 4096
+# Attesa massima per raccogliere un processo terminato dopo un annullamento
+REAP_TIMEOUT_SECONDS = 5
+
+CommandResult = namedtuple(
+    "CommandResult", ["exit_code", "output", "duration", "total_bytes", "dropped_bytes", "timed_out"]
+)
+
+
+def output_encoding():
+    """Encoding used by the console programs (the locale one, like text=True)."""
+    return locale.getpreferredencoding(False) or "utf-8"
+
+
+class BoundedOutput:
+    """
+    Keeps the first head_bytes and the last tail_bytes of a byte stream.
+
+    The head fills up first; after that the tail is a sliding window over
+    the most recent bytes and everything in between is only counted.
+    """
+
+    def __init__(self, head_bytes=None, tail_bytes=None):
+        self.head_bytes = config.COMMAND_OUTPUT_HEAD_BYTES if head_bytes is None else head_bytes
+        self.tail_bytes = config.COMMAND_OUTPUT_TAIL_BYTES if tail_bytes is None else tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    @property
+    def dropped(self):
+        return self.total - len(self.head) - len(self.tail)
+
+    def write(self, data):
+        self.total += len(data)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data or self.tail_bytes <= 0:
+            return
+        self.tail += data
+        if len(self.tail) > self.tail_bytes:
+            del self.tail[: len(self.tail) - self.tail_bytes]
+
+    def text(self, encoding=None):
+        encoding = encoding or output_encoding()
+        head = self.head.decode(encoding, errors="replace")
+        if not self.dropped:
+            return head + self.tail.decode(encoding, errors="replace")
+        return (
+            f"{head}\n... [{self.dropped} byte omessi] ...\n"
+            f"{self.tail.decode(encoding, errors='replace')}"
+        )
+
+
+def _kill_tree(process):
+    """Kills the shell and everything it started."""
+    if process.returncode is not None:
+        return
+    try:
+        if os.name == "nt":
+            # Con shell=True il processo e cmd.exe: taskkill /T chiude anche i figli
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, ProcessLookupError):
+        pass
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def _pump(stream, buffer, on_output, encoding):
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    while True:
+        chunk = await stream.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        buffer.write(chunk)
+        if on_output is not None:
+            text = decoder.decode(chunk)
+            if text:
+                on_output(text)
+    if on_output is not None:
+        text = decoder.decode(b"", final=True)
+        if text:
+            on_output(text)
+
+
+async def run_command(command, timeout=None, on_output=None, head_bytes=None, tail_bytes=None):
+    """
+    Runs command through the shell and returns a CommandResult.
+
+    on_output receives the decoded output as it arrives. After timeout
+    seconds (COMMAND_TIMEOUT by default, 0 = none) the process tree is
+    killed and timed_out is set; cancelling the awaiting task kills it too.
+    """
+    timeout = config.COMMAND_TIMEOUT if timeout is None else timeout
+    encoding = output_encoding()
+    buffer = BoundedOutput(head_bytes, tail_bytes)
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_shell(
+        command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        # Gruppo di processi proprio, per poterlo terminare per intero
+        start_new_session=os.name != "nt",
+    )
+
+    async def _communicate():
+        await _pump(process.stdout, buffer, on_output, encoding)
+        return await process.wait()
+
+    timed_out = False
+    try:
+        exit_code = await asyncio.wait_for(_communicate(), timeout or None)
+    except asyncio.TimeoutError:
+        timed_out = True
+        logger.warning(f"Comando interrotto dopo {timeout}s: {command}")
+        _kill_tree(process)
+        exit_code = await process.wait()
+    except asyncio.CancelledError:
+        logger.warning(f"Comando annullato: {command}")
+        _kill_tree(process)
+        # Raccoglie il processo terminato prima di propagare l'annullamento
+        try:
+            await asyncio.wait_for(asyncio.shield(process.wait()), REAP_TIMEOUT_SECONDS)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+        raise
+
+    return CommandResult(
+        exit_code=exit_code,
+        output=buffer.text(encoding),
+        duration=time.perf_counter() - started,
+        total_bytes=buffer.total,
+        dropped_bytes=buffer.dropped,
+        timed_out=timed_out,
+    )
+
+
+def format_result(result):
+    """Tool output for the model: exit code, duration, bounded output."""
+    lines = [f"Exit Code: {result.exit_code}", f"Durata: {result.duration:.1f}s"]
+    if result.timed_out:
+        lines.append("Timeout: comando interrotto")
+    if result.dropped_bytes:
+        lines.append(f"Output troncato: {result.dropped_bytes} di {result.total_bytes} byte omessi")
+    lines.append(f"Out: {result.output or '(Nessun output)'}")
+    return "\n".join(lines)
@@ -0,0 +1,197 @@
+import functools
+import getpass
+import logging
+import os
+import platform
+import re
+
+from . import config
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+CATEGORY_TOOLSETS = {
+    "programming_question": config.PROGRAMMING_TOOLS,
+    "system_command": config.SYSTEM_COMMAND_TOOLS,
+    "general_chat": config.GENERAL_CHAT_TOOLS,
+}
+
+# Riga di argomento nelle TOOL_DEFINITIONS: '  - "nome" (tipo, required|optional): ...'
+_ARG_PATTERN = re.compile(r'^\s+-\s+"(\w+)"\s+\(([^,)]+),\s*(required|optional)\)', re.MULTILINE)
+
+_JSON_TYPES = {
+    "string": {"type": "string"},
+    "boolean": {"type": "boolean"},
+    "number": {"type": "number"},
+    "array|string": {"anyOf": [{"type": "array", "items": {"type": "string"}}, {"type": "string"}]},
+}
+
+_cookbook_cache = {"loaded": False, "mtime": None, "text": ""}
+
+
+def _cookbook_mtime():
+    try:
+        return os.path.getmtime(config.COOKBOOK_FILE)
+    except OSError:
+        return None
+
+
+def load_cookbook():
+    """
+    Returns the capabilities cookbook, re-reading the file only when its mtime changes.
+
+    Returns (text, mtime); mtime is None when the file is missing.
+    """
+    mtime = _cookbook_mtime()
+    if _cookbook_cache["loaded"] and mtime == _cookbook_cache["mtime"]:
+        return _cookbook_cache["text"], mtime
+
+    text = ""
+    try:
+        with open(config.COOKBOOK_FILE, "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        logger.warning(f"Attenzione: File '{config.COOKBOOK_FILE}' non trovato. Le funzionalità avanzate potrebbero essere limitate.")
+    except Exception as e:
+        logger.error(f"Errore nel caricamento di '{config.COOKBOOK_FILE}': {e}")
+
+    _cookbook_cache["loaded"] = True
+    _cookbook_cache["mtime"] = mtime
+    _cookbook_cache["text"] = text
+    config.WINDOWS_HACKS_COOKBOOK = text
+    return text, mtime
+
+
+@functools.lru_cache(maxsize=1)
+def system_info():
+    """Username and OS name do not change during a session: computed once."""
+    try:
+        username = os.getlogin()
+    except OSError:
+        # Nessun terminale di login (servizi, container): usa le variabili d'ambiente
+        username = getpass.getuser()
+    return username, platform.system()
+
+
+@functools.lru_cache(maxsize=None)
+def tool_names_for_category(category):
+    selected_toolset = CATEGORY_TOOLSETS.get(category, config.GENERAL_CHAT_TOOLS)
+    return tuple(
+        name
+        for name, definition in config.TOOL_DEFINITIONS.items()
+        if definition in selected_toolset
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def tool_list_for(tool_names):
+    """Tool list block for the prompt; tool_names must be a tuple."""
+    return "\n".join(
+        config.TOOL_DEFINITIONS[name]
+        for name in tool_names
+        if name in config.TOOL_DEFINITIONS
+    )
+
+
+def _args_schema(definition):
+    properties = {}
+    required = []
+    for name, arg_type, necessity in _ARG_PATTERN.findall(definition):
+        properties[name] = _JSON_TYPES.get(arg_type.strip(), {"type": "string"})
+        if necessity == "required":
+            required.append(name)
+    return {"type": "object", "properties": properties, "required": required}
+
+
+@functools.lru_cache(maxsize=None)
+def response_schema_for(tool_names):
+    """
+    JSON schema for Ollama's `format`, generated from config.TOOL_DEFINITIONS.
+
+    One branch per tool ties `action` to its own `args`, so constrained decoding
+    can only produce a known action with its arguments; tool_names must be a tuple.
+    """
+    branches = []
+    for name in tool_names:
+        definition = config.TOOL_DEFINITIONS.get(name)
+        if definition is None:
+            continue
+        branches.append(
+            {
+                "type": "object",
+                "properties": {
+                    "thought": {"type": "string"},
+                    "action": {"const": name},
+                    "args": _args_schema(definition),
+                },
+                "required": ["thought", "action", "args"],
+            }
+        )
+    return {"anyOf": branches}
+
+
+@functools.lru_cache(maxsize=32)
+def _render(system_prompt_template, tool_list_string, cwd, cookbook_mtime):
+    username, os_name = system_info()
+    cookbook, _ = load_cookbook()
+    return system_prompt_template.format(
+        cwd=cwd,
+        username=username,
+        os_name=os_name,
+        cookbook=cookbook,
+        tool_list=tool_list_string,
+    )
+
+
+def render_specialist_prompt(system_prompt_template, tool_list_string, cwd=None):
+    """
+    Renders the specialist system prompt, memoized on (toolset, cwd, cookbook mtime).
+
+    Repeated calls with the same inputs return the very same string, so the
+    prompt prefix sent to Ollama stays byte-identical across turns.
+    """
+    _, mtime = load_cookbook()
+    return _render(system_prompt_template, tool_list_string, cwd or os.getcwd(), mtime)
+
+
+@functools.lru_cache(maxsize=8)
+def _static_template(system_prompt_template):
+    return system_prompt_template.replace(config.SPECIALIST_CONTEXT_BLOCK, "")
+
+
+def render_context_block(cwd=None):
+    username, os_name = system_info()
+    return config.SPECIALIST_CONTEXT_BLOCK.format(
+        cwd=cwd or os.getcwd(), username=username, os_name=os_name
+    ).strip()
+
+
+def build_system_messages(system_prompt_template, tool_list_string):
+    """
+    Returns the system message(s) that open every specialist request.
+
+    With PROMPT_LAYOUT=stable the rules/tools/cookbook prefix no longer contains
+    the working directory, so it never changes between turns; the volatile
+    context follows it as a separate message.
+    """
+    if config.PROMPT_LAYOUT == "stable" and config.SPECIALIST_CONTEXT_BLOCK in system_prompt_template:
+        _, mtime = load_cookbook()
+        static_prompt = _render(_static_template(system_prompt_template), tool_list_string, None, mtime)
+        return [
+            {"role": "system", "content": static_prompt},
+            {"role": "system", "content": render_context_block()},
+        ]
+
+    return [
+        {
+            "role": "system",
+            "content": render_specialist_prompt(system_prompt_template, tool_list_string),
+        }
+    ]
+
+
+def warm_prompt_cache(system_prompt_template=None):
+    """Precomputes the prompt for every category toolset."""
+    template = system_prompt_template or config.BASE_SPECIALIST_PROMPT
+    for category in CATEGORY_TOOLSETS:
+        build_system_messages(template, tool_list_for(tool_names_for_category(category)))
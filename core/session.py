@@ -1,5 +1,8 @@
+import asyncio
+import difflib
 import json
 import logging  # Import the logging module
+import sys
 
 from colorama import (  # Keep colorama for console if needed, but remove from logger calls
     Fore,
@@ -7,11 +10,23 @@ from colorama import (  # Keep colorama for console if needed, but remove from l
 )
 
 from . import config
-from .llm import call_ollama, clean_json_string
-from .router import classify_request
+from .history import compact_history
+from .json_repair import repair_json
+from .json_stream import IncrementalJSONParser
+from .llm import call_ollama, clean_json_string, reply_from_fields, stream_ollama
+from .cache import get_docs_cache, get_response_cache, get_router_cache
+from .ollama_client import OllamaClient
+from .prompts import (
+    response_schema_for,
+    tool_list_for,
+    tool_names_for_category,
+    warm_prompt_cache,
+)
+from .router import classify_request_async, route_locally
+from .telemetry import get_telemetry
 from .tools import (
     tool_consult_documentation,
-    tool_execute,
+    tool_execute_async,
     tool_launch_program,
     tool_list_dir,
     tool_open_path,
@@ -28,6 +43,38 @@ from .utils import process_mentions, scan_directory
 # Get the logger instance
 logger = logging.getLogger("seeker_cli")
 
+# Azioni il cui messaggio viene mostrato in tempo reale in modalita streaming
+LIVE_MESSAGE_ACTIONS = {"chat", "finish_task"}
+
+
+class _LivePrinter:
+    """Writes streamed thought/message text to the console as it arrives."""
+
+    LABELS = {
+        ("thought",): f"{Fore.BLUE}{Style.BRIGHT}Pensiero:{Style.NORMAL} ",
+        ("args", "message"): ">> ",
+    }
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.current = None
+        self.shown = set()
+
+    def write(self, path, text):
+        if path != self.current:
+            self.finish()
+            self.stream.write(self.LABELS[path])
+            self.current = path
+            self.shown.add(path)
+        self.stream.write(text)
+        self.stream.flush()
+
+    def finish(self):
+        if self.current is not None:
+            self.stream.write(f"{Style.RESET_ALL}\n")
+            self.stream.flush()
+            self.current = None
+
 
 
 class Session:
@@ -37,6 +84,91 @@ class Session:
         self.context_files = {}
         self.last_search_context = None
         self.pending_confirmation = None
+        # Client HTTP condiviso da router, specialista e future chiamate embedding
+        self.client = OllamaClient()
+        self._current_task = None
+        # Prompt specialista pre-renderizzato per ogni toolset
+        warm_prompt_cache()
+
+    def close(self):
+        self.client.close()
+
+    async def aclose(self):
+        self.cancel_current()
+        await self.client.aclose()
+
+    def cancel_current(self):
+        """Aborts the in-flight request, if any. Returns True if one was cancelled."""
+        task = self._current_task
+        if task is not None and not task.done():
+            task.cancel()
+            return True
+        return False
+
+    async def submit(self, user_input):
+        """
+        Runs process_input as a cancellable task.
+
+        A new submission aborts the previous in-flight one. Returns False if the
+        request was cancelled (Ctrl-C or a newer request), True otherwise.
+        """
+        self.cancel_current()
+        task = asyncio.ensure_future(self.process_input(user_input))
+        self._current_task = task
+        try:
+            # asyncio.wait non propaga la cancellazione: distinguiamo chi e stato annullato
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            if self._current_task is task:
+                self._current_task = None
+
+        if task.cancelled():
+            self.logger.warning("Richiesta annullata.")
+            return False
+        task.result()
+        return True
+
+    async def _route_speculatively(self, user_input):
+        """
+        Classifies the request while the work that may follow it is already running.
+
+        If the heuristic or the local classifier decides, nothing is speculated.
+        Otherwise the LLM router and the local docs search run concurrently
+        (the specialist prompts are already warmed in __init__); once the
+        category is known the docs search is dropped unless it is needed.
+        Returns (category, doc_results), doc_results being None unless the request
+        is a programming question.
+        """
+        category = route_locally(user_input)
+        if category:
+            return category, None
+
+        loop = asyncio.get_running_loop()
+        router_task = asyncio.ensure_future(classify_request_async(user_input, client=self.client))
+        docs_future = loop.run_in_executor(None, tool_consult_documentation, user_input)
+        # Il ramo scartato non deve lasciare eccezioni non recuperate
+        docs_future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        try:
+            category = await router_task
+        except asyncio.CancelledError:
+            router_task.cancel()
+            docs_future.cancel()
+            raise
+
+        if category != "programming_question":
+            # Il thread della ricerca non si puo interrompere: il risultato viene ignorato
+            docs_future.cancel()
+            self.logger.debug(f"Speculazione: ricerca documentazione scartata ({category}).")
+            return category, None
+
+        self.logger.info(
+            f"{Fore.CYAN}(Cerco nella documentazione locale...){Style.RESET_ALL}"
+        )
+        return category, await docs_future
 
     def _normalize_run_command(self, user_input, command):
         if not command:
@@ -52,17 +184,7 @@ class Session:
         return command
 
     def _get_tool_names_for_category(self, category):
-        category_toolsets = {
-            "programming_question": config.PROGRAMMING_TOOLS,
-            "system_command": config.SYSTEM_COMMAND_TOOLS,
-            "general_chat": config.GENERAL_CHAT_TOOLS,
-        }
-        selected_toolset = category_toolsets.get(category, config.GENERAL_CHAT_TOOLS)
-        return [
-            name
-            for name, definition in config.TOOL_DEFINITIONS.items()
-            if definition in selected_toolset
-        ]
+        return list(tool_names_for_category(category))
 
     def handle_local_command(self, cmd):
         parts = cmd.split()
@@ -89,38 +211,178 @@ class Session:
             )
             self.logger.info("2. /init : Scansiona la cartella corrente")
             self.logger.info("3. /clear : Pulisce la memoria")
-            self.logger.info("4. /quit : Esci")
+            self.logger.info("4. /stats : Statistiche delle chiamate LLM")
+            self.logger.info("5. /quit : Esci")
+            return None
+
+        elif command == "/stats":
+            self.logger.info("=== STATISTICHE LLM ===")
+            for line in get_telemetry().format_summary():
+                self.logger.info(line)
+            caches = (
+                ("cache risposte", get_response_cache()),
+                ("cache router", get_router_cache()),
+                ("cache documentazione", get_docs_cache()),
+            )
+            for label, cache in caches:
+                if cache:
+                    stats = cache.stats()
+                    self.logger.info(
+                        f"{label}: {stats['hits']} hit / {stats['misses']} miss "
+                        f"({stats['hit_rate']:.0%})"
+                    )
             return None
 
         return None
 
-    async def _execute_specialist_loop(self, user_input, tool_names):
+    async def _stream_specialist_response(
+        self, tool_list_string, category=None, iteration=None, response_format=None
+    ):
         """
-        The main reasoning loop, now using a specialist prompt and a limited toolset.
+        Streams the specialist reply, showing thought and chat messages live.
+
+        Returns (raw_response, shown) as soon as `action` and `args` are complete,
+        closing the stream so the trailing tokens are never generated. If the
+        reply is not valid JSON the whole text is returned, for _parse_response
+        to repair.
+        """
+        parser = IncrementalJSONParser()
+        malformed = False
+        printer = _LivePrinter()
+        chunks = []
+        stream = stream_ollama(
+            self.history,
+            config.BASE_SPECIALIST_PROMPT,
+            tool_list_string,
+            client=self.client,
+            category=category,
+            iteration=iteration,
+            response_format=response_format,
+        )
+        try:
+            async for piece in stream:
+                chunks.append(piece)
+                if malformed:
+                    continue
+                try:
+                    events = parser.feed(piece)
+                except ValueError as e:
+                    # JSON rotto (virgola finale, True, apici singoli): si raccoglie il resto per la riparazione
+                    self.logger.debug(f"Streaming: JSON non valido, passo alla riparazione ({e}).")
+                    malformed = True
+                    continue
+                for event in events:
+                    if event[0] != "delta":
+                        continue
+                    path = event[1]
+                    if path == ("thought",) or (
+                        path == ("args", "message")
+                        and parser.fields.get("action") in LIVE_MESSAGE_ACTIONS
+                    ):
+                        printer.write(path, event[2])
+                if "action" in parser.fields and "args" in parser.fields:
+                    break
+        finally:
+            await stream.aclose()
+            printer.finish()
+
+        reply = None if malformed else reply_from_fields(parser.fields)
+        if reply is not None:
+            return reply, printer.shown
+        return "".join(chunks), printer.shown
+
+    def _parse_response(self, raw_response):
         """
-        # Dynamically build the tool list string for the prompt
-        tool_definitions = [
-            config.TOOL_DEFINITIONS[name]
-            for name in tool_names
-            if name in config.TOOL_DEFINITIONS
-        ]
-        tool_list_string = "\n".join(tool_definitions)
+        Parses the model reply, repairing common JSON breakage locally.
 
-        # The first message in history is always the user's input for call_ollama to process
-        self.history = [{"role": "user", "content": user_input}]
+        Returns (data, repaired); data is None when a re-ask is unavoidable.
+        """
+        try:
+            data = json.loads(clean_json_string(raw_response))
+            if isinstance(data, dict):
+                return data, False
+        except json.JSONDecodeError:
+            pass
+        data = repair_json(raw_response)
+        return data, data is not None
+
+    def _match_action(self, action, tool_names):
+        # Azione quasi corretta ("launch program", "Chat"): correggibile senza round-trip
+        if not isinstance(action, str):
+            return None
+        normalized = action.strip().lower().replace(" ", "_").replace("-", "_")
+        if normalized in tool_names:
+            return normalized
+        matches = difflib.get_close_matches(normalized, tool_names, n=1, cutoff=0.85)
+        return matches[0] if matches else None
+
+    async def _execute_specialist_loop(self, user_input, tool_names, category=None):
+        """
+        The main reasoning loop, now using a specialist prompt and a limited toolset.
+        """
+        # Tool list string for the prompt, cached per toolset
+        tool_list_string = tool_list_for(tuple(tool_names))
+        # JSON schema per toolset: Ollama vincola la decodifica ad azioni e argomenti validi
+        response_format = (
+            response_schema_for(tuple(tool_names)) if config.STRUCTURED_OUTPUT else None
+        )
+        telemetry = get_telemetry()
+        format_retries = 0
+        loop = asyncio.get_running_loop()
+
+        task_message = {"role": "user", "content": user_input}
+        if config.PROMPT_LAYOUT == "stable":
+            # Layout stabile: la history cresce in coda, cosi il prefisso resta in KV-cache
+            self.history.append(task_message)
+        else:
+            # The first message in history is always the user's input for call_ollama to process
+            self.history = [task_message]
 
         self.logger.info(f"({config.MODEL_NAME} sta pensando...)")
 
+        iteration = 0
         while True:
-            # Pass the base prompt and the dynamic tool list to the LLM call
-            raw_response = await call_ollama(
-                self.history, config.BASE_SPECIALIST_PROMPT, tool_list_string
+            iteration += 1
+            # Resta sotto il budget di contesto: i risultati vecchi diventano stub
+            self.history, _ = compact_history(
+                self.history,
+                config.HISTORY_TOKEN_BUDGET,
+                keep_recent=config.HISTORY_KEEP_RECENT,
+                pinned=task_message,
             )
+            # Pass the base prompt and the dynamic tool list to the LLM call
+            shown = set()
+            if config.STREAM_RESPONSES:
+                raw_response, shown = await self._stream_specialist_response(
+                    tool_list_string,
+                    category=category,
+                    iteration=iteration,
+                    response_format=response_format,
+                )
+            else:
+                raw_response = await call_ollama(
+                    self.history,
+                    config.BASE_SPECIALIST_PROMPT,
+                    tool_list_string,
+                    client=self.client,
+                    category=category,
+                    iteration=iteration,
+                    response_format=response_format,
+                )
 
-            try:
-                cleaned = clean_json_string(raw_response)
-                data = json.loads(cleaned)
-            except json.JSONDecodeError:
+            data, repaired = self._parse_response(raw_response)
+            if repaired:
+                self.logger.debug(f"JSON riparato localmente. Raw response: {raw_response}")
+                telemetry.increment("round-trip evitati (JSON riparato)")
+                raw_response = json.dumps(data, ensure_ascii=False)
+            if data is None:
+                format_retries += 1
+                if format_retries > config.MAX_FORMAT_RETRIES:
+                    self.logger.error(
+                        f"Risposta non valida dopo {config.MAX_FORMAT_RETRIES} tentativi di correzione. Interrompo."
+                    )
+                    break
+                telemetry.increment("richieste di correzione")
                 self.logger.error(
                     f"Errore formato JSON. Ritento auto-correzione... Raw response: {raw_response}"
                 )
@@ -138,13 +400,24 @@ class Session:
             thought = data.get("thought", "")
 
             if thought:
-                self.logger.info(
+                # Se gia mostrato in streaming, va solo nel log su file
+                log_thought = self.logger.debug if ("thought",) in shown else self.logger.info
+                log_thought(
                     f"{Fore.BLUE}{Style.BRIGHT}Pensiero:{Style.NORMAL} {thought}"
                 )
 
             tool_output = ""
             error_msg = None
 
+            if action not in tool_names:
+                matched = self._match_action(action, tool_names)
+                if matched:
+                    self.logger.debug(f"Azione '{action}' corretta localmente in '{matched}'.")
+                    telemetry.increment("round-trip evitati (azione corretta)")
+                    action = matched
+                    data["action"] = matched
+                    raw_response = json.dumps(data, ensure_ascii=False)
+
             if action not in tool_names:
                 error_msg = f"Azione non valida o mancante: '{action}'. Devi usare una delle azioni disponibili per questo ruolo: {', '.join(tool_names)}"
                 self.logger.warning(
@@ -152,19 +425,22 @@ class Session:
                 )
             else:
                 # --- Dispatching Logic ---
+                log_message = (
+                    self.logger.debug if ("args", "message") in shown else self.logger.info
+                )
                 if action == "chat":
-                    self.logger.info(f">> {args.get('message')}")
+                    log_message(f">> {args.get('message')}")
                     self.history.append({"role": "assistant", "content": raw_response})
                     break
                 elif action == "finish_task":
                     final_message = args.get("message") or "Task completed successfully."
-                    self.logger.info(f">> {final_message}")
+                    log_message(f">> {final_message}")
                     self.history.append({"role": "assistant", "content": raw_response})
                     break
                 # Only call tools that are available to the current specialist
                 elif action == "run_shell_command":
                     command = self._normalize_run_command(user_input, args.get("command"))
-                    tool_output = tool_execute(command)
+                    tool_output = await tool_execute_async(command)
                 elif action == "read_file":
                     tool_output = tool_read(args.get("file_path"))
                 elif action == "write_file":
@@ -172,7 +448,10 @@ class Session:
                 elif action == "open_path":
                     tool_output = tool_open_path(args.get("path"))
                 elif action == "open_file":
-                    tool_output = tool_open_file(
+                    # Puo attendere la prima scansione dell'indice dei programmi: fuori dall'event loop
+                    tool_output = await loop.run_in_executor(
+                        None,
+                        tool_open_file,
                         args.get("file_name"),
                         args.get("location"),
                         args.get("program_name"),
@@ -182,7 +461,10 @@ class Session:
                         "query": args.get("query"),
                         "location": args.get("location"),
                     }
-                    tool_output = tool_search_files(
+                    # L'indice dei file puo essere in costruzione (fino a FILE_INDEX_WAIT_SECONDS): fuori dall'event loop
+                    tool_output = await loop.run_in_executor(
+                        None,
+                        tool_search_files,
                         args.get("query"),
                         args.get("location"),
                         args.get("extensions"),
@@ -204,7 +486,9 @@ class Session:
                         args.get("query"), args.get("location")
                     )
                 elif action == "launch_program":
-                    tool_output = tool_launch_program(args.get("program_name"))
+                    tool_output = await loop.run_in_executor(
+                        None, tool_launch_program, args.get("program_name")
+                    )
                 elif action == "set_windows_theme":
                     tool_output = tool_set_windows_theme(args.get("mode"))
                 elif action == "list_directory":
@@ -217,6 +501,13 @@ class Session:
                     tool_output = tool_consult_documentation(args.get("query"))
 
             if error_msg:
+                format_retries += 1
+                if format_retries > config.MAX_FORMAT_RETRIES:
+                    self.logger.error(
+                        f"[ERRORE]: {error_msg} Troppi tentativi di correzione, interrompo."
+                    )
+                    break
+                telemetry.increment("richieste di correzione")
                 self.logger.error(f"[ERRORE]: {error_msg} Ritento...")
                 self.history.append({"role": "assistant", "content": raw_response})
                 self.history.append(
@@ -228,6 +519,7 @@ class Session:
                 continue
 
             # Feedback Loop
+            format_retries = 0
             self.history.append({"role": "assistant", "content": raw_response})
             self.logger.info(
                 f"{Fore.MAGENTA}[SYSTEM]: Risultato azione '{action}': {str(tool_output)[:300]}..."
@@ -278,16 +570,21 @@ class Session:
                 )
                 processed_input = augmented
 
-        category = classify_request(processed_input)
+        doc_results = None
+        if config.SPECULATIVE_ROUTING:
+            category, doc_results = await self._route_speculatively(processed_input)
+        else:
+            category = await classify_request_async(processed_input, client=self.client)
         self.logger.info(
             f"{Fore.YELLOW}Richiesta classificata come: {category}{Style.RESET_ALL}"
         )
 
         if category == "programming_question":
-            self.logger.info(
-                f"{Fore.CYAN}(Cerco nella documentazione locale...){Style.RESET_ALL}"
-            )
-            doc_results = tool_consult_documentation(processed_input)
+            if doc_results is None:
+                self.logger.info(
+                    f"{Fore.CYAN}(Cerco nella documentazione locale...){Style.RESET_ALL}"
+                )
+                doc_results = tool_consult_documentation(processed_input)
 
             augmented_input = f"""L'utente ha chiesto: '{processed_input}'
 
@@ -298,12 +595,12 @@ class Session:
 Analizza i risultati della documentazione qui sopra. Se contengono informazioni pertinenti, anche se non è un esempio perfetto, **usa la tua conoscenza per sintetizzare la risposta corretta e forniscila all'utente usando il tool 'chat' o 'finish_task'**. Non usare `consult_documentation` di nuovo se hai già trovato informazioni pertinenti. Usa altri tool (come `google_web_search`) solo se la documentazione è completamente irrilevante.
 """
             tool_names = self._get_tool_names_for_category(category)
-            await self._execute_specialist_loop(augmented_input, tool_names)
+            await self._execute_specialist_loop(augmented_input, tool_names, category)
 
         elif category == "system_command":
             tool_names = self._get_tool_names_for_category(category)
-            await self._execute_specialist_loop(processed_input, tool_names)
+            await self._execute_specialist_loop(processed_input, tool_names, category)
 
         else:  # general_chat
             tool_names = self._get_tool_names_for_category(category)
-            await self._execute_specialist_loop(processed_input, tool_names)
+            await self._execute_specialist_loop(processed_input, tool_names, category)
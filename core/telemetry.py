@@ -0,0 +1,121 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from . import config
+
+# Get the logger instance
+logger = logging.getLogger("seeker_cli")
+
+# Campi di timing restituiti da Ollama (durate in nanosecondi)
+OLLAMA_TIMING_FIELDS = (
+    "total_duration",
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class LLMTelemetry:
+    """
+    Collects per-call Ollama timings tagged with role, category and loop iteration.
+
+    Records are kept in memory (bounded) for /stats and, when a metrics file is
+    configured, appended to it as JSON lines.
+    """
+
+    def __init__(self, metrics_file=None, max_records=1000):
+        self.metrics_file = metrics_file or None
+        self.records = deque(maxlen=max_records)
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, role, data, category=None, iteration=None, **extra):
+        record = {
+            "ts": time.time(),
+            "role": role,
+            "category": category,
+            "iteration": iteration,
+            "model": data.get("model"),
+        }
+        for field in OLLAMA_TIMING_FIELDS:
+            record[field] = data.get(field)
+        record.update(extra)
+
+        with self._lock:
+            self.records.append(record)
+            if self.metrics_file:
+                try:
+                    with open(self.metrics_file, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    logger.debug(f"Impossibile scrivere le metriche: {e}")
+        return record
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        """Aggregates per role: calls, tokens/s, p50/p95 latency and load-time share."""
+        by_role = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            by_role.setdefault(record["role"], []).append(record)
+
+        result = {}
+        for role, items in by_role.items():
+            latencies = [r["total_duration"] / 1e6 for r in items if r.get("total_duration")]
+            eval_tokens = sum(r.get("eval_count") or 0 for r in items)
+            eval_ns = sum(r.get("eval_duration") or 0 for r in items)
+            prompt_tokens = sum(r.get("prompt_eval_count") or 0 for r in items)
+            prompt_ns = sum(r.get("prompt_eval_duration") or 0 for r in items)
+            total_ns = sum(r.get("total_duration") or 0 for r in items)
+            load_ns = sum(r.get("load_duration") or 0 for r in items)
+            result[role] = {
+                "calls": len(items),
+                "tokens_per_s": eval_tokens / (eval_ns / 1e9) if eval_ns else 0.0,
+                "prompt_tokens_per_s": prompt_tokens / (prompt_ns / 1e9) if prompt_ns else 0.0,
+                "p50_ms": percentile(latencies, 0.5),
+                "p95_ms": percentile(latencies, 0.95),
+                "load_share": load_ns / total_ns if total_ns else 0.0,
+            }
+        return result
+
+    def format_summary(self):
+        summary = self.summary()
+        lines = [] if summary else ["Nessuna chiamata LLM registrata."]
+        for role, stats in sorted(summary.items()):
+            lines.append(
+                f"{role}: {stats['calls']} chiamate, {stats['tokens_per_s']:.1f} tok/s "
+                f"(prompt {stats['prompt_tokens_per_s']:.1f} tok/s), "
+                f"p50 {stats['p50_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms, "
+                f"load {stats['load_share']:.0%}"
+            )
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}: {value}")
+        return lines
+
+
+_telemetry = None
+
+
+def get_telemetry():
+    """Process-wide telemetry collector shared by router and specialist calls."""
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = LLMTelemetry(metrics_file=config.METRICS_FILE)
+    return _telemetry
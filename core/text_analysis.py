@@ -0,0 +1,116 @@
+"""
+Text analysis shared by the documentation index and its queries.
+
+Words are lowercased and folded to ASCII ("perché" -> "perche"), Italian
+and English stopwords are dropped and the rest is reduced with a light
+suffix-stripping stemmer that works for both languages, so "decoratori",
+"decoratore" and "decorators" share the stem "decorator". Character
+trigrams of the stems feed the fuzzy lookup used for typos.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+ITALIAN_STOPWORDS = {
+    'a', 'ad', 'al', 'alla', 'allo', 'anche', 'ancora', 'che', 'chi', 'ci', 'cioè', 'ciò', 'come', 'con', 'contro',
+    'da', 'dal', 'dalla', 'dallo', 'dei', 'del', 'della', 'dello', 'dentro', 'di', 'doppo', 'e', 'ecco', 'egli',
+    'ella', 'entrambi', 'entrambe', 'essi', 'esse', 'fa', 'fai', 'fanno', 'fare', 'ha', 'hai', 'hanno',
+    'ho', 'i', 'il', 'in', 'indietro', 'invece', 'io', 'la', 'le', 'lei', 'lo', 'loro', 'lui', 'ma', 'me', 'medesimo',
+    'medesima', 'mentre', 'mio', 'mia', 'miei', 'mie', 'modo', 'molto', 'molti', 'molte', 'ne', 'negli', 'nei',
+    'nel', 'nella', 'nelle', 'nello', 'no', 'non', 'nostro', 'nostra', 'nostri', 'nostre', 'o', 'ogni', 'oltre',
+    'onde', 'ora', 'oppure', 'per', 'perchè', 'perciò', 'perfino', 'persino', 'più', 'pochi', 'poche', 'poi',
+    'proprio', 'quale', 'quali', 'quanto', 'quanti', 'quanta', 'quante', 'quel', 'quello', 'quella', 'quelli',
+    'quelle', 'questo', 'questa', 'questi', 'queste', 'qui', 'quindi', 'restando', 'se', 'sempre', 'senza',
+    'si', 'siamo', 'siete', 'sono', 'sopra', 'sotto', 'sta', 'stai', 'stando', 'stanno', 'starai', 'sarà',
+    'stato', 'stata', 'stati', 'state', 'stessa', 'stesse', 'stesso', 'stessi', 'su', 'suo', 'sua', 'suoi',
+    'sue', 'tale', 'tali', 'tanto', 'tanti', 'tanta', 'tante', 'ti', 'tra', 'tu', 'tua', 'tuo', 'tuoi', 'tue',
+    'tuttavia', 'tutto', 'tutta', 'tutti', 'tutte', 'un', 'una', 'uno', 'verso', 'voi', 'vostri', 'vostre',
+    'vostro', 'vostra', 'è'
+}
+
+# Senza parole chiave dei linguaggi ("if", "for", "while", "not", "import"...): sono domande frequenti
+ENGLISH_STOPWORDS = {
+    'a', 'about', 'after', 'all', 'am', 'an', 'any', 'are', 'at', 'be', 'been', 'before', 'being', 'but', 'by',
+    'can', 'could', 'did', 'do', 'does', 'doing', 'each', 'get', 'had', 'has', 'have', 'having', 'he', 'her',
+    'here', 'his', 'how', 'i', 'into', 'it', 'its', 'me', 'more', 'most', 'my', 'of', 'on', 'only', 'other',
+    'our', 'out', 'over', 'own', 'same', 'she', 'should', 'so', 'some', 'such', 'than', 'that', 'the', 'their',
+    'them', 'then', 'there', 'these', 'they', 'this', 'those', 'through', 'to', 'too', 'under', 'up', 'use',
+    'using', 'very', 'was', 'we', 'were', 'what', 'when', 'where', 'which', 'who', 'why', 'will', 'would',
+    'you', 'your',
+}
+
+
+def fold(text):
+    """Lowercase and strip diacritics."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+STOPWORDS = frozenset(fold(word) for word in ITALIAN_STOPWORDS | ENGLISH_STOPWORDS)
+
+# Suffissi italiani derivativi, dal piu lungo; la vocale finale (genere/numero) si toglie dopo
+_ITALIAN_SUFFIXES = ("amente", "mente", "azioni", "azione")
+_VOWELS = set("aeiou")
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    """
+    Light Italian/English stemmer on a folded word.
+
+    English inflections go first (-ies, -sses, -s, -ing, -ed), then Italian
+    derivational suffixes and the final gender/number vowel. Words of up to
+    three characters are left alone.
+    """
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    elif word.endswith("ing") and len(word) >= 7:
+        word = word[:-3]
+    elif word.endswith("ed") and len(word) >= 6:
+        word = word[:-2]
+
+    for suffix in _ITALIAN_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            word = word[:-len(suffix)]
+            break
+    if word.endswith(("che", "chi", "ghe", "ghi")) and len(word) > 4:
+        # amiche/amici, luoghi/luogo: la "h" serve solo davanti a e/i
+        word = word[:-2]
+    elif word[-1] in _VOWELS and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Folded word tokens without stopwords and single characters."""
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall(fold(text))
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def analyze(text):
+    """The index terms of text: tokenize() then stem()."""
+    return [stem(token) for token in tokenize(text)]
+
+
+def trigrams(term):
+    """Character trigrams of a term, padded so that short terms and word edges count."""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(left, right):
+    """Dice coefficient of two trigram sets."""
+    if not left or not right:
+        return 0.0
+    return 2 * len(left & right) / (len(left) + len(right))
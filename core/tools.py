@@ -1,35 +1,30 @@
 import os
 import subprocess
+import sys
+import time
 import difflib
 import re
 import requests
 import logging
-import string
 from colorama import Fore, Style
 from googlesearch import search
 from .security import ask_permission
 import shutil
-import winreg
 from . import config # Import config to get custom paths
+from .docs_index import format_passages, get_docs_index, pack_passages
+from .exe_index import get_exe_index
+from .file_index import get_file_index
+from .process_runner import BoundedOutput, CommandResult, format_result, run_command
+from .text_analysis import tokenize
+
+try:
+    import winreg
+except ImportError:
+    # Fuori da Windows (test): nessuna ricerca nel registro App Paths
+    winreg = None
 
 logger = logging.getLogger('seeker_cli')
 
-ITALIAN_STOPWORDS = {
-    'a', 'ad', 'al', 'alla', 'allo', 'anche', 'ancora', 'che', 'chi', 'ci', 'cioè', 'ciò', 'come', 'con', 'contro',
-    'da', 'dal', 'dalla', 'dallo', 'dei', 'del', 'della', 'dello', 'dentro', 'di', 'doppo', 'e', 'ecco', 'egli',
-    'ella', 'entrambi', 'entrambe', 'essi', 'esse', 'fa', 'fai', 'fanno', 'fare', 'ha', 'hai', 'hanno',
-    'ho', 'i', 'il', 'in', 'indietro', 'invece', 'io', 'la', 'le', 'lei', 'lo', 'loro', 'lui', 'ma', 'me', 'medesimo',
-    'medesima', 'mentre', 'mio', 'mia', 'miei', 'mie', 'modo', 'molto', 'molti', 'molte', 'ne', 'negli', 'nei',
-    'nel', 'nella', 'nelle', 'nello', 'no', 'non', 'nostro', 'nostra', 'nostri', 'nostre', 'o', 'ogni', 'oltre',
-    'onde', 'ora', 'oppure', 'per', 'perchè', 'perciò', 'perfino', 'persino', 'più', 'pochi', 'poche', 'poi',
-    'proprio', 'quale', 'quali', 'quanto', 'quanti', 'quanta', 'quante', 'quel', 'quello', 'quella', 'quelli',
-    'quelle', 'questo', 'questa', 'questi', 'queste', 'qui', 'quindi', 'restando', 'se', 'sempre', 'senza',
-    'si', 'siamo', 'siete', 'sono', 'sopra', 'sotto', 'sta', 'stai', 'stando', 'stanno', 'starai', 'sarà',
-    'stato', 'stata', 'stati', 'state', 'stessa', 'stesse', 'stesso', 'stessi', 'su', 'suo', 'sua', 'suoi',
-    'sue', 'tale', 'tali', 'tanto', 'tanti', 'tanta', 'tante', 'ti', 'tra', 'tu', 'tua', 'tuo', 'tuoi', 'tue',
-    'tuttavia', 'tutto', 'tutta', 'tutti', 'tutte', 'un', 'una', 'uno', 'verso', 'voi', 'vostri', 'vostre',
-    'vostro', 'vostra', 'è'
-}
 
 def _find_executable(executable_name):
     logger.debug(f"Searching for executable: {executable_name}")
@@ -42,6 +37,8 @@ def _find_executable(executable_name):
 
     # 2. Check Registry (App Paths)
     try:
+        if winreg is None:
+            raise OSError("winreg non disponibile")
         for hkey in [winreg.HKEY_LOCAL_MACHINE, winreg.HKEY_CURRENT_USER]:
             with winreg.OpenKey(hkey, f"SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\App Paths\\{executable_name}") as key:
                 app_path, _ = winreg.QueryValueEx(key, "")
@@ -51,41 +48,22 @@ def _find_executable(executable_name):
     except Exception:
         pass
 
-    # 3. Enhanced Brute-force search in common and custom locations
-    logger.debug("Executable not in PATH or App Paths. Starting enhanced brute-force search...")
-    
-    # Get all drives
-    drives = [f"{d}:\\" for d in string.ascii_uppercase if os.path.exists(f"{d}:\\")]
-    
-    search_dirs = []
-    # Add common folders for all drives
-    for drive in drives:
-        search_dirs.append(os.path.join(drive, "Program Files"))
-        search_dirs.append(os.path.join(drive, "Program Files (x86)"))
-
-    # Add user-specific folders
-    search_dirs.append(os.path.join(os.path.expanduser('~'), 'AppData', 'Local'))
-    search_dirs.append(os.path.join(os.path.expanduser('~'), 'AppData', 'Roaming'))
-    search_dirs.append(os.path.join(os.path.expanduser('~'), 'Desktop'))
-    
-    # Add custom paths from config
-    if hasattr(config, 'CUSTOM_PROGRAM_PATHS'):
-        search_dirs.extend(config.CUSTOM_PROGRAM_PATHS)
-
-    for start_dir in set(search_dirs): # Use set to avoid duplicate searches
-        if not os.path.isdir(start_dir):
-            continue
-        logger.debug(f"Searching in {start_dir}...")
-        for root, dirs, files in os.walk(start_dir, topdown=True):
-            # Prune search in common deep/irrelevant/permission-denied folders
-            dirs[:] = [d for d in dirs if d.lower() not in [
-                'node_modules', 'temp', 'cache', 'windowsapps', '$recycle.bin', 'system volume information'
-            ]]
-            
-            if executable_name.lower() in (f.lower() for f in files):
-                path = os.path.join(root, executable_name)
-                logger.debug(f"Found via brute-force search: {path}")
-                return path
+    # 3. Persistent executable index (background scan of the program folders)
+    index = get_exe_index()
+    path = index.lookup(executable_name)
+    if path is None and not index.built_at:
+        # Indice mai costruito (primo avvio): si attende la prima scansione
+        logger.debug("Executable index not built yet, waiting for the first scan...")
+        index.refresh_in_background()
+        index.wait(config.EXE_INDEX_WAIT_SECONDS)
+        path = index.lookup(executable_name)
+    elif path is None:
+        # Forse installato dopo l'ultima scansione: refresh incrementale in background, senza attendere
+        logger.debug("Executable not indexed, refreshing the index in background.")
+        index.refresh_in_background()
+    if path:
+        logger.debug(f"Found in executable index: {path}")
+        return path
 
     logger.warning(f"Executable '{executable_name}' not found after all search methods.")
     return None
@@ -207,6 +185,12 @@ def tool_launch_program(program_name):
     path = _find_executable(program_name)
     if path:
         return _open_path(path)
+    suggestions = get_exe_index().suggest(program_name) if program_name else []
+    if suggestions:
+        return (
+            f"ERRORE: Programma '{program_name}' non trovato. Impossibile avviare. "
+            f"Forse intendevi: {', '.join(suggestions)}?"
+        )
     return f"ERRORE: Programma '{program_name}' non trovato. Impossibile avviare."
 
 
@@ -287,7 +271,8 @@ def tool_search_files(
         tokens = [normalized.strip()]
 
     everything_path = _get_everything_es_path()
-    if not everything_path:
+    builtin = uses_builtin_file_index(everything_path)
+    if not everything_path and not builtin:
         return "ERRORE: Everything CLI non trovato. Configura EVERYTHING_ES_PATH."
 
     location_paths = _resolve_search_locations(location)
@@ -309,6 +294,17 @@ def tool_search_files(
     elif isinstance(extensions, list):
         ext_list = [str(e).strip().lstrip(".") for e in extensions if str(e).strip()]
 
+    if builtin:
+        return _search_file_index(
+            variants,
+            search_expr if use_regex else None,
+            ext_list,
+            kind,
+            location_paths,
+            sort,
+            max_results,
+        )
+
     if ext_list:
         ext_filter = ";".join(ext_list)
         search_expr = f"({search_expr}) ext:{ext_filter}"
@@ -366,6 +362,33 @@ def tool_search_files(
     )
 
 
+def uses_builtin_file_index(everything_path=None):
+    """True when search_files uses the built-in filename index instead of Everything."""
+    backend = config.FILE_SEARCH_BACKEND
+    if backend == "builtin":
+        return True
+    if backend == "everything":
+        return False
+    return not (everything_path or _get_everything_es_path())
+
+
+def _search_file_index(variants, regex, extensions, kind, locations, sort, max_results):
+    index = get_file_index()
+    try:
+        results = index.search(variants, regex, extensions, kind, locations, sort, max_results)
+        if not results and index.refreshing:
+            # Primo avvio o indice scaduto: si attende la scansione in corso prima di arrendersi
+            index.wait(config.FILE_INDEX_WAIT_SECONDS)
+            results = index.search(variants, regex, extensions, kind, locations, sort, max_results)
+    except re.error as e:
+        return f"ERRORE: Espressione regolare non valida: {e}"
+    if results:
+        return "\n".join(results)
+    if index.refreshing:
+        return "Nessuna corrispondenza nell'indice dei file (scansione ancora in corso, riprova tra poco)."
+    return "Nessuna corrispondenza nell'indice dei file."
+
+
 def tool_open_everything_interactive(query, location=None):
     if not query:
         return "ERRORE: Query non valida."
@@ -410,29 +433,69 @@ def show_diff(filepath, new_content):
     for line in diff:
         logger.info(line.strip())
 
-def tool_execute(command):
+def _shell_command(command):
     # Check if the command seems to be a PowerShell command
     is_powershell_command = any(cmdlet in command for cmdlet in ['Get-ItemProperty', 'Set-ItemProperty', 'Get-StartApps'])
 
     if is_powershell_command:
         # Execute the command using PowerShell
-        full_command = f'powershell.exe -NoProfile -Command "{command}"'
-    else:
-        # Use standard cmd.exe for other commands
-        full_command = command
+        return f'powershell.exe -NoProfile -Command "{command}"'
+    # Use standard cmd.exe for other commands
+    return command
+
+
+def tool_execute(command):
+    """Blocking variant, for the tools that run short commands (theme, launch_program)."""
+    full_command = _shell_command(command)
 
     # Permission is still asked on the original, readable command
     if ask_permission("eseguire comando", command, is_dangerous=True):
         try:
-            res = subprocess.run(full_command, shell=True, capture_output=True, text=True, timeout=60)
-            out = res.stdout + res.stderr
-            return f"Exit Code: {res.returncode}\nOut: {out or '(Nessun output)'}"
+            started = time.perf_counter()
+            res = subprocess.run(full_command, shell=True, capture_output=True, timeout=config.COMMAND_TIMEOUT or None)
+            buffer = BoundedOutput()
+            buffer.write(res.stdout + res.stderr)
+            return format_result(CommandResult(
+                exit_code=res.returncode,
+                output=buffer.text(),
+                duration=time.perf_counter() - started,
+                total_bytes=buffer.total,
+                dropped_bytes=buffer.dropped,
+                timed_out=False,
+            ))
         except Exception as e:
             logger.error(f"Errore esecuzione: {e}")
             return f"Errore esecuzione: {e}"
     return "Utente ha negato l azione."
 
 
+def _print_output(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+async def tool_execute_async(command, timeout=None):
+    """
+    run_shell_command: runs the command without blocking the event loop,
+    streaming its output to the console; the model gets exit code,
+    duration and the head/tail of the output.
+    """
+    full_command = _shell_command(command)
+
+    if ask_permission("eseguire comando", command, is_dangerous=True):
+        on_output = _print_output if config.COMMAND_STREAM_OUTPUT else None
+        try:
+            result = await run_command(full_command, timeout=timeout, on_output=on_output)
+        except OSError as e:
+            logger.error(f"Errore esecuzione: {e}")
+            return f"Errore esecuzione: {e}"
+        if on_output is not None and result.total_bytes:
+            # L'output in streaming puo non terminare con un a capo
+            _print_output(Style.RESET_ALL + "\n")
+        return format_result(result)
+    return "Utente ha negato l azione."
+
+
 def tool_set_windows_theme(mode):
     if not mode:
         return "ERRORE: Modalita tema non valida."
@@ -479,39 +542,22 @@ def tool_list_dir(path, recursive=False):
 
 def tool_consult_documentation(query):
     logger.debug(f"Consulting documentation with query: '{query}'")
-    translator = str.maketrans('', '', string.punctuation)
-    raw_tokens = query.lower().split()
-    keywords = {token.translate(translator) for token in raw_tokens if token.translate(translator) and token.translate(translator) not in ITALIAN_STOPWORDS}
-    
+    keywords = set(tokenize(query or ""))
+
     logger.debug(f"Filtered keywords for search: '{keywords}'")
 
     if not keywords:
         return "Nessuna corrispondenza trovata (query vuota o solo stopwords)."
 
-    path = "language_docs"
-    scored_lines = []
     try:
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                filepath = os.path.join(root, file)
-                try:
-                    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                        for i, line in enumerate(f):
-                            line_lower = line.lower()
-                            score = sum(1 for keyword in keywords if keyword in line_lower)
-                            if score > 0:
-                                scored_lines.append((score, i, f"{filepath}:{i+1}: {line.strip()[:150]}"))
-                except Exception as e:
-                    logger.debug(f"Could not read or process file {filepath}: {e}")
+        results = get_docs_index().search(query, limit=20)
     except Exception as e:
         logger.error(f"Errore durante la consultazione della documentazione: {e}")
         return f"Errore durante la consultazione della documentazione: {e}"
-    
-    if not scored_lines:
+
+    if not results:
         return "Nessuna corrispondenza trovata nella documentazione."
 
-    scored_lines.sort(key=lambda x: (-x[0], x[1]))
-    
-    top_results = [line for score, num, line in scored_lines[:15]]
-    
-    return "\n".join(top_results)
+    # Passaggi interi, i piu pertinenti per primi, entro il budget di token
+    passages = pack_passages([passage for _, passage in results], config.DOCS_CONTEXT_TOKENS)
+    return format_passages(passages)
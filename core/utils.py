@@ -2,6 +2,12 @@ import os
 import re
 from colorama import Fore, Style
 
+def estimate_tokens(text):
+    # Stima grezza ma stabile: ~4 caratteri per token per i modelli Llama/Gemma
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
 def scan_directory():
     files_list = []
     for root, dirs, files in os.walk("."):
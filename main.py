@@ -2,13 +2,18 @@ import sys
 import os
 import asyncio
 import logging
+import signal
 from colorama import Fore, Style, init as colorama_init
 
 # Aggiungi la directory corrente al path per importare i moduli
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import core.config
+from core.exe_index import get_exe_index
+from core.file_index import get_file_index
+from core.llm import warmup_models
 from core.session import Session
+from core.tools import uses_builtin_file_index
 
 try:
     from prompt_toolkit import PromptSession
@@ -61,14 +66,47 @@ async def main():
     logger.info("=== SEEKER CLI ===")
     logger.info("Digita '/help' per i comandi o inizia a chattare.")
     
-    if HAS_TOOLKIT:
-        prompt_session = PromptSession(completer=PathCompleter())
-    
     app_session = Session(logger)
 
+    # Warm-up in background: il prompt e subito disponibile
+    warmup_task = None
+    if core.config.WARMUP_MODELS:
+        warmup_task = asyncio.create_task(warmup_models(app_session.client))
+    if core.config.EXE_INDEX_PREBUILD:
+        # Scansione incrementale degli eseguibili in un thread daemon
+        get_exe_index()
+    if core.config.FILE_INDEX_PREBUILD and uses_builtin_file_index():
+        # Senza Everything, search_files usa l'indice interno dei nomi file
+        get_file_index()
+
+    prompt_session = PromptSession(completer=PathCompleter()) if HAS_TOOLKIT else None
+
+    try:
+        await _repl(app_session, prompt_session)
+    finally:
+        if warmup_task is not None and not warmup_task.done():
+            warmup_task.cancel()
+        await app_session.aclose()
+
+
+async def _run_request(app_session, user_input):
+    # Ctrl-C durante una richiesta annulla solo la generazione in corso, non l'event loop
+    loop = asyncio.get_running_loop()
+    previous_handler = signal.getsignal(signal.SIGINT)
+    signal.signal(
+        signal.SIGINT,
+        lambda signum, frame: loop.call_soon_threadsafe(app_session.cancel_current),
+    )
+    try:
+        await app_session.submit(user_input)
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+
+
+async def _repl(app_session, prompt_session):
     while True:
         try:
-            if HAS_TOOLKIT:
+            if prompt_session is not None:
                 user_input = await prompt_session.prompt_async("Seeker> ")
             else:
                 user_input = input("Seeker> ")
@@ -80,7 +118,7 @@ async def main():
             logger.info("Arrivederci!")
             break
             
-        await app_session.process_input(user_input)
+        await _run_request(app_session, user_input)
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,34 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    """TestCase with a fresh scratch directory in self.tmp_dir, removed after each test."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="seeker_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_file(self, name, text="", mtime=None):
+        """Writes text to name, relative to tmp_dir unless absolute, creating the folders."""
+        path = os.path.join(self.tmp_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def touch(self, *parts, size=0):
+        """Creates the file os.path.join(*parts) with size bytes of content."""
+        return self.write_file(os.path.join(*parts), "x" * size)
+
+    def bump_mtime(self, path, seconds=10):
+        """Moves the mtime of path into the future, so an mtime-based refresh sees it as changed."""
+        future = time.time() + seconds
+        os.utime(path, (future, future))
@@ -0,0 +1,84 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.cache import ResponseCache, make_cache_key
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_key_is_content_addressed(self):
+        messages = [{"role": "user", "content": "apri notepad"}]
+        key = make_cache_key("chat", "gemma2:2b", {"temperature": 0.1}, messages)
+        self.assertEqual(key, make_cache_key("chat", "gemma2:2b", {"temperature": 0.1}, list(messages)))
+        self.assertNotEqual(key, make_cache_key("chat", "gemma2:2b", {"temperature": 0.2}, messages))
+
+    def test_memory_lru_eviction_and_counters(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats()["hits"], 3)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_ttl_expires_entries(self):
+        cache = ResponseCache(ttl=10)
+        with patch("core.cache.time.time", return_value=1000):
+            cache.put("a", "valore")
+        with patch("core.cache.time.time", return_value=1005):
+            self.assertEqual(cache.get("a"), "valore")
+        with patch("core.cache.time.time", return_value=1011):
+            self.assertIsNone(cache.get("a"))
+
+    def test_entry_ttl_overrides_cache_ttl(self):
+        cache = ResponseCache(ttl=100)
+        with patch("core.cache.time.time", return_value=1000):
+            cache.put("breve", "valore", ttl=10)
+            cache.put("lunga", "valore")
+        with patch("core.cache.time.time", return_value=1050):
+            self.assertIsNone(cache.get("breve"))
+            self.assertEqual(cache.get("lunga"), "valore")
+
+    def test_disk_tier_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ResponseCache(disk_dir=tmp).put("k", {"action": "chat"})
+            cache = ResponseCache(disk_dir=tmp)
+            self.assertEqual(cache.get("k"), {"action": "chat"})
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+
+    def test_disk_tier_size_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(disk_dir=tmp, max_disk_bytes=600)
+            for i in range(10):
+                cache.put(f"k{i}", "x" * 100)
+            size = sum(e.stat().st_size for e in os.scandir(tmp))
+            self.assertLessEqual(size, 600)
+            self.assertTrue(os.path.exists(os.path.join(tmp, "k9.json")))
+
+    def test_disk_tier_scans_folder_only_when_evicting(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(disk_dir=tmp, max_disk_bytes=600)
+            with patch("core.cache.os.scandir", wraps=os.scandir) as scandir:
+                for i in range(3):
+                    cache.put(f"k{i}", "x" * 100)
+                    # Riscrivere la stessa chiave non fa crescere il totale
+                    cache.put(f"k{i}", "x" * 100)
+                self.assertEqual(scandir.call_count, 1)
+                for i in range(3, 10):
+                    cache.put(f"k{i}", "x" * 100)
+                self.assertGreater(scandir.call_count, 1)
+            size = sum(e.stat().st_size for e in os.scandir(tmp))
+            self.assertLessEqual(size, 600)
+            self.assertEqual(cache._disk_bytes, size)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.classifier import (
+    NaiveBayesClassifier,
+    cross_validate,
+    evaluate,
+    load_samples,
+    main,
+)
+
+SAMPLES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "data", "router_samples.jsonl")
+
+
+class TestNaiveBayesClassifier(unittest.TestCase):
+    def setUp(self):
+        self.samples = load_samples([SAMPLES_FILE])
+
+    def test_samples_cover_every_category(self):
+        categories = {label for _, label in self.samples}
+        self.assertEqual(categories, {"programming_question", "system_command", "general_chat"})
+
+    def test_predicts_training_distribution(self):
+        model = NaiveBayesClassifier().fit(self.samples)
+        self.assertEqual(model.predict("spiegami le closure in dettaglio")[0], "programming_question")
+        self.assertEqual(model.predict("svuota il cestino adesso")[0], "system_command")
+        self.assertEqual(model.predict("raccontami una barzelletta divertente")[0], "general_chat")
+        probabilities = model.predict_proba("come stai")
+        self.assertAlmostEqual(sum(probabilities.values()), 1.0)
+
+    def test_untrained_model_abstains(self):
+        self.assertEqual(NaiveBayesClassifier().predict("ciao"), (None, 0.0))
+
+    def test_save_and_load_round_trip(self):
+        model = NaiveBayesClassifier().fit(self.samples)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.json")
+            model.save(path)
+            loaded = NaiveBayesClassifier.load(path)
+        self.assertEqual(loaded.predict_proba("che ore sono"), model.predict_proba("che ore sono"))
+
+    def test_confident_predictions_are_accurate(self):
+        result = cross_validate(self.samples, folds=5, threshold=0.99)
+        self.assertGreater(result["coverage"], 0.3)
+        self.assertGreaterEqual(result["covered_accuracy"], 0.9)
+
+    def test_evaluate_on_training_data(self):
+        model = NaiveBayesClassifier().fit(self.samples)
+        result = evaluate(model, self.samples, threshold=0.5)
+        self.assertEqual(result["samples"], len(self.samples))
+        self.assertGreater(result["accuracy"], 0.9)
+
+    def test_train_entry_point(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "model.json")
+            self.assertEqual(main(["train", "--data", SAMPLES_FILE, "--output", output]), 0)
+            self.assertEqual(main(["evaluate", "--data", SAMPLES_FILE, "--model", output]), 0)
+            self.assertEqual(main(["train", "--data", os.path.join(tmp, "missing.jsonl")]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
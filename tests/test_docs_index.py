@@ -0,0 +1,269 @@
+import sys
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import cache, config
+from core.docs_index import (
+    DocsCorpus,
+    DocsIndex,
+    Passage,
+    detect_languages,
+    format_passages,
+    pack_passages,
+    shard_name,
+    split_passages,
+)
+from core.text_analysis import stem, tokenize
+from helpers import TempDirTestCase
+
+
+class TestDocsIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs_dir = self.tmp_dir
+        self.write_file("python.txt", "Le liste sono sequenze mutabili.\n\nUn dizionario associa chiavi a valori.\n")
+        self.write_file("rust.txt", "Il borrow checker controlla i riferimenti.\n")
+
+    def _index(self):
+        index = DocsIndex(self.docs_dir)
+        index.load()
+        index.refresh()
+        return index
+
+    def test_tokenize_drops_stopwords(self):
+        self.assertEqual(tokenize("Come si usa una Lista, in Python?"), ["usa", "lista", "python"])
+
+    def test_bm25_ranks_matching_passage_first(self):
+        self.write_file("python.md", "## Liste\nLe liste sono sequenze mutabili.\n\n## Dizionari\nUn dizionario associa chiavi a valori.\n")
+        results = self._index().search("chiavi del dizionario")
+        score, passage = results[0]
+        self.assertEqual(os.path.basename(passage.path), "python.md")
+        self.assertEqual((passage.start_line, passage.end_line), (4, 5))
+        self.assertEqual(passage.heading, "Dizionari")
+        self.assertIn("Un dizionario associa chiavi a valori.", passage.text)
+        self.assertEqual(self._index().search("javascript"), [])
+
+    def test_inflected_and_english_queries_match(self):
+        self.write_file("python.txt", "I decoratori avvolgono una funzione.\n")
+        index = self._index()
+        for query in ("decoratore", "decorators", "Cosa sono i DECORATORI?"):
+            self.assertIn("decoratori", index.search(query)[0][1].text, query)
+
+    def test_typos_match_through_trigrams(self):
+        index = self._index()
+        self.assertIn("Un dizionario associa chiavi a valori.", index.search("dizionraio")[0][1].text)
+        self.assertEqual(index.search("borow chekcer")[0][1].text, "Il borrow checker controlla i riferimenti.")
+        self.assertEqual(index.expand_term(stem("dizionario")), [(stem("dizionario"), 1.0)])
+        self.assertEqual(index.expand_term("xyzw"), [])
+
+    def test_trigram_index_follows_removed_terms(self):
+        index = self._index()
+        self.assertIn("borrow", index.trigrams["bor"])
+        os.remove(os.path.join(self.docs_dir, "rust.txt"))
+        index.refresh()
+        self.assertNotIn("bor", index.trigrams)
+        self.assertEqual(index.search("borow"), [])
+
+    def test_index_is_persisted_and_reused(self):
+        self._index()
+        self.assertTrue(os.path.exists(os.path.join(self.docs_dir, ".docs_index.json")))
+        with patch.object(DocsIndex, "_index_file") as index_file:
+            index = self._index()
+        index_file.assert_not_called()
+        self.assertEqual(index.search("borrow")[0][1].text, "Il borrow checker controlla i riferimenti.")
+
+    def test_refresh_reindexes_only_changed_files(self):
+        index = self._index()
+        self.write_file("rust.txt", "Le closure catturano l'ambiente.\n", mtime=time.time() + 10)
+        with patch.object(DocsIndex, "_index_file", wraps=index._index_file) as index_file:
+            self.assertEqual(index.refresh(), 1)
+        self.assertEqual([call.args[0] for call in index_file.call_args_list], [os.path.join(self.docs_dir, "rust.txt")])
+        self.assertEqual(index.search("borrow"), [])
+        self.assertEqual(index.search("closure")[0][1].path, os.path.join(self.docs_dir, "rust.txt"))
+
+    def test_touched_file_with_same_content_is_not_reindexed(self):
+        index = self._index()
+        path = os.path.join(self.docs_dir, "python.txt")
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        with patch.object(DocsIndex, "_index_file") as index_file:
+            self.assertEqual(index.refresh(), 0)
+        index_file.assert_not_called()
+
+    def test_removed_file_leaves_the_index(self):
+        index = self._index()
+        os.remove(os.path.join(self.docs_dir, "rust.txt"))
+        index.refresh()
+        self.assertEqual(index.search("borrow"), [])
+        self.assertNotIn("borrow", index.postings)
+        self.assertEqual(index.total_length, sum(doc[2] for doc in index.docs.values()))
+
+
+    def test_passage_ids_are_stable(self):
+        text = "## Liste\nLe liste sono sequenze mutabili.\n\n## Dizionari\nUn dizionario associa chiavi a valori.\n"
+        self.write_file("guida.md", text)
+        first = {p.id for _, p in self._index().search("liste dizionario") if p.path.endswith("guida.md")}
+        # Il contenuto si sposta piu in basso nel file: gli id non cambiano
+        self.write_file("guida.md", "# Premessa\nIntroduzione.\n\n" + text, mtime=time.time() + 10)
+        second = {p.id for _, p in self._index().search("liste dizionario") if p.path.endswith("guida.md")}
+        self.assertEqual(len(first), 2)
+        self.assertTrue(first <= second)
+        self.assertTrue(all(pid.startswith("guida.md#") for pid in first))
+
+
+class TestPassages(unittest.TestCase):
+    def test_headings_open_passages(self):
+        lines = [
+            "4.1 L'Istruzione if\n", "\n",
+            "   Forse il tipo di istruzione piu conosciuto.\n", "\n",
+            "4.2 L'Istruzione for\n", "\n",
+            "   Itera sugli elementi di una sequenza.\n",
+        ]
+        passages = split_passages(lines, max_tokens=200)
+        self.assertEqual(
+            [(start, end, heading) for start, end, heading, _ in passages],
+            [(1, 3, "4.1 L'Istruzione if"), (5, 7, "4.2 L'Istruzione for")],
+        )
+        self.assertEqual(passages[1][3], "4.2 L'Istruzione for\n\nItera sugli elementi di una sequenza.")
+
+    def test_markdown_headings_without_blank_lines(self):
+        lines = ["# Uso\n", "Testo.\n", "```python\n", "# commento, non un titolo\n", "```\n", "## Altro\n", "Fine.\n"]
+        passages = split_passages(lines, max_tokens=200, markdown=True)
+        self.assertEqual([heading for _, _, heading, _ in passages], ["Uso", "Altro"])
+
+    def test_passages_respect_size(self):
+        lines = []
+        for i in range(30):
+            lines += [f"Paragrafo {i} " + "parola " * 20 + "\n", "\n"]
+        lines.append("".join(f"riga lunga {i} " * 5 + "\n" for i in range(40)))
+        passages = split_passages("".join(lines).splitlines(True), max_tokens=100)
+        self.assertGreater(len(passages), 5)
+        self.assertTrue(all(len(text) // 4 + 1 <= 100 for _, _, _, text in passages))
+        # Nessuna riga persa o duplicata
+        self.assertEqual(sum(text.count("\n") - text.count("\n\n") + 1 for *_, text in passages), 30 + 40)
+
+    def test_pack_passages_fits_budget(self):
+        small = Passage("a#1", "a.txt", 1, 2, "", "breve " * 10)
+        large = Passage("a#2", "a.txt", 3, 9, "", "lungo " * 400)
+        packed = pack_passages([small, large, small._replace(id="a#3")], budget_tokens=100)
+        self.assertEqual([p.id for p in packed], ["a#1", "a#3"])
+
+        cut = pack_passages([large], budget_tokens=100)
+        self.assertLessEqual(len(format_passages(cut)) // 4 + 1, 100)
+
+
+
+class TestDocsCorpus(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs_dir = self.tmp_dir
+        self.write_file("python_tutorial_it.txt", "Le liste sono sequenze mutabili.\n")
+        self.write_file(os.path.join("javascript", "array.md"), "Gli array sono liste ordinate.\n")
+        self.write_file(os.path.join("sql", "join.txt"), "Una join combina le righe di due tabelle.\n")
+        cache._docs_cache = None
+        self.addCleanup(setattr, cache, "_docs_cache", None)
+
+    def _corpus(self):
+        corpus = DocsCorpus(self.docs_dir)
+        corpus.refresh()
+        return corpus
+
+    def test_shard_names(self):
+        self.assertEqual(shard_name("python_tutorial_it.txt"), "python")
+        self.assertEqual(shard_name(os.path.join("javascript", "array.md")), "javascript")
+        self.assertEqual(shard_name("C++-reference.txt"), "c++")
+        self.assertEqual(sorted(self._corpus().shards), ["javascript", "python", "sql"])
+        self.assertTrue(os.path.exists(os.path.join(self.docs_dir, ".docs_index.python.json")))
+
+    def test_detect_languages(self):
+        shards = ["python", "javascript", "sql", "c"]
+        self.assertEqual(detect_languages("Come ordino una lista in Python?", shards), {"python"})
+        self.assertEqual(detect_languages("array in node vs pip", shards), {"javascript", "python"})
+        self.assertEqual(detect_languages("c'è un modo per fare una join", shards), {"sql"})
+        self.assertEqual(detect_languages("cos'è una lista", shards), set())
+
+    def test_search_queries_only_relevant_shards(self):
+        corpus = self._corpus()
+        spies = {name: patch.object(index, "candidates", wraps=index.candidates) for name, index in corpus.shards.items()}
+        searched = {name: spy.start() for name, spy in spies.items()}
+        self.addCleanup(patch.stopall)
+        results = corpus.search("liste in javascript")
+        self.assertEqual([name for name, spy in searched.items() if spy.called], ["javascript"])
+        patch.stopall()
+        self.assertEqual([os.path.basename(p.path) for _, p in results], ["array.md"])
+
+        # Nessun linguaggio nella domanda: tutti gli shard, risultati uniti per punteggio
+        paths = {os.path.basename(p.path) for _, p in corpus.search("liste")}
+        self.assertEqual(paths, {"array.md", "python_tutorial_it.txt"})
+
+    def test_results_cached_until_corpus_changes(self):
+        corpus = self._corpus()
+        first = corpus.search("Le liste?")
+        with patch.object(DocsIndex, "candidates") as candidates:
+            # Stesse parole chiave, forma diversa
+            self.assertEqual(corpus.search("liste"), first)
+        candidates.assert_not_called()
+
+        self.write_file("python_tutorial_it.txt", "Le liste si ordinano con sort.\n", mtime=time.time() + 10)
+        corpus.refresh()
+        self.assertIn("Le liste si ordinano con sort.", [p.text for _, p in corpus.search("liste")])
+
+    def test_semantic_results_cached_by_query_text(self):
+        class CountingEmbedder:
+            model = "counting-embed"
+
+            def __init__(self):
+                self.queries = []
+
+            def embed(self, texts):
+                self.queries.extend(texts)
+                return [[1.0, float(len(text))] for text in texts]
+
+        embedder = CountingEmbedder()
+        corpus = DocsCorpus(self.docs_dir, embedder=embedder)
+        corpus.refresh()
+        for index in corpus.shards.values():
+            index.semantic.wait(10)
+        embedder.queries = []
+        corpus.search("Le liste?")
+        corpus.search("le   LISTE?")
+        # Stesse parole chiave ma testo diverso: l'embedding cambia, niente cache condivisa
+        corpus.search("liste")
+        self.assertEqual(embedder.queries, ["Le liste?", "liste"])
+
+    def test_scores_are_fused_across_shards(self):
+        class FlatEmbedder:
+            # Stesso vettore per ogni testo: la parte semantica non distingue i passaggi
+            model = "flat-embed"
+
+            def embed(self, texts):
+                return [[1.0, 0.0] for _ in texts]
+
+        self.write_file("python_dizionari.txt", "Un dizionario associa chiavi a valori.\n")
+        self.write_file("python_cicli.txt", "Un ciclo for ripete un blocco.\n")
+        self.write_file(os.path.join("sql", "select.txt"), "Una lista di colonne separate da virgole.\n")
+        corpus = DocsCorpus(self.docs_dir, embedder=FlatEmbedder())
+        corpus.refresh()
+        for index in corpus.shards.values():
+            index.semantic.wait(10)
+        results = corpus.search("liste mutabili")
+        self.assertEqual(os.path.basename(results[0][1].path), "python_tutorial_it.txt")
+        scores = {os.path.basename(p.path): score for score, p in results}
+        # Normalizzando per shard anche il passaggio SQL varrebbe 1.0
+        self.assertLess(scores["select.txt"], scores["python_tutorial_it.txt"] - 0.1)
+
+    def test_cache_disabled(self):
+        corpus = self._corpus()
+        with patch.object(config, "DOCS_QUERY_CACHE_ENABLED", False):
+            corpus.search("liste")
+            with patch.object(DocsIndex, "candidates", return_value=([], None)) as candidates:
+                corpus.search("liste")
+        candidates.assert_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import sys
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import embeddings
+from core.docs_index import DocsIndex
+from core.embeddings import EmbeddingStore, OllamaEmbedder, SemanticIndex, fuse_scores
+from helpers import TempDirTestCase
+
+
+# Concetti riconosciuti dall'embedder di prova: parole diverse, stesso significato
+CONCEPTS = [
+    {"lista", "liste", "array", "sequenza", "sequenze", "elenco"},
+    {"dizionario", "dizionari", "mappa", "chiavi", "chiave", "associativo"},
+    {"errore", "errori", "eccezione", "eccezioni", "sbaglio"},
+    {"ciclo", "cicli", "ripetere", "iterare", "for"},
+]
+
+
+class FakeEmbedder:
+    """Deterministic stand-in for the Ollama embedder: one dimension per concept."""
+
+    model = "fake-embed"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        vectors = []
+        for text in texts:
+            words = set(text.lower().replace("?", " ").replace(".", " ").split())
+            vectors.append([float(len(words & concept)) for concept in CONCEPTS] + [0.1])
+        return vectors
+
+
+class FailingEmbedder:
+    model = "fake-embed"
+
+    def embed(self, texts):
+        raise ConnectionError("model not found")
+
+
+class FakeClient:
+    def __init__(self):
+        self.payloads = []
+
+    def embed(self, payload):
+        self.payloads.append(payload)
+        return {"embeddings": [[float(len(text)), 1.0] for text in payload["input"]]}
+
+
+class TestEmbeddingStore(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp_dir, "store")
+
+    def _roundtrip(self):
+        store = EmbeddingStore(self.path, "fake-embed")
+        store.update(set(), {"a": [3.0, 4.0], "b": [0.0, 2.0]})
+        store.save()
+
+        loaded = EmbeddingStore(self.path, "fake-embed")
+        self.assertTrue(loaded.load())
+        self.assertEqual(loaded.keys, ["a", "b"])
+        results = loaded.top_k([0.0, 1.0], 2)
+        self.assertEqual([key for _, key in results], ["b", "a"])
+        self.assertAlmostEqual(results[0][0], 1.0, places=5)
+        self.assertAlmostEqual(results[1][0], 0.8, places=5)
+        self.assertFalse(EmbeddingStore(self.path, "other-model").load())
+
+    def test_roundtrip(self):
+        self._roundtrip()
+
+    def test_roundtrip_without_numpy(self):
+        with patch.object(embeddings, "np", None):
+            self._roundtrip()
+
+    def test_update_drops_stale_vectors(self):
+        store = EmbeddingStore(self.path, "fake-embed")
+        store.update(set(), {"a": [1.0, 0.0], "b": [0.0, 1.0]})
+        store.update({"b"}, {"c": [1.0, 1.0]})
+        self.assertEqual(store.keys, ["b", "c"])
+        self.assertEqual(store.top_k([0.0, 1.0], 1)[0][1], "b")
+
+    def test_ollama_embedder_batches_requests(self):
+        client = FakeClient()
+        vectors = OllamaEmbedder(model="nomic-embed-text", client=client, batch_size=2).embed(["a", "bb", "ccc"])
+        self.assertEqual(vectors, [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0]])
+        self.assertEqual([payload["input"] for payload in client.payloads], [["a", "bb"], ["ccc"]])
+        self.assertEqual(client.payloads[0]["model"], "nomic-embed-text")
+
+
+class TestHybridSearch(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs_dir = self.tmp_dir
+        self.write_file("python.txt", "## Liste\n\nLe liste sono sequenze mutabili.\n\n## Dizionari\n\nUn dizionario associa chiavi a valori.\n")
+        self.write_file("rust.txt", "## Errori\n\nResult rappresenta un errore recuperabile.\n")
+
+    def _index(self, embedder):
+        index = DocsIndex(self.docs_dir)
+        index.load()
+        index.refresh()
+        index.semantic = SemanticIndex(index, embedder)
+        index.semantic.sync()
+        return index
+
+    def test_paraphrase_found_without_keyword_overlap(self):
+        index = self._index(FakeEmbedder())
+        # Nessuna parola in comune con il passaggio sui dizionari
+        self.assertEqual(index._rank("una mappa", 5), [])
+        results = index.search("una mappa", limit=5)
+        self.assertEqual(results[0][1].heading, "Dizionari")
+
+    def test_unchanged_passages_are_not_reembedded(self):
+        embedder = FakeEmbedder()
+        index = self._index(embedder)
+        index.search("liste", limit=5)
+        self.assertEqual(len(embedder.calls[0]), 2 + 1)  # passaggi indicizzati, in un solo batch
+
+        # Nuovo indice sugli stessi file: i vettori arrivano dalla cache su disco
+        embedder = FakeEmbedder()
+        index = self._index(embedder)
+        index.search("liste", limit=5)
+        self.assertEqual(embedder.calls, [["liste"]])
+
+        # Un file modificato: il refresh calcola in background solo il passaggio nuovo
+        self.write_file("rust.txt", "## Errori\n\nUn panic interrompe il programma.\n", mtime=time.time() + 10)
+        index.refresh()
+        index.semantic.wait(10)
+        self.assertEqual(embedder.calls[1], ["Errori\n## Errori\n\nUn panic interrompe il programma."])
+
+    def test_search_does_not_wait_for_embeddings(self):
+        index = DocsIndex(self.docs_dir)
+        index.load()
+        index.refresh()
+        embedder = FakeEmbedder()
+        index.semantic = SemanticIndex(index, embedder)
+        # Vettori non ancora calcolati: risultati BM25 subito, embedding avviati in background
+        self.assertEqual(index.search("una mappa", limit=5), [])
+        index.semantic.wait(10)
+        self.assertTrue(index.semantic.ready)
+        self.assertEqual(index.search("una mappa", limit=5)[0][1].heading, "Dizionari")
+
+    def test_failing_embedder_falls_back_to_keywords(self):
+        index = self._index(FakeEmbedder())
+        index.semantic.embedder = FailingEmbedder()
+        with self.assertLogs("seeker_cli", level="WARNING"):
+            results = index.search("dizionario", limit=5)
+        self.assertEqual(results[0][1].heading, "Dizionari")
+
+        # Errore temporaneo: dopo EMBEDDING_RETRY_SECONDS la parte semantica torna attiva
+        index.semantic.embedder = FakeEmbedder()
+        self.assertEqual(index.search("una mappa", limit=5), [])
+        index.semantic.retry_at = 0.0
+        self.assertEqual(index.search("una mappa", limit=5)[0][1].heading, "Dizionari")
+
+    def test_fuse_scores_mixes_both_rankings(self):
+        keyword = [(4.0, 1), (2.0, 2)]
+        semantic = [(0.9, 3), (0.5, 1), (0.1, 2)]
+        self.assertEqual([doc_id for _, doc_id in fuse_scores(keyword, semantic, 0.5)], [1, 3, 2])
+        self.assertEqual([doc_id for _, doc_id in fuse_scores(keyword, semantic, 0.0)], [1, 2, 3])
+        self.assertEqual([doc_id for _, doc_id in fuse_scores(keyword, semantic, 1.0)], [3, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
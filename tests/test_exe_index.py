@@ -0,0 +1,126 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import tools
+from core.exe_index import ExecutableIndex
+from helpers import TempDirTestCase
+
+
+class TestExecutableIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.base = self.tmp_dir
+        self.program_files = os.path.join(self.base, "Program Files")
+        self.appdata = os.path.join(self.base, "AppData")
+        self.index_file = os.path.join(self.base, "cache", "exe_index.json")
+        self.touch(self.program_files, "Notepad++", "notepad++.exe")
+        self.touch(self.program_files, "Mozilla Firefox", "firefox.exe")
+        self.touch(self.program_files, "Mozilla Firefox", "readme.txt")
+        self.touch(self.program_files, "Tools", "bin", "Build.CMD")
+        self.touch(self.appdata, "Programs", "Microsoft VS Code", "Code.exe")
+        self.touch(self.appdata, "Programs", "app", "node_modules", "electron.exe")
+
+    def _index(self, **kwargs):
+        index = ExecutableIndex([self.program_files, self.appdata], self.index_file, **kwargs)
+        index.load()
+        return index
+
+    def test_scan_indexes_executables_only(self):
+        index = self._index()
+        index.refresh()
+        self.assertEqual(sorted(index.names), ["build.cmd", "code.exe", "firefox.exe", "notepad++.exe"])
+        # Cartelle escluse (node_modules) non vengono visitate
+        self.assertFalse(any("node_modules" in path for path in index.dirs))
+
+    def test_lookup_is_case_insensitive_and_extension_optional(self):
+        index = self._index()
+        index.refresh()
+        expected = os.path.join(self.appdata, "Programs", "Microsoft VS Code", "Code.exe")
+        self.assertEqual(index.lookup("code.exe"), expected)
+        self.assertEqual(index.lookup("CODE"), expected)
+        self.assertEqual(index.lookup("build"), os.path.join(self.program_files, "Tools", "bin", "Build.CMD"))
+        self.assertIsNone(index.lookup("chrome.exe"))
+
+    def test_lookup_skips_paths_that_no_longer_exist(self):
+        index = self._index()
+        index.refresh()
+        os.remove(os.path.join(self.program_files, "Mozilla Firefox", "firefox.exe"))
+        self.assertIsNone(index.lookup("firefox.exe"))
+
+    def test_persisted_index_is_refreshed_incrementally(self):
+        self._index().refresh()
+        self.assertTrue(os.path.exists(self.index_file))
+
+        index = self._index()
+        self.assertIn("firefox.exe", index.names)
+        self.assertEqual(index.refresh(), 0)
+
+        folder = os.path.join(self.program_files, "Mozilla Firefox")
+        self.touch(folder, "updater.exe")
+        self.bump_mtime(folder)
+        with patch.object(ExecutableIndex, "_list_dir", autospec=True, side_effect=ExecutableIndex._list_dir) as list_dir:
+            self.assertEqual(index.refresh(), 1)
+        self.assertEqual([call.args[1] for call in list_dir.call_args_list], [folder])
+        self.assertEqual(index.lookup("updater"), os.path.join(folder, "updater.exe"))
+
+    def test_removed_folders_are_dropped(self):
+        index = self._index()
+        index.refresh()
+        folder = os.path.join(self.program_files, "Notepad++")
+        os.remove(os.path.join(folder, "notepad++.exe"))
+        os.rmdir(folder)
+        self.bump_mtime(self.program_files)
+        index.refresh()
+        self.assertNotIn(folder, index.dirs)
+        self.assertNotIn("notepad++.exe", index.names)
+
+    def test_suggest_close_names(self):
+        index = self._index()
+        index.refresh()
+        self.assertEqual(index.suggest("firefx"), ["firefox.exe"])
+        self.assertEqual(index.suggest("notepad++"), ["notepad++.exe"])
+        self.assertEqual(index.suggest("zzzzzz"), [])
+
+    def test_background_refresh(self):
+        index = self._index()
+        index.refresh_in_background()
+        index.wait(10)
+        self.assertFalse(index.refreshing)
+        self.assertIn("firefox.exe", index.names)
+
+    def test_find_executable_uses_index(self):
+        index = self._index()
+        index.refresh()
+        with patch("core.tools.shutil.which", return_value=None), patch.object(tools, "winreg", None), \
+                patch("core.tools.get_exe_index", return_value=index):
+            self.assertEqual(tools._find_executable("firefox.exe"), os.path.join(self.program_files, "Mozilla Firefox", "firefox.exe"))
+            self.assertIsNone(tools._find_executable("missing.exe"))
+            message = tools.tool_launch_program("firefx.exe")
+        self.assertIn("Forse intendevi: firefox.exe?", message)
+
+
+    def test_find_executable_waits_only_for_the_first_scan(self):
+        index = self._index()
+        with patch("core.tools.shutil.which", return_value=None), patch.object(tools, "winreg", None), \
+                patch("core.tools.get_exe_index", return_value=index):
+            self.assertEqual(tools._find_executable("code.exe"), os.path.join(self.appdata, "Programs", "Microsoft VS Code", "Code.exe"))
+
+    def test_find_executable_refreshes_on_miss(self):
+        index = self._index()
+        index.refresh()
+        new_app = self.touch(self.program_files, "NewApp", "newapp.exe")
+        self.bump_mtime(self.program_files)
+        with patch("core.tools.shutil.which", return_value=None), patch.object(tools, "winreg", None), \
+                patch("core.tools.get_exe_index", return_value=index):
+            # Nessuna attesa: il miss avvia l'aggiornamento e la richiesta successiva lo trova
+            self.assertIsNone(tools._find_executable("newapp.exe"))
+            index.wait(10)
+            self.assertEqual(tools._find_executable("newapp.exe"), new_app)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import config, tools
+from core.file_index import FileIndex
+from helpers import TempDirTestCase
+
+
+class TestFileIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = os.path.join(self.tmp_dir, "home")
+        self.index_file = os.path.join(self.tmp_dir, "cache", "file_index.json.gz")
+        self.touch(self.root, "Documents", "Tax Return 2023.pdf", size=300)
+        self.touch(self.root, "Documents", "tax_notes.txt", size=10)
+        self.touch(self.root, "Documents", "Manuals", "Players Handbook.epub", size=50)
+        self.touch(self.root, "Desktop", "D&D Campaign.docx", size=20)
+        self.touch(self.root, "Desktop", "Photos", "holiday.jpg", size=100)
+        self.touch(self.root, "project", "node_modules", "tax.js")
+
+    def _index(self):
+        index = FileIndex([self.root], self.index_file, prune=["node_modules"], workers=2)
+        index.load()
+        return index
+
+    def _names(self, paths):
+        return [os.path.basename(path) for path in paths]
+
+    def test_substring_words_and_variants(self):
+        index = self._index()
+        index.refresh()
+        self.assertEqual(sorted(self._names(index.search(["TAX"]))), ["Tax Return 2023.pdf", "tax_notes.txt"])
+        # Parole della stessa variante in AND, in qualsiasi ordine
+        self.assertEqual(self._names(index.search(["2023 tax"])), ["Tax Return 2023.pdf"])
+        # Varianti in OR
+        self.assertEqual(
+            sorted(self._names(index.search(["d&d", "players handbook"]))),
+            ["D&D Campaign.docx", "Players Handbook.epub"],
+        )
+        # Le cartelle escluse non sono indicizzate
+        self.assertNotIn("tax.js", self._names(index.search(["tax"])))
+
+    def test_names_longer_once_lowercased(self):
+        # "İ".lower() e lungo due caratteri: gli offset delle voci successive non devono slittare
+        for name in ("İİİİİİİİİİn_a", "İİİİİİİİİİn_b", "İİİİİİİİİİn_c"):
+            self.touch(self.root, "sub", name)
+        self.touch(self.root, "sub", "x1")
+        self.touch(self.root, "sub", "y1")
+        self.touch(self.root, "sub", "zz")
+        index = self._index()
+        index.refresh()
+        self.assertEqual(self._names(index.search(["x1"])), ["x1"])
+        self.assertEqual(self._names(index.search(["y1"])), ["y1"])
+        self.assertEqual(self._names(index.search([], regex=r"^zz$")), ["zz"])
+        self.assertEqual(len(index.search(["n_"])), 3)
+
+    def test_filters(self):
+        index = self._index()
+        index.refresh()
+        self.assertEqual(self._names(index.search(["tax"], extensions=["PDF"])), ["Tax Return 2023.pdf"])
+        self.assertEqual(sorted(self._names(index.search(["o"], kind="folders"))), ["Desktop", "Documents", "Photos", "project"])
+        self.assertNotIn("Photos", self._names(index.search(["o"], kind="files")))
+        desktop = os.path.join(self.root, "Desktop")
+        self.assertEqual(self._names(index.search(["o"], locations=[desktop], kind="files")), ["D&D Campaign.docx", "holiday.jpg"])
+        self.assertEqual(len(index.search(["a"], max_results=2)), 2)
+
+    def test_regex(self):
+        index = self._index()
+        index.refresh()
+        self.assertEqual(self._names(index.search([], regex=r"^tax.*\.txt$")), ["tax_notes.txt"])
+        self.assertEqual(sorted(self._names(index.search([], regex=r"d&d|handbook"))), ["D&D Campaign.docx", "Players Handbook.epub"])
+
+    def test_sort(self):
+        index = self._index()
+        index.refresh()
+        by_size = index.search(["a"], kind="files", sort="size-descending")
+        self.assertEqual(self._names(by_size)[:2], ["Tax Return 2023.pdf", "holiday.jpg"])
+        by_name = index.search(["a"], kind="files", sort="name")
+        self.assertEqual(self._names(by_name), sorted(self._names(by_name), key=str.lower))
+
+    def test_persisted_index_is_refreshed_incrementally(self):
+        self._index().refresh()
+        self.assertTrue(os.path.exists(self.index_file))
+
+        index = self._index()
+        self.assertEqual(self._names(index.search(["holiday"])), ["holiday.jpg"])
+        self.assertEqual(index.refresh(), 0)
+
+        self.touch(self.root, "Desktop", "Photos", "beach.jpg")
+        self.bump_mtime(os.path.join(self.root, "Desktop", "Photos"))
+        self.assertEqual(index.refresh(), 1)
+        self.assertEqual(self._names(index.search(["beach"])), ["beach.jpg"])
+
+    def test_search_files_uses_builtin_backend(self):
+        index = self._index()
+        index.refresh()
+        with patch.object(config, "FILE_SEARCH_BACKEND", "builtin"), patch("core.tools.get_file_index", return_value=index), \
+                patch("core.tools._resolve_search_locations", return_value=[]):
+            output = tools.tool_search_files("tax", extensions="pdf")
+            missing = tools.tool_search_files("inesistente")
+        self.assertEqual(output, os.path.join(self.root, "Documents", "Tax Return 2023.pdf"))
+        self.assertEqual(missing, "Nessuna corrispondenza nell'indice dei file.")
+
+    def test_auto_backend_prefers_everything(self):
+        with patch.object(config, "FILE_SEARCH_BACKEND", "auto"):
+            self.assertFalse(tools.uses_builtin_file_index("C:\\Program Files\\Everything\\es.exe"))
+            with patch("core.tools._get_everything_es_path", return_value=None):
+                self.assertTrue(tools.uses_builtin_file_index())
+
+
+if __name__ == '__main__':
+    unittest.main()
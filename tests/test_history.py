@@ -0,0 +1,63 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.history import compact_history, history_tokens, summarize_tool_result
+
+
+def _tool_result(action, size):
+    return {"role": "user", "content": f"Risultato azione '{action}': " + "riga\n" * size}
+
+
+class TestHistoryCompaction(unittest.TestCase):
+    def setUp(self):
+        self.task = {"role": "user", "content": "leggi i file di log"}
+        self.history = [self.task]
+        for i in range(4):
+            self.history.append({"role": "assistant", "content": f'{{"action": "read_file", "n": {i}}}'})
+            self.history.append(_tool_result("read_file", 400))
+
+    def test_under_budget_is_untouched(self):
+        compacted, saved = compact_history(self.history, 100000)
+        self.assertIs(compacted, self.history)
+        self.assertEqual(saved, 0)
+
+    def test_old_tool_results_become_stubs(self):
+        budget = 1500
+        compacted, saved = compact_history(self.history, budget, keep_recent=2, pinned=self.task)
+
+        self.assertLessEqual(history_tokens(compacted), budget)
+        self.assertGreater(saved, 0)
+        self.assertEqual(saved, history_tokens(self.history) - history_tokens(compacted))
+        self.assertIs(compacted[0], self.task)
+        self.assertEqual(compacted[-1], self.history[-1])
+        self.assertIn("[compattato]", compacted[2]["content"])
+        self.assertEqual(len(compacted), len(self.history))
+
+    def test_drops_oldest_when_stubs_are_not_enough(self):
+        compacted, _ = compact_history(self.history, 120, keep_recent=2, pinned=self.task)
+        self.assertIs(compacted[0], self.task)
+        self.assertEqual(compacted[-2:], self.history[-2:])
+        self.assertLess(len(compacted), len(self.history))
+
+    def test_retry_pairs_are_dropped(self):
+        history = [
+            self.task,
+            {"role": "assistant", "content": "non json " * 200},
+            {"role": "user", "content": "Errore: Rispondi SOLO in JSON valido. Correggi il formato."},
+            {"role": "assistant", "content": '{"action": "chat"}'},
+        ]
+        compacted, _ = compact_history(history, 100, keep_recent=1, pinned=self.task)
+        self.assertEqual(compacted, [self.task, history[-1]])
+
+    def test_summary_keeps_header_and_head(self):
+        stub = summarize_tool_result("Risultato azione 'read_file': " + "x" * 1000, stub_chars=10)
+        self.assertTrue(stub.startswith("Risultato azione 'read_file' [compattato] (1 righe): xxxxxxxxxx..."))
+        self.assertIn("990 caratteri omessi", stub)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.json_repair import repair_json
+
+EXPECTED = {"thought": "ok", "action": "chat", "args": {"message": "ciao"}}
+
+
+class TestRepairJson(unittest.TestCase):
+    def test_trailing_text_and_fences(self):
+        self.assertEqual(repair_json('{"thought": "ok", "action": "chat", "args": {"message": "ciao"}} fatto!'), EXPECTED)
+        self.assertEqual(repair_json('Ecco:\n```json\n{"thought": "ok", "action": "chat", "args": {"message": "ciao"}}\n```'), EXPECTED)
+
+    def test_single_quotes(self):
+        data = repair_json("{'thought': 'l'utente saluta', 'action': 'chat', 'args': {'message': 'ciao'}}")
+        self.assertEqual(data["thought"], "l'utente saluta")
+        self.assertEqual(data["args"], {"message": "ciao"})
+
+    def test_unescaped_inner_quotes(self):
+        data = repair_json('{"thought": "apro "notepad"", "action": "run_shell_command", "args": {"command": "start "" notepad.exe"}}')
+        self.assertEqual(data["thought"], 'apro "notepad"')
+        self.assertEqual(data["args"]["command"], 'start "" notepad.exe')
+
+    def test_trailing_commas(self):
+        self.assertEqual(repair_json('{"thought": "ok", "action": "chat", "args": {"message": "ciao",},}'), EXPECTED)
+
+    def test_truncated_output(self):
+        data = repair_json('{"thought": "ok", "action": "chat", "args": {"message": "ciao')
+        self.assertEqual(data, EXPECTED)
+        data = repair_json('{"thought": "ok", "action": "list_directory", "args": {"dir_path": "C:\\\\Users", "recursive": true')
+        self.assertEqual(data["args"], {"dir_path": "C:\\Users", "recursive": True})
+
+    def test_unsalvageable(self):
+        self.assertIsNone(repair_json("non ho capito la domanda"))
+        self.assertIsNone(repair_json(""))
+
+
+if __name__ == '__main__':
+    unittest.main()
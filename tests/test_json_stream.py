@@ -0,0 +1,49 @@
+import sys
+import os
+import json
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.json_stream import IncrementalJSONParser
+
+RESPONSE = (
+    '{"thought": "Apro \\"notepad\\" \\u00e8 facile", "action": "launch_program", '
+    '"args": {"program_name": "notepad.exe", "flags": [1, {"a": null}], "wait": true}, "n": 2}'
+)
+
+
+def _feed_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+
+class TestIncrementalJSONParser(unittest.TestCase):
+    def test_any_chunking_yields_same_object(self):
+        for size in (1, 2, 5, 13, len(RESPONSE)):
+            parser, events = _feed_in_chunks(RESPONSE, size)
+            self.assertTrue(parser.done)
+            self.assertEqual(events[-1], ("end", json.loads(RESPONSE)))
+            self.assertEqual(parser.fields, json.loads(RESPONSE))
+
+    def test_string_deltas_are_decoded(self):
+        _, events = _feed_in_chunks(RESPONSE, 3)
+        thought = "".join(e[2] for e in events if e[0] == "delta" and e[1] == ("thought",))
+        program = "".join(e[2] for e in events if e[0] == "delta" and e[1] == ("args", "program_name"))
+        self.assertEqual(thought, 'Apro "notepad" è facile')
+        self.assertEqual(program, "notepad.exe")
+
+    def test_fields_complete_before_object_closes(self):
+        parser = IncrementalJSONParser()
+        parser.feed('```json\n{"thought": "ok", "action": "chat", "args": {"message": "ciao"}')
+        self.assertFalse(parser.done)
+        self.assertEqual(parser.fields["action"], "chat")
+        self.assertEqual(parser.fields["args"], {"message": "ciao"})
+
+
+if __name__ == '__main__':
+    unittest.main()
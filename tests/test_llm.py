@@ -0,0 +1,121 @@
+import sys
+import os
+import time
+import asyncio
+import json
+import unittest
+from unittest.mock import patch, Mock, AsyncMock
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_ollama import StubOllamaServer
+from core import config
+from core.llm import call_ollama, choose_num_ctx, stream_ollama, warmup_models
+from core.cache import ResponseCache, get_response_cache
+from core.ollama_client import OllamaClient
+
+
+class TestWarmup(unittest.TestCase):
+    def test_models_are_loaded_concurrently(self):
+        async def run(client):
+            status = await warmup_models(client, models=["router:1b", "specialist:2b"])
+            await client.aclose()
+            return status
+
+        with StubOllamaServer(delay=0.3) as server:
+            start = time.perf_counter()
+            status = asyncio.run(run(OllamaClient(base_url=server.url)))
+            elapsed = time.perf_counter() - start
+
+            loaded = sorted(payload["model"] for name, payload in server.requests)
+            self.assertEqual(loaded, ["router:1b", "specialist:2b"])
+            self.assertTrue(all("prompt" not in payload for _, payload in server.requests))
+
+        self.assertEqual(status, {"router:1b": True, "specialist:2b": True})
+        self.assertLess(elapsed, 0.55)
+
+    def test_unreachable_server_reports_not_ready(self):
+        client = OllamaClient(base_url="http://127.0.0.1:9/api/chat", connect_timeout=0.5)
+        status = asyncio.run(warmup_models(client, models=["m"]))
+        self.assertEqual(status, {"m": False})
+
+
+
+class TestAdaptiveNumCtx(unittest.TestCase):
+    def test_smallest_fitting_bucket(self):
+        with patch.object(config, "MAX_OUTPUT_TOKENS", 500), patch.object(config, "NUM_CTX_MARGIN", 1.0):
+            self.assertEqual(choose_num_ctx(100, mode="adaptive", buckets=[2048, 4096, 8192]), 2048)
+            self.assertEqual(choose_num_ctx(1600, mode="adaptive", buckets=[2048, 4096, 8192]), 4096)
+            self.assertEqual(choose_num_ctx(20000, mode="adaptive", buckets=[2048, 4096, 8192]), 8192)
+
+    def test_fixed_mode(self):
+        with patch.object(config, "NUM_CTX", 8192):
+            self.assertEqual(choose_num_ctx(10, mode="fixed"), 8192)
+
+    def test_bucket_is_sent_and_recorded(self):
+        cache = get_response_cache()
+        if cache:
+            cache.clear()
+        client = Mock()
+        client.achat = AsyncMock(return_value={
+            "model": "gemma2:2b",
+            "message": {"content": '{"action": "chat", "args": {}}'},
+            "total_duration": 10 ** 9,
+            "prompt_eval_count": 10,
+        })
+        with patch.object(config, "NUM_CTX_MODE", "adaptive"), patch("core.llm.get_telemetry") as telemetry:
+            asyncio.run(call_ollama(
+                [{"role": "user", "content": "ciao"}],
+                config.BASE_SPECIALIST_PROMPT,
+                "",
+                client=client,
+                category="general_chat",
+                iteration=1,
+            ))
+
+        payload = client.achat.call_args.args[0]
+        self.assertIn(payload["options"]["num_ctx"], config.NUM_CTX_BUCKETS)
+        kwargs = telemetry.return_value.record.call_args.kwargs
+        self.assertEqual(kwargs["num_ctx"], payload["options"]["num_ctx"])
+        self.assertEqual(kwargs["category"], "general_chat")
+
+
+class TestStreamCache(unittest.TestCase):
+    def test_early_closed_stream_is_cached(self):
+        pieces = ['{"thought": "Saluto", "action": "chat", ', '"args": {"message": "Ciao!"}', '}', '  ']
+
+        async def astream(name, payload):
+            for piece in pieces:
+                yield {"message": {"content": piece}}
+            yield {"done": True}
+
+        client = Mock()
+        client.astream = Mock(side_effect=astream)
+        messages = [{"role": "user", "content": "ciao"}]
+
+        async def first_pieces(count):
+            stream = stream_ollama(messages, config.BASE_SPECIALIST_PROMPT, "", client=client)
+            received = []
+            async for piece in stream:
+                received.append(piece)
+                if len(received) == count:
+                    break
+            # Come la sessione: chiusura appena action e args sono completi
+            await stream.aclose()
+            return received
+
+        with patch("core.llm.get_response_cache", return_value=ResponseCache(max_entries=8)), \
+                patch("core.llm.report_call_metrics"):
+            asyncio.run(first_pieces(2))
+            cached = asyncio.run(first_pieces(1))
+
+        self.assertEqual(client.astream.call_count, 1)
+        self.assertEqual(
+            json.loads(cached[0]),
+            {"thought": "Saluto", "action": "chat", "args": {"message": "Ciao!"}},
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,10 @@ import unittest
 from unittest.mock import patch
 import os
 import shutil
+from core import config
+from core import docs_index
 from core.tools import (
+    tool_consult_documentation,
     tool_list_dir,
     tool_launch_program
 )
@@ -20,6 +23,20 @@ class TestNewTools(unittest.TestCase):
         if os.path.exists(self.test_dir):
             shutil.rmtree(self.test_dir)
 
+    def test_consult_documentation_uses_index(self):
+        with open(os.path.join(self.test_dir, "subdir", "python.txt"), "w", encoding="utf-8") as f:
+            f.write("Introduzione\nUn decoratore avvolge una funzione.\n")
+        with patch.object(config, "DOCS_DIR", self.test_dir), patch.object(config, "DOCS_EMBEDDINGS_ENABLED", False), \
+                patch.object(docs_index, "_docs_index", None):
+            output = tool_consult_documentation("cos'è un decoratore?")
+            empty = tool_consult_documentation("come si fa")
+
+        header, text = output.split("\n", 1)
+        self.assertTrue(header.startswith("[subdir/python.txt#"))
+        self.assertTrue(header.endswith(f"{os.path.join(self.test_dir, 'subdir', 'python.txt')}:1-2"))
+        self.assertEqual(text, "Introduzione\nUn decoratore avvolge una funzione.")
+        self.assertEqual(empty, "Nessuna corrispondenza trovata (query vuota o solo stopwords).")
+
     def test_list_dir(self):
         output = tool_list_dir(self.test_dir)
         self.assertIn("file1.txt", output)
@@ -41,13 +58,15 @@ class TestNewTools(unittest.TestCase):
         mock_open.assert_called_once_with(fake_path)
         self.assertIn("avviato con successo", result)
 
+    @patch('core.tools.get_exe_index')
     @patch('core.tools._open_path')
     @patch('core.tools._find_executable')
-    def test_launch_program_not_found(self, mock_find, mock_open):
+    def test_launch_program_not_found(self, mock_find, mock_open, mock_index):
         """Tests that launch_program returns an error if the executable is not found."""
         fake_program = "notfound.exe"
         
         mock_find.return_value = None
+        mock_index.return_value.suggest.return_value = []
         result = tool_launch_program(fake_program)
 
         mock_find.assert_called_once_with(fake_program)
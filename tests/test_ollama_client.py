@@ -0,0 +1,87 @@
+import sys
+import os
+import time
+import asyncio
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_ollama import StubOllamaServer
+from core.ollama_client import OllamaClient, _api_base
+
+
+class TestOllamaClient(unittest.TestCase):
+    def test_api_base_from_chat_url(self):
+        self.assertEqual(_api_base("http://localhost:11434/api/chat"), "http://localhost:11434/api")
+        self.assertEqual(_api_base("http://localhost:11434/api/"), "http://localhost:11434/api")
+
+    def test_calls_reuse_pooled_connection(self):
+        with StubOllamaServer() as server:
+            client = OllamaClient(base_url=server.url)
+            for _ in range(5):
+                client.chat({"model": "m", "messages": []})
+            client.generate({"model": "m", "prompt": "ciao"})
+            client.close()
+
+            self.assertEqual(server.connections, 1)
+            self.assertEqual([name for name, _ in server.requests], ["chat"] * 5 + ["generate"])
+
+    def test_per_call_timeout_overrides_read_timeout(self):
+        client = OllamaClient(base_url="http://localhost:1/api/chat", connect_timeout=2, read_timeout=30)
+        self.assertEqual(client._timeout(None), (2, 30))
+        self.assertEqual(client._timeout(45), (2, 45))
+
+
+    def test_async_chat_reuses_connection(self):
+        async def run(client):
+            results = [await client.achat({"model": "m", "messages": []}) for _ in range(3)]
+            await client.aclose()
+            return results
+
+        with StubOllamaServer() as server:
+            results = asyncio.run(run(OllamaClient(base_url=server.url)))
+
+            self.assertTrue(all(r["done"] for r in results))
+            self.assertEqual(server.connections, 1)
+
+    def test_async_chat_cancellation_aborts_request(self):
+        async def run(client):
+            task = asyncio.ensure_future(client.achat({"model": "m", "messages": []}))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            await client.aclose()
+
+        with StubOllamaServer(delay=2.0) as server:
+            start = time.perf_counter()
+            asyncio.run(run(OllamaClient(base_url=server.url)))
+            self.assertLess(time.perf_counter() - start, 1.0)
+
+
+    def test_stream_yields_chunks_and_can_stop_early(self):
+        chunks = [{"message": {"content": str(i)}, "done": False} for i in range(50)]
+
+        async def run(client):
+            received = []
+            stream = client.astream("chat", {"model": "m", "messages": []})
+            async for chunk in stream:
+                received.append(chunk["message"]["content"])
+                if len(received) == 3:
+                    break
+            await stream.aclose()
+            await client.aclose()
+            return received
+
+        with StubOllamaServer(handlers={"chat": lambda payload: chunks}, stream_delay=0.02) as server:
+            received = asyncio.run(run(OllamaClient(base_url=server.url)))
+            time.sleep(0.1)
+
+            self.assertEqual(received, ["0", "1", "2"])
+            self.assertLess(server.chunks_sent, 50)
+            self.assertTrue(server.requests[0][1]["stream"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import sys
+import os
+import asyncio
+import shlex
+import time
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import tools
+from core.process_runner import BoundedOutput, format_result, run_command
+from helpers import TempDirTestCase
+
+
+def python_command(code):
+    return f"{shlex.quote(sys.executable)} -c {shlex.quote(code)}"
+
+
+class TestBoundedOutput(unittest.TestCase):
+    def test_short_output_is_kept_whole(self):
+        buffer = BoundedOutput(head_bytes=5, tail_bytes=5)
+        buffer.write(b"abc")
+        buffer.write(b"defg")
+        self.assertEqual(buffer.dropped, 0)
+        self.assertEqual(buffer.text("utf-8"), "abcdefg")
+
+    def test_keeps_head_and_tail(self):
+        buffer = BoundedOutput(head_bytes=4, tail_bytes=3)
+        for chunk in (b"0123", b"456789", b"ab"):
+            buffer.write(chunk)
+        self.assertEqual(buffer.total, 12)
+        self.assertEqual(buffer.dropped, 5)
+        self.assertEqual(buffer.text("utf-8"), "0123\n... [5 byte omessi] ...\n9ab")
+
+
+class TestRunCommand(TempDirTestCase):
+    def test_streams_output_and_bounds_the_result(self):
+        chunks = []
+        command = python_command("import sys\nfor i in range(2000): print(f'riga {i}')\nsys.exit(3)")
+        result = asyncio.run(run_command(command, timeout=30, on_output=chunks.append, head_bytes=100, tail_bytes=100))
+        streamed = "".join(chunks)
+        self.assertIn("riga 0", streamed)
+        self.assertIn("riga 1999", streamed)
+        self.assertEqual(result.exit_code, 3)
+        self.assertEqual(result.total_bytes, len(streamed.replace("\n", os.linesep).encode()))
+        self.assertEqual(result.dropped_bytes, result.total_bytes - 200)
+        self.assertTrue(result.output.startswith("riga 0"))
+        self.assertIn("riga 1999", result.output)
+        self.assertNotIn("riga 1000", result.output)
+        self.assertFalse(result.timed_out)
+
+    def test_stderr_is_merged(self):
+        command = python_command("import sys\nprint('fuori', flush=True)\nprint('errore', file=sys.stderr)")
+        result = asyncio.run(run_command(command, timeout=30))
+        self.assertIn("fuori", result.output)
+        self.assertIn("errore", result.output)
+        self.assertEqual(result.exit_code, 0)
+
+    def test_timeout_kills_the_command(self):
+        started = time.perf_counter()
+        command = python_command("import time\nprint('avvio', flush=True)\ntime.sleep(30)")
+        result = asyncio.run(run_command(command, timeout=0.5))
+        self.assertTrue(result.timed_out)
+        self.assertIn("avvio", result.output)
+        self.assertLess(time.perf_counter() - started, 10)
+        self.assertIn("Timeout", format_result(result))
+
+    def test_cancellation_kills_the_command(self):
+        started_file = os.path.join(self.tmp_dir, "avviato")
+        alive_file = os.path.join(self.tmp_dir, "ancora_vivo")
+        # Il comando segnala l'avvio, poi scrive il secondo file se sopravvive all'annullamento
+        code = (
+            f"import time\nopen({started_file!r}, 'w').close()\n"
+            f"time.sleep(1)\nopen({alive_file!r}, 'w').close()\ntime.sleep(30)"
+        )
+        processes = []
+        create = asyncio.create_subprocess_shell
+
+        async def spy(*args, **kwargs):
+            process = await create(*args, **kwargs)
+            processes.append(process)
+            return process
+
+        async def run():
+            task = asyncio.ensure_future(run_command(python_command(code), timeout=0))
+            while not os.path.exists(started_file):
+                await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # Processo gia raccolto quando l'annullamento arriva al chiamante
+            self.assertIsNotNone(processes[0].returncode)
+
+        with patch("core.process_runner.asyncio.create_subprocess_shell", spy), \
+                self.assertLogs("seeker_cli", level="WARNING"):
+            asyncio.run(run())
+        time.sleep(1.5)
+        self.assertFalse(os.path.exists(alive_file))
+
+
+class TestToolExecuteAsync(unittest.TestCase):
+    def test_reports_exit_code_duration_and_dropped_bytes(self):
+        command = python_command("print('x' * 20000)")
+        with patch("core.tools.ask_permission", return_value=True), \
+                patch("core.tools.config.COMMAND_STREAM_OUTPUT", False), \
+                patch("core.process_runner.config.COMMAND_OUTPUT_HEAD_BYTES", 1000), \
+                patch("core.process_runner.config.COMMAND_OUTPUT_TAIL_BYTES", 1000):
+            output = asyncio.run(tools.tool_execute_async(command))
+        lines = output.splitlines()
+        self.assertEqual(lines[0], "Exit Code: 0")
+        self.assertTrue(lines[1].startswith("Durata: "))
+        self.assertTrue(lines[2].startswith("Output troncato: "))
+        self.assertLess(len(output), 2500)
+
+    def test_denied(self):
+        with patch("core.tools.ask_permission", return_value=False):
+            self.assertEqual(asyncio.run(tools.tool_execute_async("echo ciao")), "Utente ha negato l azione.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import config, prompts
+
+
+class TestPromptRendering(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cookbook = os.path.join(self.tmp.name, "cookbook.md")
+        with open(self.cookbook, "w", encoding="utf-8") as f:
+            f.write("RICETTA-1")
+        patcher = patch.object(config, "COOKBOOK_FILE", self.cookbook)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.tools = prompts.tool_list_for(prompts.tool_names_for_category("general_chat"))
+
+    def test_same_inputs_return_identical_prompt(self):
+        first = prompts.render_specialist_prompt(config.BASE_SPECIALIST_PROMPT, self.tools, cwd="/a")
+        second = prompts.render_specialist_prompt(config.BASE_SPECIALIST_PROMPT, self.tools, cwd="/a")
+        self.assertIs(first, second)
+        self.assertIn("RICETTA-1", first)
+        self.assertIn("Working Directory: /a", first)
+
+    def test_cookbook_change_invalidates_prompt(self):
+        before = prompts.render_specialist_prompt(config.BASE_SPECIALIST_PROMPT, self.tools, cwd="/a")
+        with open(self.cookbook, "w", encoding="utf-8") as f:
+            f.write("RICETTA-2")
+        later = time.time() + 5
+        os.utime(self.cookbook, (later, later))
+
+        after = prompts.render_specialist_prompt(config.BASE_SPECIALIST_PROMPT, self.tools, cwd="/a")
+        self.assertNotEqual(before, after)
+        self.assertIn("RICETTA-2", after)
+
+    def test_toolsets_per_category(self):
+        self.assertEqual(prompts.tool_names_for_category("general_chat"), ("finish_task", "chat"))
+        self.assertEqual(prompts.tool_names_for_category("unknown"), ("finish_task", "chat"))
+        self.assertIn("consult_documentation", prompts.tool_names_for_category("programming_question"))
+
+
+    def test_stable_layout_keeps_prefix_independent_of_cwd(self):
+        with patch.object(config, "PROMPT_LAYOUT", "stable"), patch("os.getcwd", return_value="/uno"):
+            first = prompts.build_system_messages(config.BASE_SPECIALIST_PROMPT, self.tools)
+        with patch.object(config, "PROMPT_LAYOUT", "stable"), patch("os.getcwd", return_value="/due"):
+            second = prompts.build_system_messages(config.BASE_SPECIALIST_PROMPT, self.tools)
+
+        self.assertEqual(len(first), 2)
+        self.assertIs(first[0]["content"], second[0]["content"])
+        self.assertNotIn("Working Directory", first[0]["content"])
+        self.assertIn("Working Directory: /uno", first[1]["content"])
+        self.assertIn("Working Directory: /due", second[1]["content"])
+
+    def test_legacy_layout_is_single_system_message(self):
+        messages = prompts.build_system_messages(config.BASE_SPECIALIST_PROMPT, self.tools)
+        self.assertEqual(len(messages), 1)
+        self.assertIn("Working Directory:", messages[0]["content"])
+
+
+    def test_response_schema_from_tool_definitions(self):
+        schema = prompts.response_schema_for(prompts.tool_names_for_category("system_command"))
+        branches = {b["properties"]["action"]["const"]: b for b in schema["anyOf"]}
+
+        self.assertEqual(set(branches), set(prompts.tool_names_for_category("system_command")))
+        search_args = branches["search_files"]["properties"]["args"]
+        self.assertEqual(search_args["required"], ["query"])
+        self.assertEqual(search_args["properties"]["max_results"], {"type": "number"})
+        self.assertIn("anyOf", search_args["properties"]["extensions"])
+        list_args = branches["list_directory"]["properties"]["args"]
+        self.assertEqual(list_args["properties"]["recursive"], {"type": "boolean"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,241 @@
+import sys
+import os
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_ollama import StubOllamaServer
+import core.cache
+from core.cache import get_router_cache
+from core.classifier import NaiveBayesClassifier
+from core.ollama_client import OllamaClient
+from core import config
+from core.router import (
+    _compiled_rules,
+    _heuristic_route,
+    classify_request,
+    classify_request_async,
+    match_heuristic,
+    normalize_router_input,
+)
+from helpers import TempDirTestCase
+
+
+def _router_reply(category, confidence):
+    def handler(payload):
+        return {
+            "response": f'{{"category": "{category}", "confidence": {confidence}, "reason": "stub"}}',
+            "done": True,
+        }
+    return handler
+
+
+class TestRouter(TempDirTestCase):
+    def setUp(self):
+        # Nessun modello addestrato e nessun log delle decisioni durante i test
+        super().setUp()
+        self.log_file = os.path.join(self.tmp_dir, "router_decisions.jsonl")
+        for name, value in (
+            ("CLASSIFIER_MODEL_FILE", os.path.join(self.tmp_dir, "router_classifier.json")),
+            ("ROUTER_LOG_FILE", self.log_file),
+            ("ROUTER_CACHE_DIR", os.path.join(self.tmp_dir, "router_cache")),
+        ):
+            patcher = patch.object(config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self._reset_decision_cache()
+        self.addCleanup(self._reset_decision_cache)
+
+    def _reset_decision_cache(self):
+        # La prossima get_router_cache() riapre lo store su disco (come un nuovo avvio)
+        core.cache._router_cache = None
+
+    def test_heuristic_routes(self):
+        self.assertEqual(_heuristic_route("apri notepad"), "system_command")
+        self.assertEqual(_heuristic_route("come si fa una lista in python"), "programming_question")
+        self.assertEqual(_heuristic_route("/init"), "system_command")
+        self.assertIsNone(_heuristic_route("raccontami una barzelletta"))
+
+    def test_heuristic_reports_rule_and_weight(self):
+        match = match_heuristic("Ho un Traceback in Python")
+        self.assertEqual(match.category, "programming_question")
+        self.assertEqual(match.rule, r"\btraceback\b")
+        self.assertEqual(match.weight, 1.0)
+
+    def test_heuristic_rules_are_data_driven(self):
+        rules = {
+            "system_command": [r"\b(apri|open)\b"],
+            "programming_question": [[r"\bdecorator[ei]\b", 2.0], "[invalid"],
+        }
+        rules_file = self.write_file("router_rules.json", json.dumps({"general_chat": [r"\bbarzellett[ae]\b"]}))
+        with patch.object(config, "ROUTER_HEURISTIC_RULES", rules), \
+                patch.object(config, "ROUTER_RULES_FILE", rules_file):
+            _compiled_rules.cache_clear()
+            try:
+                # Il peso piu alto vince anche se matcha anche una regola di sistema
+                self.assertEqual(_heuristic_route("apri il file dei decoratori"), "programming_question")
+                self.assertEqual(_heuristic_route("raccontami una barzelletta"), "general_chat")
+                self.assertIsNone(_heuristic_route("installa python"))
+            finally:
+                _compiled_rules.cache_clear()
+
+    def test_malformed_rules_are_skipped(self):
+        rules = {
+            "programming_question": [
+                [r"\bdecorator[ei]\b", "alto"],
+                [r"\bgenerator[ei]\b"],
+                42,
+                r"(?P<nome>\blambda\b)",
+                r"(?P<nome>\bclosure\b)",
+                r"\btraceback\b",
+            ],
+        }
+        with patch.object(config, "ROUTER_HEURISTIC_RULES", rules), patch.object(config, "ROUTER_RULES_FILE", ""):
+            _compiled_rules.cache_clear()
+            try:
+                with self.assertLogs("seeker_cli", level="WARNING") as logs:
+                    self.assertEqual(match_heuristic("una lambda in python").rule, r"(?P<nome>\blambda\b)")
+                self.assertEqual(len(logs.output), 4)
+                # Il gruppo duplicato scarta solo la regola in conflitto, non l'intero livello
+                self.assertEqual(_heuristic_route("ho un traceback"), "programming_question")
+                self.assertIsNone(_heuristic_route("una closure in python"))
+                self.assertIsNone(_heuristic_route("i decoratori"))
+            finally:
+                _compiled_rules.cache_clear()
+
+    def test_sync_and_async_agree(self):
+        handlers = {"generate": _router_reply("programming_question", 0.9)}
+        with StubOllamaServer(handlers=handlers) as server:
+            client = OllamaClient(base_url=server.url)
+            sync_category = classify_request("spiegami i decoratori", client=client)
+            async_category = asyncio.run(classify_request_async("spiegami i decoratori", client=client))
+            client.close()
+
+        self.assertEqual(sync_category, "programming_question")
+        self.assertEqual(async_category, "programming_question")
+
+    def test_accepted_llm_decisions_are_logged(self):
+        handlers = {"generate": _router_reply("programming_question", 0.9)}
+        with StubOllamaServer(handlers=handlers) as server:
+            client = OllamaClient(base_url=server.url)
+            classify_request("spiegami i decoratori", client=client)
+            client.close()
+
+        with open(self.log_file, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records, [
+            {"text": "spiegami i decoratori", "category": "programming_question", "confidence": 0.9, "source": "llm"}
+        ])
+
+    def test_confident_classifier_skips_llm(self):
+        NaiveBayesClassifier().fit([
+            ("spiegami i decoratori", "programming_question"),
+            ("spiegami le closure", "programming_question"),
+            ("raccontami una storia", "general_chat"),
+            ("ciao come stai", "general_chat"),
+        ]).save(config.CLASSIFIER_MODEL_FILE)
+
+        with StubOllamaServer(handlers={"generate": _router_reply("general_chat", 0.9)}) as server:
+            client = OllamaClient(base_url=server.url)
+            with patch.object(config, "CLASSIFIER_CONFIDENCE_THRESHOLD", 0.9):
+                confident = classify_request("spiegami i decoratori", client=client)
+            with patch.object(config, "CLASSIFIER_CONFIDENCE_THRESHOLD", 1.0):
+                escalated = classify_request("spiegami i decoratori", client=client)
+            client.close()
+            requests_seen = len(server.requests)
+
+        self.assertEqual(confident, "programming_question")
+        self.assertEqual(escalated, "general_chat")
+        self.assertEqual(requests_seen, 1)
+
+    def test_async_low_confidence_falls_back(self):
+        handlers = {"generate": _router_reply("programming_question", 0.1)}
+        with StubOllamaServer(handlers=handlers) as server:
+            client = OllamaClient(base_url=server.url)
+            category = asyncio.run(classify_request_async("boh", client=client))
+            client.close()
+
+        self.assertEqual(category, "general_chat")
+
+    def test_async_router_does_not_block_loop(self):
+        async def run(client):
+            ticks = 0
+            router = asyncio.ensure_future(classify_request_async("boh", client=client))
+            while not router.done():
+                ticks += 1
+                await asyncio.sleep(0.01)
+            await client.aclose()
+            return ticks, router.result()
+
+        with StubOllamaServer(delay=0.3) as server:
+            ticks, category = asyncio.run(run(OllamaClient(base_url=server.url)))
+
+        self.assertGreater(ticks, 5)
+        self.assertEqual(category, "general_chat")
+
+    def test_repeated_request_skips_model_round_trip(self):
+        handlers = {"generate": _router_reply("programming_question", 0.9)}
+        with StubOllamaServer(handlers=handlers) as server:
+            client = OllamaClient(base_url=server.url)
+            first = asyncio.run(classify_request_async("spiegami le closure", client=client))
+            second = asyncio.run(classify_request_async("spiegami le closure", client=client))
+            client.close()
+
+            self.assertEqual(len(server.requests), 1)
+        self.assertEqual(first, second)
+
+    def test_normalized_inputs_share_a_decision(self):
+        self.assertEqual(normalize_router_input("Ciao, mi potresti spiegare le closure?"), "spiegare le closure")
+        self.assertEqual(normalize_router_input("  CIAO!! "), "ciao")
+
+        handlers = {"generate": _router_reply("programming_question", 0.9)}
+        with StubOllamaServer(handlers=handlers) as server:
+            client = OllamaClient(base_url=server.url)
+            first = classify_request("spiegami le closure", client=client)
+            second = classify_request("Ciao, per favore spiegami le closure!", client=client)
+            client.close()
+            requests_seen = len(server.requests)
+
+        self.assertEqual((first, second), ("programming_question", "programming_question"))
+        self.assertEqual(requests_seen, 1)
+        self.assertEqual(get_router_cache().stats()["hits"], 1)
+
+    def test_decisions_persist_across_runs(self):
+        handlers = {"generate": _router_reply("programming_question", 0.9)}
+        with StubOllamaServer(handlers=handlers) as server:
+            client = OllamaClient(base_url=server.url)
+            classify_request("spiegami le closure", client=client)
+            self._reset_decision_cache()
+            category = classify_request("spiegami le closure", client=client)
+            client.close()
+            requests_seen = len(server.requests)
+
+        self.assertEqual(category, "programming_question")
+        self.assertEqual(requests_seen, 1)
+        self.assertEqual(get_router_cache().stats()["disk_hits"], 1)
+
+    def test_low_confidence_fallback_expires_sooner(self):
+        handlers = {"generate": _router_reply("programming_question", 0.1)}
+        with StubOllamaServer(handlers=handlers) as server, \
+                patch.object(config, "ROUTER_CACHE_FALLBACK_TTL", 60), \
+                patch.object(config, "ROUTER_CACHE_TTL", 3600):
+            client = OllamaClient(base_url=server.url)
+            with patch("core.cache.time.time", return_value=1000):
+                classify_request("boh", client=client)
+            with patch("core.cache.time.time", return_value=1030):
+                classify_request("boh", client=client)
+            with patch("core.cache.time.time", return_value=1100):
+                category = classify_request("boh", client=client)
+            client.close()
+            requests_seen = len(server.requests)
+
+        self.assertEqual(category, "general_chat")
+        self.assertEqual(requests_seen, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
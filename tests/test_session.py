@@ -3,6 +3,7 @@ import os
 import unittest
 import asyncio
 import logging
+import time
 from unittest.mock import patch, MagicMock, AsyncMock
 
 # Add project root to path
@@ -12,6 +13,14 @@ from core.session import Session
 
 class TestSession(unittest.TestCase):
     def setUp(self):
+        # Niente ricerca reale nella documentazione: indici su disco e chiamate a Ollama restano fuori dai test
+        for target, value in (
+            ('core.session.config.SPECULATIVE_ROUTING', False),
+            ('core.session.tool_consult_documentation', MagicMock(return_value="")),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
         self.session = Session(logging.getLogger("seeker_cli"))
 
     def test_init(self):
@@ -21,6 +30,10 @@ class TestSession(unittest.TestCase):
         result = self.session.handle_local_command("/help")
         self.assertIsNone(result)
 
+    def test_handle_local_command_stats(self):
+        result = self.session.handle_local_command("/stats")
+        self.assertIsNone(result)
+
     def test_handle_local_command_clear(self):
         self.session.history.append({"role": "user", "content": "test"})
         self.session.handle_local_command("/clear")
@@ -29,11 +42,161 @@ class TestSession(unittest.TestCase):
     @patch('core.session.call_ollama', new_callable=AsyncMock)
     def test_process_input_chat(self, mock_call_ollama):
         mock_call_ollama.return_value = '{"action": "chat", "args": {"message": "Hello"}, "thought": "Greeting"}'
-        with patch('core.session.classify_request', MagicMock(return_value="general_chat")):
+        with patch('core.session.classify_request_async', AsyncMock(return_value="general_chat")):
             asyncio.run(self.session.process_input("Hi"))
 
         self.assertTrue(any(m['content'] == 'Hi' for m in self.session.history))
         self.assertTrue(any('"action": "chat"' in m['content'] for m in self.session.history))
 
+    def test_submit_new_request_cancels_in_flight(self):
+        started = []
+
+        async def slow_process(user_input):
+            started.append(user_input)
+            await asyncio.sleep(5)
+
+        async def run():
+            first = asyncio.ensure_future(self.session.submit("prima"))
+            await asyncio.sleep(0.05)
+            second = asyncio.ensure_future(self.session.submit("seconda"))
+            await asyncio.sleep(0.05)
+            self.session.cancel_current()
+            return await first, await second
+
+        with patch.object(self.session, 'process_input', slow_process):
+            results = asyncio.run(run())
+
+        self.assertEqual(started, ["prima", "seconda"])
+        self.assertEqual(results, (False, False))
+
+    def test_streaming_dispatches_before_trailing_tokens(self):
+        pieces = [
+            '{"thought": "Saluto", ',
+            '"action": "chat", "args": {"message": "Ciao!"}',
+            '}',
+            '   ',
+        ]
+        consumed = []
+
+        async def fake_stream(*args, **kwargs):
+            for piece in pieces:
+                consumed.append(piece)
+                yield piece
+
+        with patch('core.session.config.STREAM_RESPONSES', True), \
+                patch('core.session.stream_ollama', fake_stream), \
+                patch('core.session.classify_request_async', AsyncMock(return_value="general_chat")), \
+                patch('sys.stdout'):
+            asyncio.run(self.session.process_input("Hi"))
+
+        self.assertEqual(len(consumed), 2)
+        self.assertIn('"message": "Ciao!"', self.session.history[-1]['content'])
+
+    def test_streaming_malformed_reply_is_repaired(self):
+        pieces = ['{"thought": "x", "action": "chat", ', '"args": {"message": "hi",}}']
+
+        async def fake_stream(*args, **kwargs):
+            for piece in pieces:
+                yield piece
+
+        with patch('core.session.config.STREAM_RESPONSES', True), \
+                patch('core.session.stream_ollama', fake_stream), \
+                patch('core.session.classify_request_async', AsyncMock(return_value="general_chat")), \
+                patch('sys.stdout'):
+            asyncio.run(self.session.process_input("Hi"))
+
+        self.assertIn('"message": "hi"', self.session.history[-1]['content'])
+
+    @patch('core.session.call_ollama', new_callable=AsyncMock)
+    def test_stable_layout_keeps_history_across_inputs(self, mock_call_ollama):
+        mock_call_ollama.return_value = '{"action": "chat", "args": {"message": "Hello"}, "thought": "Greeting"}'
+        with patch('core.session.config.PROMPT_LAYOUT', 'stable'), \
+                patch('core.session.classify_request_async', AsyncMock(return_value="general_chat")):
+            asyncio.run(self.session.process_input("Hi"))
+            asyncio.run(self.session.process_input("Come stai?"))
+
+        contents = [m['content'] for m in self.session.history]
+        self.assertEqual(contents[0], "Hi")
+        self.assertIn("Come stai?", contents)
+        self.assertEqual(len(contents), 4)
+
+    @patch('core.session.call_ollama', new_callable=AsyncMock)
+    def test_broken_json_is_repaired_without_re_ask(self, mock_call_ollama):
+        mock_call_ollama.return_value = "{'thought': 'saluto', 'action': 'chat', 'args': {'message': 'Ciao'}} spero vada bene"
+        with patch('core.session.classify_request_async', AsyncMock(return_value="general_chat")):
+            asyncio.run(self.session.process_input("Hi"))
+
+        self.assertEqual(mock_call_ollama.await_count, 1)
+        self.assertIn('"message": "Ciao"', self.session.history[-1]['content'])
+
+    @patch('core.session.call_ollama', new_callable=AsyncMock)
+    def test_near_miss_action_is_corrected_locally(self, mock_call_ollama):
+        mock_call_ollama.return_value = '{"thought": "saluto", "action": "Chat", "args": {"message": "Ciao"}}'
+        with patch('core.session.classify_request_async', AsyncMock(return_value="general_chat")):
+            asyncio.run(self.session.process_input("Hi"))
+
+        self.assertEqual(mock_call_ollama.await_count, 1)
+
+    @patch('core.session.call_ollama', new_callable=AsyncMock)
+    def test_re_ask_is_bounded(self, mock_call_ollama):
+        mock_call_ollama.return_value = "non so rispondere in JSON"
+        with patch('core.session.config.MAX_FORMAT_RETRIES', 2), \
+                patch('core.session.classify_request_async', AsyncMock(return_value="general_chat")):
+            asyncio.run(self.session.process_input("Hi"))
+
+        self.assertEqual(mock_call_ollama.await_count, 3)
+        self.assertIsNotNone(mock_call_ollama.await_args.kwargs["response_format"])
+
+    def _slow_router(self, category, delay=0.2):
+        async def classify(user_input, client=None):
+            await asyncio.sleep(delay)
+            return category
+        return classify
+
+    def _slow_docs(self, delay=0.2):
+        def consult(query):
+            time.sleep(delay)
+            return "language_docs/python.md:1: list comprehension"
+        return consult
+
+    def test_speculative_routing_overlaps_router_and_docs(self):
+        loop_mock = AsyncMock()
+        with patch('core.session.config.SPECULATIVE_ROUTING', True), \
+                patch('core.session.classify_request_async', self._slow_router("programming_question")), \
+                patch('core.session.tool_consult_documentation', self._slow_docs()), \
+                patch.object(self.session, '_execute_specialist_loop', loop_mock):
+            start = time.perf_counter()
+            asyncio.run(self.session.process_input("raccontami le comprehension"))
+            elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.35)
+        augmented_input, _, category = loop_mock.await_args.args
+        self.assertEqual(category, "programming_question")
+        self.assertIn("list comprehension", augmented_input)
+
+    def test_speculative_routing_discards_docs_for_other_categories(self):
+        loop_mock = AsyncMock()
+        with patch('core.session.config.SPECULATIVE_ROUTING', True), \
+                patch('core.session.classify_request_async', self._slow_router("general_chat", 0.05)), \
+                patch('core.session.tool_consult_documentation', self._slow_docs(0.1)), \
+                patch.object(self.session, '_execute_specialist_loop', loop_mock):
+            asyncio.run(self.session.process_input("raccontami una barzelletta"))
+
+        self.assertEqual(loop_mock.await_args.args[0], "raccontami una barzelletta")
+        self.assertEqual(loop_mock.await_args.args[2], "general_chat")
+
+    def test_speculative_routing_skips_speculation_on_heuristic_match(self):
+        router_mock = AsyncMock(return_value="general_chat")
+        docs_mock = MagicMock(return_value="")
+        with patch('core.session.config.SPECULATIVE_ROUTING', True), \
+                patch('core.session.classify_request_async', router_mock), \
+                patch('core.session.tool_consult_documentation', docs_mock), \
+                patch.object(self.session, '_execute_specialist_loop', AsyncMock()):
+            asyncio.run(self.session.process_input("apri notepad"))
+
+        router_mock.assert_not_awaited()
+        docs_mock.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.telemetry import LLMTelemetry, percentile
+
+
+def _ollama_timings(total_ms, load_ms, eval_count, eval_ms):
+    return {
+        "model": "gemma2:2b",
+        "total_duration": int(total_ms * 1e6),
+        "load_duration": int(load_ms * 1e6),
+        "prompt_eval_count": 100,
+        "prompt_eval_duration": int(50 * 1e6),
+        "eval_count": eval_count,
+        "eval_duration": int(eval_ms * 1e6),
+    }
+
+
+class TestTelemetry(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 51)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_summary_per_role(self):
+        telemetry = LLMTelemetry()
+        telemetry.record("specialist", _ollama_timings(1000, 500, 20, 400), category="general_chat", iteration=1)
+        telemetry.record("specialist", _ollama_timings(3000, 0, 60, 1200), category="general_chat", iteration=2)
+        telemetry.record("router", _ollama_timings(200, 0, 10, 100))
+
+        summary = telemetry.summary()
+        self.assertEqual(summary["specialist"]["calls"], 2)
+        self.assertAlmostEqual(summary["specialist"]["tokens_per_s"], 50.0)
+        self.assertAlmostEqual(summary["specialist"]["load_share"], 0.125)
+        self.assertEqual(summary["specialist"]["p95_ms"], 3000)
+        self.assertEqual(summary["router"]["calls"], 1)
+
+    def test_records_are_appended_to_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics.jsonl")
+            telemetry = LLMTelemetry(metrics_file=path)
+            telemetry.record("router", _ollama_timings(200, 0, 10, 100), category="system_command")
+            telemetry.record("specialist", _ollama_timings(900, 0, 30, 600), iteration=3)
+
+            with open(path, encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f]
+
+        self.assertEqual([r["role"] for r in rows], ["router", "specialist"])
+        self.assertEqual(rows[0]["category"], "system_command")
+        self.assertEqual(rows[1]["iteration"], 3)
+        self.assertEqual(rows[1]["eval_count"], 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
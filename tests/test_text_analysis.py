@@ -0,0 +1,47 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.text_analysis import analyze, fold, stem, tokenize, trigram_similarity, trigrams
+
+
+class TestTextAnalysis(unittest.TestCase):
+    def test_fold_strips_accents(self):
+        self.assertEqual(fold("Perché la CITTÀ"), "perche la citta")
+
+    def test_tokenize_drops_italian_and_english_stopwords(self):
+        self.assertEqual(tokenize("How do I use the decorators?"), ["decorators"])
+        self.assertEqual(tokenize("Perché non è più veloce?"), ["veloce"])
+        # Parole chiave dei linguaggi non sono stopword
+        self.assertEqual(tokenize("for loop with if"), ["for", "loop", "with", "if"])
+
+    def test_inflections_share_a_stem(self):
+        groups = [
+            ["decoratori", "decoratore", "decorators", "decorator"],
+            ["liste", "lista", "lists", "list"],
+            ["classi", "classe", "classes", "class"],
+            ["funzioni", "funzione"],
+            ["eccezioni", "eccezione"],
+            ["amiche", "amici"],
+            ["parsing", "parsed", "parse"],
+        ]
+        for words in groups:
+            self.assertEqual(len({stem(word) for word in words}), 1, words)
+
+    def test_short_words_and_identifiers_are_kept(self):
+        self.assertEqual(stem("sql"), "sql")
+        self.assertEqual(stem("string"), "string")
+        self.assertEqual(stem("utf8"), "utf8")
+        self.assertEqual(analyze("__init__ e os.path"), ["__init__", "os", "path"])
+
+    def test_trigram_similarity(self):
+        self.assertEqual(trigram_similarity(trigrams("decorator"), trigrams("decorator")), 1.0)
+        self.assertGreater(trigram_similarity(trigrams("decoratro"), trigrams("decorator")), 0.6)
+        self.assertLess(trigram_similarity(trigrams("decorator"), trigrams("dizionar")), 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()